@@ -1,57 +1,93 @@
 '''This module is the main module of the application.'''
+import asyncio
+import contextlib
 import os
-import pkgutil
-import importlib
-from app.commands import CommandHandler, Command
+import sys
+from app.batch import BatchRunner
+from app.commands import CommandHandler
+from app.log_pipeline import configure_logging, stop_logging
+from app.manifest import load_manifest
 from dotenv import load_dotenv
 import logging
-import logging.config
+
+logger = logging.getLogger(__name__)
 
 class App:
     '''This class is the main class of the application.'''
     def __init__(self):
         os.makedirs('logs', exist_ok=True)
-        self.configure_logging()
+        # The logging settings may come from the .env file as well.
         load_dotenv()
+        self.configure_logging()
         self.settings = self.load_environment_variables()
         self.settings.setdefault('ENVIRONMENT', 'PRODUCTION')
         self.command_handler = CommandHandler()
 
     def configure_logging(self):
-        '''This method configures the logging of the application.'''
-        logging_conf_path = 'logging.conf'
-        if os.path.exists(logging_conf_path):
-            logging.config.fileConfig(logging_conf_path, disable_existing_loggers=False)
-        else: # pragma: no cover
-            logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-        logging.info('Logging configured')
+        '''This method configures the logging of the application, see app.log_pipeline.'''
+        configure_logging('logging.conf')
+        logger.info('Logging configured')
     
+    def close(self):
+        '''This method writes the queued log records and stops the logging thread, see app.log_pipeline.'''
+        stop_logging()
+
     def load_environment_variables(self):
         settings = {key: value for key, value in os.environ.items()}
-        logging.info("Environment variables loaded.")
+        logger.info("Environment variables loaded.")
         return settings
     
     def load_plugins(self):
-        '''This method loads all the plugins from the app.plugins package.'''
-        plugins_package = 'app.plugins'
-        for _, plugin_name, is_pkg in pkgutil.iter_modules([plugins_package.replace('.', '/')]):
-            if is_pkg:
-                try:
-                    plugin_module = importlib.import_module(f'{plugins_package}.{plugin_name}')
-                except ImportError as e: # pragma: no cover
-                    logging.error(f"Error loading plugin {plugin_name}: {e}")
-                    continue
-                for item_name in dir(plugin_module):
-                    item = getattr(plugin_module, item_name)
-                    try:
-                        if issubclass(item, (Command)):
-                            self.command_handler.set_command(plugin_name, item())
-                    except TypeError:
-                        continue
-
-    def start(self):
+        '''
+        This method registers all the plugins of the app.plugins package.
+        The plugins are found through the cached manifest and only imported when their command is first used.
+        '''
+        self.command_handler.register_manifest(load_manifest('app.plugins'))
+
+    def session(self, session_id: str = None):
+        '''This method returns the context under which commands record into the given session, None for the default one.'''
+        # Imported here because the calculator needs the environment loaded by __init__ (see load_dotenv).
+        from calculator.sessions import use_session # pylint: disable=import-outside-toplevel
+        return use_session(session_id)
+
+    def run_batch(self, script: str, output_path: str = None, session: str = None) -> int:
+        '''
+        This method runs the commands of a script file ('-' for stdin) without prompting,
+        writing the results to stdout or output_path. It returns 1 when a line failed, 0 otherwise.
+        '''
+        self.load_plugins()
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(self.session(session))
+            lines = sys.stdin if script == '-' else stack.enter_context(open(script, encoding='utf-8'))
+            output = stack.enter_context(open(output_path, 'w', encoding='utf-8')) if output_path else sys.stdout
+            failed = BatchRunner(self.command_handler, output).run(lines)
+        return 1 if failed else 0
+
+    def serve_metrics(self, port: int, host: str = '127.0.0.1'):
+        '''This method serves the metrics of the commands in the Prometheus text format at http://host:port/metrics.'''
+        if self.command_handler.metrics is None:
+            raise ValueError('Metrics are disabled, set CALCULATOR_METRICS to on to serve them')
+        server = self.command_handler.metrics.serve(port, host)
+        logger.info("Serving the metrics on http://%s:%s/metrics", host, server.server_port)
+        return server
+
+    def serve(self, host: str = '127.0.0.1', port: int = 8000, workers: int = 4, executor: str = 'thread'):
+        '''This method serves the calculator over HTTP/JSON on localhost until it is interrupted.'''
+        # Imported here because the calculator needs the environment loaded by __init__ (see load_dotenv).
+        from app.server import CalculatorServer # pylint: disable=import-outside-toplevel
+        server = CalculatorServer(host, port, workers, executor)
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            logger.info('Calculator server interrupted')
+
+    def start(self, session: str = None):
         '''This method starts the application.'''
         self.load_plugins()
         print("Type 'menu' to see all available commands. Type 'exit' to exit.")
-        while True:
-            self.command_handler.executed_command(input(">>> ").strip())
+        try:
+            with self.session(session):
+                while True:
+                    self.command_handler.executed_command(input(">>> ").strip())
+        finally:
+            self.close()
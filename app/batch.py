@@ -0,0 +1,82 @@
+'''
+This module contains the BatchRunner class, which runs fully specified commands such as "add 1 2" or "mean 1,2,3"
+from a script file or stdin without prompting, and streams the result message of every command to stdout or a results file.
+The arguments of every command are parsed with the argument schema it declares in the command registry,
+then the command is executed with them instead of prompting for them.
+'''
+import itertools
+import logging
+import sys
+from app.commands import ArgumentError, parse_arguments
+
+logger = logging.getLogger(__name__)
+
+class BatchRunner:
+    '''This class runs the commands of a script without prompting for their arguments.'''
+    def __init__(self, command_handler, output=None, errors=None, quiet: bool = True):
+        self.command_handler = command_handler
+        self.output = output or sys.stdout
+        self.errors = errors or sys.stderr
+        # The info logs of every command cost more than the commands themselves, a quiet run only logs warnings and errors.
+        self.quiet = quiet
+        # The parse table, built once from the argument schemas of the registry.
+        self.schemas = {info.name: info.arguments for info in command_handler.describe()}
+
+    def parse(self, line: str):
+        '''This method splits a script line into its command name and parsed arguments, None for blank and comment lines.'''
+        tokens = line.split()
+        if not tokens or tokens[0].startswith('#'):
+            return None
+        command_name, tokens = tokens[0], tokens[1:]
+        try:
+            schema = self.schemas[command_name]
+        except KeyError as e:
+            self.command_handler.record_unknown_command()
+            raise ValueError(f"No such command: {command_name}") from e
+        # A trailing list may be typed with spaces after the commas, and a trailing text such as an expression with spaces anywhere.
+        if schema and schema[-1]['type'] in ('decimal_list', 'str') and len(tokens) > len(schema):
+            separator = ' ' if schema[-1]['type'] == 'str' else ''
+            tokens = tokens[:len(schema) - 1] + [separator.join(tokens[len(schema) - 1:])]
+        # Trailing arguments with a default, such as the page of view_history, may be left out.
+        required = len(schema) - sum(1 for _ in itertools.takewhile(lambda argument: 'default' in argument, reversed(schema)))
+        if not required <= len(tokens) <= len(schema):
+            raise ValueError(f"{command_name} expects {len(schema)} arguments, got {len(tokens)}")
+        try:
+            return command_name, parse_arguments(schema, dict(zip((argument['name'] for argument in schema), tokens)))
+        except ArgumentError as e:
+            raise ValueError(f"Invalid number input: {' '.join(tokens)}") from e
+
+    def run_line(self, line: str) -> bool:
+        '''This method runs a single script line, returns False when the script should stop.'''
+        parsed = self.parse(line)
+        if parsed is None:
+            return True
+        command_name, arguments = parsed
+        if command_name == 'exit':
+            return False
+        result = self.command_handler.execute(command_name, arguments)
+        if not result.ok:
+            raise ValueError(result.message)
+        if result.message:
+            self.output.write(result.message + '\n')
+        return True
+
+    def run(self, lines) -> int:
+        '''This method runs every line of a script, reports the failing lines and returns how many failed.'''
+        count = failed = 0
+        disabled = logging.root.manager.disable
+        if self.quiet:
+            logging.disable(max(disabled, logging.INFO))
+        try:
+            for number, line in enumerate(lines, start=1):
+                count += 1
+                try:
+                    if not self.run_line(line):
+                        break
+                except (ArithmeticError, ValueError, TypeError) as e:
+                    failed += 1
+                    self.errors.write(f"line {number}: {line.strip()}: {e}\n")
+        finally:
+            logging.disable(disabled)
+        logger.info("Batch run finished, %s lines, %s failed", count, failed)
+        return failed
@@ -1,25 +1,244 @@
+import importlib
+import json
+import logging
+import os
 from abc import ABC, abstractmethod
+from decimal import Decimal, InvalidOperation
+from time import perf_counter_ns
+from app.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+class ArgumentError(ValueError):
+    '''This class is the error raised for arguments that do not match the argument schema of a command.'''
+
+class UnknownCommandError(KeyError):
+    '''This class is the error raised for a command name that is not registered.'''
+
+def parse_decimal(value) -> Decimal:
+    '''This function parses a number into a Decimal.'''
+    return value if isinstance(value, Decimal) else Decimal(str(value).strip())
+
+def parse_decimal_list(value) -> list[Decimal]:
+    '''This function parses numbers separated by commas, or a sequence of numbers, into a list of Decimals.'''
+    return [parse_decimal(item) for item in (value.split(',') if isinstance(value, str) else value)]
+
+ARGUMENT_PARSERS = {
+    'decimal': parse_decimal,
+    'decimal_list': parse_decimal_list,
+    'int': int,
+    'str': str,
+}
+
+def named_values(schema, values) -> dict:
+    '''This function returns the values by argument name, whether they are given as a mapping or a sequence.'''
+    return dict(values) if isinstance(values, dict) else dict(zip((argument['name'] for argument in schema), values))
+
+def parse_arguments(schema, values) -> dict:
+    '''
+    This function parses raw values (strings as typed) or already typed values into the types of an argument schema.
+    The values are a mapping by argument name or a sequence in the order of the schema.
+    Empty or missing values take the default of their argument when it has one.
+    '''
+    if not isinstance(values, dict):
+        values = list(values)
+        if len(values) != len(schema):
+            raise ArgumentError(f"Expected {len(schema)} arguments, got {len(values)}")
+        values = {argument['name']: value for argument, value in zip(schema, values)}
+    arguments = {}
+    for argument in schema:
+        value = values.get(argument['name'], '')
+        if value == '' and 'default' in argument:
+            value = argument['default']
+        try:
+            arguments[argument['name']] = ARGUMENT_PARSERS[argument['type']](value)
+        except (InvalidOperation, ValueError, TypeError) as e:
+            raise ArgumentError(f"Invalid value for {argument['name']}: {value!r}") from e
+    return arguments
+
+class CommandResult:
+    '''This class holds the outcome of a command: whether it succeeded, the value it computed and the message for the user.'''
+    def __init__(self, value=None, message: str = '', ok: bool = True):
+        self.value = value
+        self.message = message
+        self.ok = ok
+
+    def __repr__(self):
+        '''This function returns a string representation of the CommandResult object.'''
+        return f"CommandResult(value={self.value!r}, message={self.message!r}, ok={self.ok})"
 
 class Command(ABC):
-    '''This class is the abstract base class for all the commands.'''
+    '''
+    This class is the abstract base class for all the commands.
+    Commands implement run() with the typed arguments of their schema and return a CommandResult.
+    execute() is the entry point, structured with arguments and interactive without them.
+    '''
+    # One line shown by the menu, and the inputs the command asks for, for example
+    # ({'name': 'a', 'type': 'decimal', 'prompt': 'Enter first number: '},).
+    description = ''
+    arguments = ()
+    # The CommandHandler the command is registered with, set by CommandHandler.set_command.
+    command_handler = None
+
+    def execute(self, args=None) -> CommandResult:
+        '''
+        This method runs the command. Given args, a mapping or a sequence of raw or typed values, it returns the result
+        without prompting or printing. Without args it prompts for every argument and prints the result, as in the REPL.
+        '''
+        interactive = args is None
+        if interactive:
+            args = self.prompt()
+        try:
+            arguments = parse_arguments(self.arguments, args)
+        except ArgumentError as e:
+            result = self.invalid_arguments(named_values(self.arguments, args), e)
+        else:
+            result = self.run(**arguments)
+        if interactive and result.message:
+            print(result.message)
+        return result
+
+    def prompt(self) -> dict[str, str]:
+        '''This method asks the user for every argument of the command.'''
+        return {argument['name']: input(argument['prompt']).strip() for argument in self.arguments}
+
+    def invalid_arguments(self, values: dict, error: ArgumentError) -> CommandResult:
+        '''This method returns the result for arguments that could not be parsed, values holds them as they were given.'''
+        logger.error("Invalid arguments: %s", error)
+        return CommandResult(message=f"Invalid input: {error}", ok=False)
+
     @abstractmethod
-    def execute(self): # pragma: no cover
+    def run(self, **arguments) -> CommandResult:
         '''This method is the abstract method that should be implemented in the child classes.'''
-        pass
+
+class LazyCommand(Command):
+    '''This class stands in for a plugin command and only imports the plugin the first time it is executed.'''
+    def __init__(self, target: str):
+        self.target = target
+        self.command = None
+
+    def load(self) -> Command:
+        '''This method imports the plugin module and instantiates the command, once.'''
+        if self.command is None:
+            module_name, class_name = self.target.split(':')
+            self.command = getattr(importlib.import_module(module_name), class_name)()
+            self.command.command_handler = self.command_handler
+        return self.command
+
+    def execute(self, args=None) -> CommandResult:
+        '''This method executes the plugin command, the error of a plugin that cannot be loaded is only printed in the REPL.'''
+        try:
+            command = self.load()
+        except (ImportError, AttributeError) as e:
+            logger.error("Error loading plugin %s: %s", self.target, e)
+            if args is None:
+                print(f'Could not load command: {e}')
+            return CommandResult(message=f'Could not load command: {e}', ok=False)
+        return command.execute() if args is None else command.execute(args)
+
+    def run(self, **arguments) -> CommandResult:
+        '''This method runs the plugin command with typed arguments.'''
+        return self.load().run(**arguments)
+
+class CommandInfo:
+    '''This class holds the metadata of a registered command.'''
+    def __init__(self, name: str, command: Command, description: str = '', arguments=()):
+        self.name = name
+        self.command = command
+        self.description = description
+        self.arguments = tuple(arguments)
+
+    @property
+    def loaded(self) -> bool:
+        '''Whether the command is ready to run without importing its plugin.'''
+        return not isinstance(self.command, LazyCommand) or self.command.command is not None
+
+    def to_dict(self) -> dict:
+        '''This method returns the metadata as a dictionary.'''
+        return {'name': self.name, 'description': self.description, 'arguments': [dict(argument) for argument in self.arguments], 'loaded': self.loaded}
 
 class CommandHandler:
-    '''This class is responsible for handling the commands.'''
+    '''This class is responsible for handling the commands, and keeps a registry of their metadata.'''
     def __init__(self):
         self.commands = {}
-    
-    def set_command(self, command_name: str, command: Command):
-        '''This method sets the command.'''
+        self.registry: dict[str, CommandInfo] = {}
+        # The calls, errors and latencies of the commands, see app.metrics. 'off' dispatches without measuring.
+        setting = os.environ.get('CALCULATOR_METRICS', 'on')
+        if setting not in ('on', 'off'):
+            raise ValueError(f"Unsupported metrics setting: {setting}")
+        self.metrics = Metrics() if setting == 'on' else None
+
+    def set_command(self, command_name: str, command: Command, description: str = None, arguments=None):
+        '''This method sets the command, the metadata defaults to the one declared by the command class.'''
+        command.command_handler = self
         self.commands[command_name] = command
-    
+        self.registry[command_name] = CommandInfo(
+            command_name,
+            command,
+            command.description if description is None else description,
+            command.arguments if arguments is None else arguments,
+        )
+
+    def register_manifest(self, manifest: dict[str, dict]):
+        '''This method registers every command of a plugin manifest as a LazyCommand.'''
+        for command_name, entry in manifest.items():
+            self.set_command(command_name, LazyCommand(entry['target']), entry['description'], entry['arguments'])
+
+    def describe(self) -> list[CommandInfo]:
+        '''This method returns the metadata of every registered command, sorted by name.'''
+        return [self.registry[command_name] for command_name in sorted(self.registry)]
+
+    def dump(self, output_format: str = 'json', program: str = 'main.py') -> str:
+        '''This method dumps the registry as JSON, or as a bash completion script for the given program.'''
+        if output_format == 'json':
+            return json.dumps([info.to_dict() for info in self.describe()], indent=2)
+        if output_format == 'bash':
+            words = ' '.join(sorted(self.registry))
+            function = '_' + ''.join(character if character.isalnum() else '_' for character in program) + '_complete'
+            return (
+                f'{function}() {{\n'
+                f'    COMPREPLY=($(compgen -W "{words}" -- "${{COMP_WORDS[COMP_CWORD]}}"))\n'
+                f'}}\n'
+                f'complete -F {function} {program}\n'
+            )
+        raise ValueError(f"Unsupported dump format: {output_format}")
+
+    def record_unknown_command(self):
+        '''This method counts a command name that is not registered.'''
+        if self.metrics is not None:
+            self.metrics.record_unknown_command()
+
+    def execute(self, command_name: str, args=None) -> CommandResult:
+        '''
+        This method executes a command by name, with the given arguments or prompting for them (see Command.execute),
+        and records its latency, and whether it failed, in the metrics.
+        '''
+        try:
+            command = self.commands[command_name]
+        except KeyError:
+            self.record_unknown_command()
+            raise UnknownCommandError(command_name) from None
+        if self.metrics is None:
+            return command.execute() if args is None else command.execute(args)
+        metrics = self.metrics.command(command_name)
+        metrics.start()
+        start = perf_counter_ns()
+        try:
+            result = command.execute() if args is None else command.execute(args)
+        except Exception:
+            metrics.finish(perf_counter_ns() - start, True)
+            raise
+        metrics.finish(perf_counter_ns() - start, not result.ok)
+        return result
+
     def executed_command(self, command_name: str):
         '''This method executes the command.'''
         # EAFP (Easier to Ask for Forgiveness than Permission)
         try:
-            self.commands[command_name].execute()
-        except KeyError:
+            self.execute(command_name)
+        except UnknownCommandError:
             print(f'No such command: {command_name}')
+        except Exception as e: # pylint: disable=broad-exception-caught
+            # The failure is already counted in the metrics, the REPL reports it and goes on.
+            logger.exception("Command %s failed", command_name)
+            print(f'Command {command_name} failed: {e!r}')
@@ -0,0 +1,130 @@
+# pylint: disable=line-too-long
+'''
+This module contains the logging pipeline of the app, configured from logging.conf and the environment.
+
+In 'queue' mode, the default, the handlers of logging.conf (the rotating log file and stderr) are moved behind a
+QueueHandler: logging a record only puts it on a queue, and a QueueListener thread formats and writes it, so disk writes
+and file rotations do not stall the commands. In 'sync' mode the handlers write from the thread that logs, as configured.
+
+Messages take %-style arguments, so they are only built for the records that pass the level of their logger. Every
+module logs to its own logger, logging.getLogger(__name__), whose level is set in logging.conf and can be overridden
+with CALCULATOR_LOG_LEVELS, for example 'data_handler=WARNING,app.plugins.mean=DEBUG'. Messages longer than
+CALCULATOR_LOG_MAX_LENGTH characters are truncated, and Preview logs only the first items of a long list.
+'''
+import atexit
+import copy
+import itertools
+import logging
+import logging.config
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_MODES = ('queue', 'sync')
+
+class Preview:
+    '''This class is a log argument showing the first items of a list, built only when the message is.'''
+    __slots__ = ('items', 'limit')
+
+    def __init__(self, items, limit: int = 10):
+        '''This function initializes the Preview class.'''
+        self.items = items
+        self.limit = limit
+
+    def __str__(self):
+        '''This function returns the first items separated by commas, and how many more there are.'''
+        text = ','.join(str(item) for item in itertools.islice(self.items, self.limit))
+        hidden = len(self.items) - self.limit
+        return f"{text},... ({hidden} more)" if hidden > 0 else text
+
+def truncate(message: str, max_length: int) -> str:
+    '''This function cuts a message down to max_length characters, saying how many were left out.'''
+    if len(message) <= max_length:
+        return message
+    return f"{message[:max_length]}... ({len(message) - max_length} more characters)"
+
+class TruncateFilter(logging.Filter):
+    '''This class truncates the messages of the records longer than max_length characters.'''
+    def __init__(self, max_length: int):
+        '''This function initializes the TruncateFilter class.'''
+        super().__init__()
+        self.max_length = max_length
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        '''This function replaces the message and arguments of a record with its message, truncated, so every handler reuses it.'''
+        if record.args or len(str(record.msg)) > self.max_length:
+            record.msg, record.args = truncate(record.getMessage(), self.max_length), None
+        return True
+
+class TruncatingQueueHandler(QueueHandler):
+    '''This class puts the records on the queue with their message built and truncated, and leaves the formatting to the listener.'''
+    def __init__(self, log_queue, max_length: int):
+        '''This function initializes the TruncatingQueueHandler class.'''
+        super().__init__(log_queue)
+        self.max_length = max_length
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        '''
+        This function builds the message now, since its arguments may change once the call returns, but unlike
+        QueueHandler.prepare leaves the time, the level and the traceback to the formatters of the listener thread.
+        '''
+        record = copy.copy(record)
+        record.msg, record.args = truncate(record.getMessage(), self.max_length), None
+        return record
+
+_listener: QueueListener = None
+
+def set_levels(levels: str):
+    '''This function sets the levels of loggers from a list such as 'data_handler=WARNING,app=INFO'.'''
+    for entry in filter(None, (entry.strip() for entry in levels.split(','))):
+        name, separator, level = entry.partition('=')
+        if not separator or not isinstance(logging.getLevelName(level.strip().upper()), int):
+            raise ValueError(f"Invalid logger level: {entry!r}, expected name=LEVEL")
+        logging.getLogger(name.strip() or None).setLevel(level.strip().upper())
+
+def configure_logging(config_path: str = 'logging.conf') -> QueueListener:
+    '''This function configures the logging, returns the listener writing the records in queue mode and None otherwise.'''
+    global _listener # pylint: disable=global-statement
+    mode = os.environ.get('CALCULATOR_LOG_MODE', 'queue')
+    if mode not in LOG_MODES:
+        raise ValueError(f"Unsupported logging mode: {mode}")
+    max_length = int(os.environ.get('CALCULATOR_LOG_MAX_LENGTH', '1000'))
+    # The records queued for the previous handlers are written before they are replaced.
+    stop_logging()
+    if os.path.exists(config_path):
+        logging.config.fileConfig(config_path, disable_existing_loggers=False)
+    else: # pragma: no cover
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    set_levels(os.environ.get('CALCULATOR_LOG_LEVELS', ''))
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    if mode == 'sync':
+        for handler in handlers:
+            handler.addFilter(TruncateFilter(max_length))
+        return None
+    log_queue = queue.SimpleQueue()
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(TruncatingQueueHandler(log_queue, max_length))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def stop_logging():
+    '''
+    This function stops the listener thread once it wrote the queued records, and puts its handlers back on the root
+    logger in place of the queue, so the records logged afterwards are written from the thread that logs them.
+    '''
+    global _listener # pylint: disable=global-statement
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    root = logging.getLogger()
+    for queue_handler in [handler for handler in root.handlers if isinstance(handler, TruncatingQueueHandler)]:
+        root.removeHandler(queue_handler)
+        for handler in listener.handlers:
+            handler.addFilter(TruncateFilter(queue_handler.max_length))
+            root.addHandler(handler)
+
+atexit.register(stop_logging)
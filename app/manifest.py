@@ -0,0 +1,103 @@
+'''
+This module contains the plugin manifest, a map of command names to the plugin class implementing them ("module:class")
+and the description and arguments declared by that class.
+The manifest is built by parsing the plugin sources with ast instead of importing them, and cached in a JSON file
+inside the plugin folder. The cache is rebuilt when a plugin is added or removed or the modification time of one changes.
+'''
+import ast
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE_NAME = '.manifest.json'
+MANIFEST_VERSION = 2
+
+def plugin_signature(plugins_path: str) -> dict[str, int]:
+    '''This function returns the modification time of the __init__.py of every plugin package.'''
+    signature = {}
+    for entry in os.scandir(plugins_path):
+        init_path = os.path.join(entry.path, '__init__.py')
+        if entry.is_dir() and os.path.exists(init_path):
+            signature[entry.name] = os.stat(init_path).st_mtime_ns
+    return signature
+
+def command_classes(source: str) -> list[str]:
+    '''This function returns the names of the classes of a module source that subclass Command.'''
+    return [node.name for node in _command_nodes(ast.parse(source))]
+
+def _command_nodes(tree: ast.Module) -> list[ast.ClassDef]:
+    '''This function returns the class definitions of a module that subclass Command, directly or through another command.'''
+    nodes = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        for base in node.bases:
+            base_name = base.attr if isinstance(base, ast.Attribute) else getattr(base, 'id', None)
+            if base_name == 'Command' or base_name in [command.name for command in nodes]:
+                nodes.append(node)
+                break
+    return nodes
+
+def _class_attributes(node: ast.ClassDef) -> dict:
+    '''This function returns the literal class attributes of a class definition.'''
+    attributes = {}
+    for statement in node.body:
+        if isinstance(statement, ast.Assign) and len(statement.targets) == 1 and isinstance(statement.targets[0], ast.Name):
+            try:
+                attributes[statement.targets[0].id] = ast.literal_eval(statement.value)
+            except ValueError:
+                continue
+    return attributes
+
+def plugin_entry(source: str, target_module: str):
+    '''This function returns the manifest entry of a plugin source, None when it has no command.'''
+    tree = ast.parse(source)
+    nodes = _command_nodes(tree)
+    if not nodes:
+        return None
+    attributes = _class_attributes(nodes[-1])
+    # Plugins that do not describe themselves are described by the first line of their module docstring.
+    description = attributes.get('description') or (ast.get_docstring(tree) or '').strip().split('\n')[0]
+    return {
+        'target': f'{target_module}:{nodes[-1].name}',
+        'description': description,
+        'arguments': [dict(argument) for argument in attributes.get('arguments', ())],
+    }
+
+def build_manifest(plugins_package: str, plugins_path: str) -> dict[str, dict]:
+    '''This function builds the manifest by parsing the source of every plugin package.'''
+    manifest = {}
+    for plugin_name in sorted(plugin_signature(plugins_path)):
+        try:
+            with open(os.path.join(plugins_path, plugin_name, '__init__.py'), encoding='utf-8') as file:
+                entry = plugin_entry(file.read(), f'{plugins_package}.{plugin_name}')
+        except (OSError, SyntaxError, TypeError, ValueError) as e:
+            logger.error("Error reading plugin %s: %s", plugin_name, e)
+            continue
+        if entry:
+            manifest[plugin_name] = entry
+    return manifest
+
+def load_manifest(plugins_package: str, plugins_path: str = None) -> dict[str, dict]:
+    '''This function returns the cached manifest of the plugin package, rebuilding the cache when a plugin changed.'''
+    plugins_path = plugins_path or plugins_package.replace('.', '/')
+    manifest_path = os.path.join(plugins_path, MANIFEST_FILE_NAME)
+    signature = plugin_signature(plugins_path)
+    try:
+        with open(manifest_path, encoding='utf-8') as file:
+            cached = json.load(file)
+        if cached.get('version') == MANIFEST_VERSION and cached.get('signature') == signature:
+            return cached['commands']
+    except (OSError, ValueError, AttributeError):
+        pass
+    commands = build_manifest(plugins_package, plugins_path)
+    try:
+        with open(manifest_path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump({'version': MANIFEST_VERSION, 'signature': signature, 'commands': commands}, file, indent=2)
+        os.replace(manifest_path + '.tmp', manifest_path)
+        logger.info("Plugin manifest written to %s", manifest_path)
+    except OSError as e:
+        logger.warning("Could not write the plugin manifest: %s", e)
+    return commands
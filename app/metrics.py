@@ -0,0 +1,238 @@
+# pylint: disable=line-too-long
+'''
+This module contains the metrics of the commands dispatched by the CommandHandler: the number of calls and errors and
+the commands in flight, by command, a latency histogram per command, and the number of unknown command names.
+
+The histograms are log-linear like HDR histograms: the latencies, in nanoseconds, are counted in buckets of 32 values
+per power of two, so every percentile is within 1/32 (about 3%) of the exact one whatever the range, with a fixed
+number of buckets and an update that is a few integer operations.
+
+The metrics are printed by the stats command, and exported in the Prometheus text format to a file or served on
+localhost at /metrics.
+'''
+import os
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Each power of two is split in 2**SIGNIFICANT_BITS buckets, values below 2**(SIGNIFICANT_BITS+1) have a bucket each.
+SIGNIFICANT_BITS = 5
+# Latencies of 2**MAX_BITS nanoseconds (about 9.8 hours) and above are counted in the last bucket.
+MAX_BITS = 45
+BUCKETS = (MAX_BITS - SIGNIFICANT_BITS + 1) << SIGNIFICANT_BITS
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def bucket_index(value: int) -> int:
+    '''This function returns the bucket of a value in nanoseconds.'''
+    shift = value.bit_length() - SIGNIFICANT_BITS - 1
+    if shift <= 0:
+        return value
+    return min((shift << SIGNIFICANT_BITS) + (value >> shift), BUCKETS - 1)
+
+def bucket_high(index: int) -> int:
+    '''This function returns the highest value counted in a bucket.'''
+    if index < 2 << SIGNIFICANT_BITS:
+        return index
+    shift = (index >> SIGNIFICANT_BITS) - 1
+    return ((index - (shift << SIGNIFICANT_BITS) + 1) << shift) - 1
+
+class LatencyHistogram:
+    '''This class counts latencies in nanoseconds in log-linear buckets.'''
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        '''This function initializes the LatencyHistogram class.'''
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int):
+        '''This function counts a latency in nanoseconds.'''
+        shift = value.bit_length() - SIGNIFICANT_BITS - 1
+        # bucket_index, inlined since it runs on every dispatch.
+        if shift <= 0:
+            index = value
+        else:
+            index = (shift << SIGNIFICANT_BITS) + (value >> shift)
+            if index >= BUCKETS:
+                index = BUCKETS - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, quantile: float) -> int:
+        '''This function returns the latency in nanoseconds below which the given fraction of the latencies fall, 0 when there is none.'''
+        if not 0 <= quantile <= 1:
+            raise ValueError(f"The quantile must be between 0 and 1, not {quantile}")
+        if self.count == 0:
+            return 0
+        # The rank of the latency, counting from 1, at least the first one.
+        rank = max(1, -int(-quantile * self.count // 1))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bucket_high(index), self.max)
+        return self.max # pragma: no cover
+
+    @property
+    def mean(self) -> float:
+        '''The mean latency in nanoseconds.'''
+        return self.total / self.count if self.count else 0.0
+
+class CommandMetrics:
+    '''
+    This class holds the metrics of one command. A dispatch takes the lock once, when it finishes: the commands in flight
+    are the entries of a deque, whose append and pop are atomic, so a call that starts does not wait for the lock.
+    '''
+    __slots__ = ('calls', 'errors', 'running', 'latency', 'lock')
+
+    def __init__(self):
+        '''This function initializes the CommandMetrics class.'''
+        self.calls = 0
+        self.errors = 0
+        self.running = deque()
+        self.latency = LatencyHistogram()
+        self.lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        '''The number of calls of the command that started and did not end.'''
+        return len(self.running)
+
+    def start(self):
+        '''This function counts a call of the command that starts.'''
+        self.running.append(None)
+
+    def finish(self, latency: int, failed: bool):
+        '''This function records the latency in nanoseconds of a call that ended, and whether it failed.'''
+        with self.lock:
+            self.calls += 1
+            self.latency.record(latency)
+            if failed:
+                self.errors += 1
+        self.running.pop()
+
+def format_duration(nanoseconds: float) -> str:
+    '''This function formats a duration in nanoseconds with a readable unit.'''
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('µs', 1e3)):
+        if nanoseconds >= scale:
+            return f"{nanoseconds / scale:.1f}{unit}"
+    return f"{nanoseconds:.0f}ns"
+
+def escape_label(value: str) -> str:
+    '''This function escapes a Prometheus label value.'''
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Metrics:
+    '''
+    This class holds the metrics of every command, by name, and the number of unknown command names.
+    Commands may be dispatched from several threads, the REPL, batch runs and the server, so the counters of a command
+    are updated under its own lock, and the commands and the unknown command names under the lock of the Metrics.
+    The exporters read the counters without waiting for the commands in flight.
+    '''
+    def __init__(self):
+        '''This function initializes the Metrics class.'''
+        self.commands: dict[str, CommandMetrics] = {}
+        self.unknown_commands = 0
+        self.lock = threading.Lock()
+
+    def command(self, command_name: str) -> CommandMetrics:
+        '''This function returns the metrics of a command, created on its first call.'''
+        metrics = self.commands.get(command_name)
+        if metrics is None:
+            with self.lock:
+                metrics = self.commands.setdefault(command_name, CommandMetrics())
+        return metrics
+
+    def record_unknown_command(self):
+        '''This function counts a command name that is not registered.'''
+        with self.lock:
+            self.unknown_commands += 1
+
+    def sorted_commands(self) -> list[tuple[str, CommandMetrics]]:
+        '''This function returns the (name, metrics) pairs of the commands sorted by name.'''
+        with self.lock:
+            return sorted(self.commands.items())
+
+    def table(self) -> str:
+        '''This function returns the metrics as a table, one line per command sorted by name.'''
+        header = f"{'command':<16}{'calls':>8}{'errors':>8}{'in flight':>11}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}"
+        lines = [header]
+        for command_name, metrics in self.sorted_commands():
+            latency = metrics.latency
+            durations = (latency.mean, latency.percentile(0.5), latency.percentile(0.9), latency.percentile(0.99), latency.max)
+            lines.append(f"{command_name:<16}{metrics.calls:>8}{metrics.errors:>8}{metrics.in_flight:>11}" + ''.join(f"{format_duration(duration):>10}" for duration in durations))
+        lines.append(f"Unknown commands: {self.unknown_commands}")
+        return "\n".join(lines)
+
+    def to_prometheus(self) -> str:
+        '''This function returns the metrics in the Prometheus text exposition format, latencies in seconds.'''
+        commands = self.sorted_commands()
+        lines = [
+            '# HELP calculator_command_calls_total Commands executed.',
+            '# TYPE calculator_command_calls_total counter',
+            *(f'calculator_command_calls_total{{command="{escape_label(name)}"}} {metrics.calls}' for name, metrics in commands),
+            '# HELP calculator_command_errors_total Commands that failed or raised.',
+            '# TYPE calculator_command_errors_total counter',
+            *(f'calculator_command_errors_total{{command="{escape_label(name)}"}} {metrics.errors}' for name, metrics in commands),
+            '# HELP calculator_commands_in_flight Commands being executed.',
+            '# TYPE calculator_commands_in_flight gauge',
+            *(f'calculator_commands_in_flight{{command="{escape_label(name)}"}} {metrics.in_flight}' for name, metrics in commands),
+            '# HELP calculator_command_duration_seconds Latency of the commands.',
+            '# TYPE calculator_command_duration_seconds summary',
+        ]
+        for name, metrics in commands:
+            label = f'command="{escape_label(name)}"'
+            latency = metrics.latency
+            lines.extend(f'calculator_command_duration_seconds{{{label},quantile="{quantile}"}} {latency.percentile(quantile) / 1e9:.9f}' for quantile in QUANTILES)
+            lines.append(f'calculator_command_duration_seconds_sum{{{label}}} {latency.total / 1e9:.9f}')
+            lines.append(f'calculator_command_duration_seconds_count{{{label}}} {latency.count}')
+        lines.extend([
+            '# HELP calculator_unknown_commands_total Command names that are not registered.',
+            '# TYPE calculator_unknown_commands_total counter',
+            f'calculator_unknown_commands_total {self.unknown_commands}',
+        ])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        '''This function writes the metrics in the Prometheus text format to a file, replacing it at once.'''
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            file.write(self.to_prometheus())
+        os.replace(path + '.tmp', path)
+
+    def serve(self, port: int = 9100, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        '''This function serves the metrics at http://host:port/metrics from a daemon thread and returns the server.'''
+        # Imported here, app.server imports the calculator, which needs the environment loaded by the App.
+        from app.server import is_loopback # pylint: disable=import-outside-toplevel
+        if not is_loopback(host):
+            raise ValueError(f"The metrics endpoint only listens on localhost, not {host}")
+        metrics = self
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            '''This class answers the requests for the metrics.'''
+            def do_GET(self): # pylint: disable=invalid-name
+                '''This method returns the metrics on /metrics, and 404 on any other path.'''
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args): # pylint: disable=redefined-builtin
+                '''This method keeps the requests out of stderr, which the REPL writes to.'''
+
+        server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        threading.Thread(target=server.serve_forever, name='metrics-endpoint', daemon=True).start()
+        return server
@@ -2,16 +2,20 @@
 '''This is the clear plugin. It will clear the screen.'''
 import logging
 import os
-from app.commands import Command
+from app.commands import Command, CommandResult
+
+logger = logging.getLogger(__name__)
 
 class ClearCommand(Command):
     '''This is the clear command. It will clear the screen.'''
-    def execute(self):
+    description = 'Clear the screen'
+    def run(self) -> CommandResult:
         '''This method will clear the terminal screen.'''
-        logging.info('Clear command called')
+        logger.info('Clear command called')
         print('Hello from the clear command!')
         try:
             print('cls' if os.name == 'nt' else 'clear')
             os.system('cls' if os.name == 'nt' else 'clear')
         except Exception as e:
             print(f"Can't do this command: {e}")
+        return CommandResult()
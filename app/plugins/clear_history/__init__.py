@@ -1,11 +1,15 @@
 '''Clears the local history of the user's calculation data.'''
 import logging
-from app.commands import Command
+from app.commands import Command, CommandResult
 from calculator import Calculator
 
+logger = logging.getLogger(__name__)
+
 class ClearDataCommand(Command):
     '''This class is a subclass of the Command class.'''
-    def execute(self):
+    description = 'Clear the local history'
+    def run(self) -> CommandResult:
         '''This method clears the local history of the user's calculation data.'''
         Calculator.clear_history()
-        logging.info('Cleared calculator local history.')
+        logger.info('Cleared calculator local history.')
+        return CommandResult()
@@ -1,13 +1,17 @@
 
 import logging
-from app.commands import Command
+from app.commands import Command, CommandResult
 from calculator import Calculator
 
+logger = logging.getLogger(__name__)
+
 
 class DeleteCSVCommand(Command):
     '''This class is a subclass of the Command class.'''
-    def execute(self):
+    description = 'Delete all saved CSV data'
+    def run(self) -> CommandResult:
         '''This method deletes the CSV file.'''
-        logging.info('Delete CSV command called')
+        logger.info('Delete CSV command called')
         Calculator.delete_csv()
-        logging.info('CSV file deleted.')
\ No newline at end of file
+        logger.info('CSV file deleted.')
+        return CommandResult()
@@ -1,19 +1,29 @@
 import logging
-from app.commands import Command
+from app.commands import Command, CommandResult
 from calculator import Calculator
 
+logger = logging.getLogger(__name__)
+
 class DeleteDataCommand(Command):
     '''This class is a subclass of the Command class.'''
-    def execute(self):
-        '''This method deletes the local history of the user's calculation data.'''
-        try:
-            logging.info('Delete data command called')
-            Calculator.print_all_calculations()
-            delete_index = int(input('Enter the index of the calculation to delete (0 to exit): ')) - 1
-            if delete_index == -1:
-                logging.info('Data not deleted')
-                return
-            Calculator.delete_at_index(delete_index)
-            logging.info(f'Data deleted at location {delete_index+1}')
-        except ValueError:
-            logging.error('Invalid input. Please enter a valid number.')
\ No newline at end of file
+    description = 'Delete a calculation from the local history'
+    arguments = ({'name': 'index', 'type': 'int', 'prompt': 'Enter the index of the calculation to delete (0 to exit): '},)
+    def prompt(self) -> dict[str, str]:
+        '''This method shows the local history before asking which calculation to delete.'''
+        Calculator.print_all_calculations()
+        return super().prompt()
+
+    def run(self, index: int) -> CommandResult:
+        '''This method deletes a calculation from the local history, index 0 deletes nothing.'''
+        logger.info('Delete data command called')
+        if index == 0:
+            logger.info('Data not deleted')
+            return CommandResult()
+        Calculator.delete_at_index(index - 1)
+        logger.info('Data deleted at location %s', index)
+        return CommandResult(index)
+
+    def invalid_arguments(self, values, error) -> CommandResult:
+        '''This method reports an index that is not a number.'''
+        logger.error('Invalid input. Please enter a valid number.')
+        return CommandResult(message='Invalid input. Please enter a valid number.', ok=False)
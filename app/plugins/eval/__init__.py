@@ -0,0 +1,22 @@
+'''This is a plugin that evaluates an expression of several operations, such as (1.5 + 2) * mean(3,4,5) / 7.'''
+import logging
+from app.commands import Command, CommandResult
+from calculator import Calculator
+
+logger = logging.getLogger(__name__)
+
+class EvalCommand(Command):
+    '''This class is a subclass of the Command class.'''
+    description = 'Evaluate an expression, for example (1.5 + 2) * mean(3,4,5) / 7'
+    arguments = ({'name': 'expression', 'type': 'str', 'prompt': 'Enter an expression: '},)
+    def run(self, expression: str) -> CommandResult:
+        '''This method evaluates the expression and records it as one calculation.'''
+        logger.info("Eval command called with expression: %s", expression)
+        try:
+            result = Calculator.evaluate(expression)
+        except ValueError as e:
+            logger.error("Invalid expression: %s", e)
+            return CommandResult(message=f"Invalid expression: {e}", ok=False)
+        logger.info('Expression evaluated.')
+        shown = [str(number) for number in result] if isinstance(result, list) else result
+        return CommandResult(result, f"{expression.strip()} = {shown}")
@@ -1,11 +1,14 @@
 '''This is a plugin that exits the program when called.'''
 import logging
 import sys
-from app.commands import Command
+from app.commands import Command, CommandResult
+
+logger = logging.getLogger(__name__)
 
 class ExitCommand(Command):
     '''This class is a subclass of the Command class.'''
-    def execute(self):
+    description = 'Exit the calculator'
+    def run(self) -> CommandResult:
         '''This method exits the program when called'''
-        logging.info('Exit command called')
+        logger.info('Exit command called')
         sys.exit("Exiting...")
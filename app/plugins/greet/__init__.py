@@ -1,10 +1,13 @@
 '''This is a plugin that greets the user.'''
 import logging
-from app.commands import Command
+from app.commands import Command, CommandResult
+
+logger = logging.getLogger(__name__)
 
 class GreetCommand(Command):
     '''This class is a subclass of the Command class.'''
-    def execute(self):
+    description = 'Greet the user'
+    def run(self) -> CommandResult:
         '''This method greets the user.'''
-        logging.info('Greet command called')
-        print("Hello User!")
+        logger.info('Greet command called')
+        return CommandResult(message="Hello User!")
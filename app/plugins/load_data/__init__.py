@@ -1,11 +1,15 @@
 import logging
-from app.commands import Command
+from app.commands import Command, CommandResult
 from calculator import Calculator
 
+logger = logging.getLogger(__name__)
+
 class LoadDataCommand(Command):
     '''This class is a subclass of the Command class.'''
-    def execute(self):
+    description = 'Load the saved CSV data into the local history'
+    def run(self) -> CommandResult:
         '''This method deletes the local history of the user's calculation data.'''
-        logging.info('Load data command called')
+        logger.info('Load data command called')
         Calculator.load_csv_data()
-        logging.info('Data loaded from CSV file')
+        logger.info('Data loaded from CSV file')
+        return CommandResult()
@@ -1,23 +1,28 @@
 '''This is a plugin that calculates the mean of a list of numbers.'''
 import logging
-from app.commands import Command
-from decimal import InvalidOperation, Decimal
+from app.commands import Command, CommandResult
+from app.log_pipeline import Preview
+from decimal import Decimal
 from calculator import Calculator
 
+logger = logging.getLogger(__name__)
+
 class MeanCommand(Command):
     '''This class is a subclass of the Command class.'''
-    def execute(self):
+    description = 'Take the mean of a list of numbers'
+    arguments = ({'name': 'numbers', 'type': 'decimal_list', 'prompt': 'Enter a list of numbers separated by commas: '},)
+    def run(self, numbers: list[Decimal]) -> CommandResult:
         '''This method calculates the mean of a list of numbers.'''
-        logging.info('Mean command called')
+        logger.info("Mean command called with %d numbers: %s", len(numbers), Preview(numbers))
         try:
-            n = input("Enter a list of numbers separated by commas: ").strip()
-            logging.info(f"Mean command called with arguments: {n}")
-            n_list = n.split(',')
-            n_decimal = [Decimal(i) for i in n_list]
-            result = Calculator.mean(n_decimal)
-            logging.info('Mean calculated.')
-            print(f"mean({n}) = {result}")
-        except InvalidOperation as e:
-            logging.error('Invalid operation: {}'.format(e))
-            print('Invalid operation: {}'.format(e))
-    
\ No newline at end of file
+            result = Calculator.mean(numbers)
+        except ValueError as e:
+            logger.error('Invalid operation: %s', e)
+            return CommandResult(message='Invalid operation: {}'.format(e), ok=False)
+        logger.info('Mean calculated.')
+        return CommandResult(result, f"mean({','.join(str(number) for number in numbers)}) = {result}")
+
+    def invalid_arguments(self, values, error) -> CommandResult:
+        '''This method reports lists that are not numbers.'''
+        logger.error('Invalid operation: %s', error)
+        return CommandResult(message='Invalid operation: {}'.format(error), ok=False)
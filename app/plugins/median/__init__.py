@@ -1,22 +1,28 @@
 '''This is a plugin that calculates the median of a list of numbers.'''
 import logging
-from app.commands import Command
-from decimal import InvalidOperation, Decimal
+from app.commands import Command, CommandResult
+from app.log_pipeline import Preview
+from decimal import Decimal
 from calculator import Calculator
 
+logger = logging.getLogger(__name__)
+
 class MedianCommand(Command):
     '''This class is a subclass of the Command class.'''
-    def execute(self):
+    description = 'Take the median of a list of numbers'
+    arguments = ({'name': 'numbers', 'type': 'decimal_list', 'prompt': 'Enter a list of numbers separated by commas: '},)
+    def run(self, numbers: list[Decimal]) -> CommandResult:
         '''This method calculates the median of a list of numbers.'''
-        logging.info('Median command called')
+        logger.info("Median command called with %d numbers: %s", len(numbers), Preview(numbers))
         try:
-            n = input("Enter a list of numbers separated by commas: ").strip()
-            logging.info(f"Median command called with arguments: {n}")
-            n_list = n.split(',')
-            n_decimal = [Decimal(i) for i in n_list]
-            result = Calculator.median(n_decimal)
-            logging.info('Median calculated.')
-            print(f"Median({n}) = {result}")
-        except InvalidOperation as e:
-            logging.error('Invalid operation: {}'.format(e))
-            print('Invalid operation: {}'.format(e))
+            result = Calculator.median(numbers)
+        except ValueError as e:
+            logger.error('Invalid operation: %s', e)
+            return CommandResult(message='Invalid operation: {}'.format(e), ok=False)
+        logger.info('Median calculated.')
+        return CommandResult(result, f"Median({','.join(str(number) for number in numbers)}) = {result}")
+
+    def invalid_arguments(self, values, error) -> CommandResult:
+        '''This method reports lists that are not numbers.'''
+        logger.error('Invalid operation: %s', error)
+        return CommandResult(message='Invalid operation: {}'.format(error), ok=False)
@@ -1,31 +1,23 @@
 '''This module contains the MenuCommand class.'''
-import importlib
 import logging
-import pkgutil
-from app.commands import Command
+from app.commands import Command, CommandHandler, CommandResult
+from app.manifest import load_manifest
+
+logger = logging.getLogger(__name__)
 
 class MenuCommand(Command):
     '''This class is a subclass of the Command class.'''
-    def execute(self):
-        '''This method prints the available commands.'''
-        logging.info('Menu command called')
-        plugin_package = 'app.plugins'
-        command_set = self._get_command_set(plugin_package = plugin_package)
-        print("Available commands:")
-        for command in command_set:
-            print(f"- {command}")
-    @staticmethod
-    def _get_command_set(plugin_package):
-        '''This method returns a set of available commands.'''
-        command_set = []
-        for _, plugin_name, is_pkg in pkgutil.iter_modules([plugin_package.replace('.', '/')]):
-            if is_pkg:
-                plugin_module = importlib.import_module(f'{plugin_package}.{plugin_name}')
-                for item_name in dir(plugin_module):
-                    item = getattr(plugin_module, item_name)
-                    try:
-                        if issubclass(item, (Command)):
-                            command_set.append(plugin_name)
-                    except TypeError:
-                        continue
-        return set(command_set)
+    description = 'Show all of the available commands'
+    def run(self) -> CommandResult:
+        '''This method lists the available commands from the registry of the command handler.'''
+        logger.info('Menu command called')
+        infos = self._get_command_handler().describe()
+        lines = [f"- {info.name}: {info.description}" if info.description else f"- {info.name}" for info in infos]
+        return CommandResult([info.name for info in infos], "\n".join(["Available commands:", *lines]))
+
+    def _get_command_handler(self) -> CommandHandler:
+        '''This method returns the command handler the menu is registered with, or one built from the plugin manifest.'''
+        if self.command_handler is None:
+            self.command_handler = CommandHandler()
+            self.command_handler.register_manifest(load_manifest('app.plugins'))
+        return self.command_handler
@@ -2,12 +2,16 @@
 import importlib
 import logging
 import pkgutil
-from app.commands import Command
+from app.commands import Command, CommandResult
 from calculator import Calculator
 
+logger = logging.getLogger(__name__)
+
 class PrintCommand(Command):
     '''This class is a subclass of the Command class.'''
-    def execute(self):
-        '''This method prints the history'''
-        Calculator.print_history()
-        logging.info('Printed calculator local history.')
+    description = 'Print the local history'
+    def run(self) -> CommandResult:
+        '''This method returns the history as numbered lines, printed when the command runs in the REPL.'''
+        lines = Calculator.history_lines()
+        logger.info('Printed calculator local history.')
+        return CommandResult(lines, '\n'.join(lines))
@@ -1,11 +1,17 @@
 import logging
-from app.commands import Command
+from app.commands import Command, CommandResult
 from calculator import Calculator
 
+logger = logging.getLogger(__name__)
+
 class SaveDataCommand(Command):
     '''This class is a subclass of the Command class.'''
-    def execute(self):
+    description = 'Save the local history to the CSV file and clear it'
+    def run(self) -> CommandResult:
         '''This method saves the local history of the user's calculation data.'''
-        logging.info('Save data command called')
-        Calculator.save_history_to_csv()
-        logging.info('Data saved to CSV file')
+        logger.info('Save data command called')
+        if not Calculator.save_history_to_csv():
+            logger.error('Could not save the data to the CSV file')
+            return CommandResult(message='Could not save the history, it is kept until the next save', ok=False)
+        logger.info('Data saved to CSV file')
+        return CommandResult()
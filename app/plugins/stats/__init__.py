@@ -0,0 +1,25 @@
+'''This is a plugin that prints the calls, errors and latencies of the commands, or exports them in the Prometheus format.'''
+import logging
+from app.commands import Command, CommandResult
+
+logger = logging.getLogger(__name__)
+
+class StatsCommand(Command):
+    '''This class is a subclass of the Command class.'''
+    description = 'Show the calls, errors and latencies of the commands'
+    arguments = ({'name': 'path', 'type': 'str', 'prompt': 'Enter a file to export the metrics to (empty to print them): ', 'default': ''},)
+    def run(self, path: str) -> CommandResult:
+        '''This method prints the metrics of the command handler, or writes them to a file in the Prometheus text format.'''
+        logger.info('Stats command called')
+        metrics = None if self.command_handler is None else self.command_handler.metrics
+        if metrics is None:
+            return CommandResult(message='Metrics are disabled, set CALCULATOR_METRICS to on to collect them', ok=False)
+        if not path:
+            return CommandResult(metrics, metrics.table())
+        try:
+            metrics.write_prometheus(path)
+        except OSError as e:
+            logger.error('Could not export the metrics: %s', e)
+            return CommandResult(message=f'Could not export the metrics: {e}', ok=False)
+        logger.info('Metrics exported to %s', path)
+        return CommandResult(metrics, f'Metrics exported to {path}')
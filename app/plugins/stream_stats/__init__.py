@@ -0,0 +1,36 @@
+'''This is a plugin that takes the mean, median and mode of the numbers of a file or stdin, without loading them in one list.'''
+import contextlib
+import logging
+import sys
+from decimal import InvalidOperation
+from app.commands import Command, CommandResult
+from calculator import Calculator
+from calculator.streaming import MeanAccumulator, MedianAccumulator, ModeAccumulator, read_numbers
+
+logger = logging.getLogger(__name__)
+
+# Numbers kept around the median, and distinct numbers counted for the mode, past which the results may be approximate.
+CAPACITY = 100_000
+
+class StreamStatsCommand(Command):
+    '''This class is a subclass of the Command class.'''
+    description = 'Take the mean, median and mode of the numbers of a file'
+    arguments = ({'name': 'path', 'type': 'str', 'prompt': "Enter the path of the file ('-' for stdin): "},)
+    def run(self, path: str) -> CommandResult:
+        '''This method streams the numbers of the file through the accumulators and records their results.'''
+        logger.info('Stream stats command called with %s', path)
+        accumulators = (MeanAccumulator(), MedianAccumulator(CAPACITY), ModeAccumulator(CAPACITY))
+        try:
+            with contextlib.ExitStack() as stack:
+                lines = sys.stdin if path == '-' else stack.enter_context(open(path, encoding='utf-8'))
+                for line in lines:
+                    numbers = list(read_numbers((line,)))
+                    for accumulator in accumulators:
+                        accumulator.update(numbers)
+            results = [Calculator.record_accumulator(accumulator) for accumulator in accumulators]
+        except (OSError, InvalidOperation, ValueError) as e:
+            logger.error('Invalid operation: %s', e)
+            return CommandResult(message=f'Invalid operation: {e}', ok=False)
+        lines = [f"{accumulator.operation.__name__}({accumulator.count} numbers) = {result}{'' if accumulator.exact else ' (approximate)'}" for accumulator, result in zip(accumulators, results)]
+        logger.info('Stream stats calculated.')
+        return CommandResult(results, "\n".join(lines))
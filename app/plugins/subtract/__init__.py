@@ -1,20 +1,26 @@
 '''This is a plugin that exits the program when called.'''
 import logging
-from app.commands import Command
-from decimal import Decimal, InvalidOperation
+from app.commands import Command, CommandResult
+from decimal import Decimal
 from calculator import Calculator
 
+logger = logging.getLogger(__name__)
+
 class SubtractCommand(Command):
     '''This class is a subclass of the Command class.'''
-    def execute(self):
-        '''This method exits the program when called'''
-        logging.info('Subtract command called')
+    description = 'Subtract the second number from the first'
+    arguments = ({'name': 'a', 'type': 'decimal', 'prompt': 'Enter first number: '}, {'name': 'b', 'type': 'decimal', 'prompt': 'Enter second number: '})
+    def run(self, a: Decimal, b: Decimal) -> CommandResult:
+        '''This method subtracts the second number from the first.'''
+        logger.info('Subtract command called')
+        logger.info("Subtract command called with arguments: %s, %s", a, b)
         try:
-            a = input("Enter first number: ").strip()
-            b = input("Enter second number: ").strip()
-            logging.info(f"Subtract command called with arguments: {a}, {b}")
-            a_decimal, b_decimal = map(Decimal, [a, b])
-            result = Calculator.subtract(a_decimal, b_decimal)
-            print(f"{a} - {b} = {result}")
-        except InvalidOperation:
-            print(f"Invalid number input: {a} or {b} is not a valid number.")
+            result = Calculator.subtract(a, b)
+        except ValueError as e:
+            logger.error("Subtract command failed: %s", e)
+            return CommandResult(message=str(e), ok=False)
+        return CommandResult(result, f"{a} - {b} = {result}")
+
+    def invalid_arguments(self, values, error) -> CommandResult:
+        '''This method reports operands that are not numbers.'''
+        return CommandResult(message=f"Invalid number input: {values.get('a')} or {values.get('b')} is not a valid number.", ok=False)
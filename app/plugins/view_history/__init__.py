@@ -0,0 +1,25 @@
+'''This is a plugin that pages through the saved history file without loading it.'''
+import logging
+from app.commands import Command, CommandResult
+from calculator import Calculator
+
+logger = logging.getLogger(__name__)
+
+class ViewHistoryCommand(Command):
+    '''This class is a subclass of the Command class.'''
+    description = 'Print a page of the saved history without loading it'
+    arguments = ({'name': 'page', 'type': 'int', 'prompt': 'Enter the page number: ', 'default': 1}, {'name': 'size', 'type': 'int', 'prompt': 'Enter the page size: ', 'default': 20})
+    def run(self, page: int, size: int) -> CommandResult:
+        '''This method returns one page of the saved history, printed when the command runs in the REPL, and its number of calculations.'''
+        logger.info('View history command called')
+        try:
+            lines = Calculator.saved_history_lines(page, size)
+        except ValueError as e:
+            return self.invalid_arguments({'page': page, 'size': size}, e)
+        logger.info('Printed page %s of the saved history, %s calculations.', page, len(lines))
+        return CommandResult(len(lines), '\n'.join(lines) if lines else f'No saved calculations on page {page}')
+
+    def invalid_arguments(self, values, error) -> CommandResult:
+        '''This method reports a page that is not valid.'''
+        logger.error('Invalid page: %s', error)
+        return CommandResult(message=f'Invalid page: {error}', ok=False)
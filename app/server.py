@@ -0,0 +1,306 @@
+'''
+This module contains the CalculatorServer class, a local HTTP/JSON service around the Calculator built on asyncio streams.
+
+    GET    /health             {"status": "ok"}
+    GET    /operations         the names of the operations
+    POST   /calculate          {"operation": "add", "a": "1", "b": "2"} or {"operation": "mean", "numbers": [1, 2, 3]},
+                               or an array of them to evaluate a batch in one request
+    GET    /history            the calculations of the local history and their results
+    DELETE /history            clear the local history
+    DELETE /history/<n>        delete the n-th calculation of the local history
+    POST   /history/save       save the local history to the history file
+    POST   /history/load       load the history file into the local history
+
+Numbers are parsed as Decimals (JSON numbers or strings) and results are returned as strings so they stay exact.
+A request with an X-Calculator-Session header records into, and reads, the history of that session (see
+calculator.sessions) instead of the default one.
+Connections are kept alive between requests. Arithmetic is evaluated on the event loop, statistic operations on a
+bounded thread or process pool. The history is only changed from the event loop thread.
+'''
+import asyncio
+import concurrent.futures
+import ipaddress
+import json
+import logging
+from decimal import Decimal, DecimalException, InvalidOperation
+from http import HTTPStatus
+from calculator import Calculator
+from calculator.operations import mean, median, mode
+from calculator.sessions import current_session, sessions, use_session
+from calculator.statistic import CalculationStatistic
+
+logger = logging.getLogger(__name__)
+
+BINARY_OPERATIONS = {
+    'add': Calculator.add,
+    'subtract': Calculator.subtract,
+    'multiply': Calculator.multiply,
+    'divide': Calculator.divide,
+}
+STATISTIC_OPERATIONS = {'mean': mean, 'median': median, 'mode': mode}
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+class HTTPError(Exception):
+    '''This class is the error returned to the client with an HTTP status.'''
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+def to_decimal(value) -> Decimal:
+    '''This function converts a JSON number or string into a Decimal.'''
+    if isinstance(value, bool) or not isinstance(value, (str, int, Decimal)):
+        raise ValueError(f"Not a number: {value!r}")
+    try:
+        return Decimal(value) if isinstance(value, (int, Decimal)) else Decimal(value.strip())
+    except InvalidOperation as e:
+        raise ValueError(f"Not a number: {value!r}") from e
+
+def error_message(error: Exception) -> str:
+    '''This function returns the message of an error for the client, the decimal signals have none of their own.'''
+    if isinstance(error, DecimalException):
+        return f"Arithmetic error: {type(error).__name__}"
+    return str(error)
+
+def is_loopback(host: str) -> bool:
+    '''This function checks that a host only accepts connections from this machine.'''
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def to_json(result):
+    '''This function converts a result into JSON, Decimals become strings.'''
+    if isinstance(result, list):
+        return [str(value) for value in result]
+    return str(result)
+
+class CalculatorServer:
+    '''This class serves the Calculator over HTTP/JSON.'''
+    def __init__(self, host: str = '127.0.0.1', port: int = 8000, workers: int = 4, executor: str = 'thread', max_pending: int = 64, keep_alive_timeout: float = 15.0):
+        if executor not in ('thread', 'process'):
+            raise ValueError(f"Unsupported executor: {executor}")
+        if not is_loopback(host):
+            raise ValueError(f"The calculator server only listens on localhost, not {host}")
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.executor = executor
+        self.keep_alive_timeout = keep_alive_timeout
+        self.max_pending = max_pending
+        self.pool = None
+        self.server = None
+        self._pending = None
+        self._connections = set()
+
+    async def start(self):
+        '''This method starts listening, the port is updated when it was 0.'''
+        pool_class = concurrent.futures.ProcessPoolExecutor if self.executor == 'process' else concurrent.futures.ThreadPoolExecutor
+        self.pool = pool_class(max_workers=self.workers)
+        # Statistic calls beyond the bound wait for a free slot instead of queueing without limit.
+        self._pending = asyncio.Semaphore(self.max_pending)
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        logger.info("Calculator server listening on http://%s:%s", self.host, self.port)
+
+    async def stop(self):
+        '''This method stops listening and shuts the worker pool down.'''
+        if self.server is not None:
+            self.server.close()
+            # Idle keep-alive connections would hold the shutdown until their timeout.
+            for task in self._connections:
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self.server.wait_closed()
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+        # The sessions are saved to their history file, as they are when they are evicted.
+        sessions.close()
+        logger.info('Calculator server stopped')
+
+    async def serve_forever(self):
+        '''This method starts the server and serves until it is cancelled.'''
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        '''This method serves the requests of one connection, as long as the client keeps it alive.'''
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self.keep_alive_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                keep_alive = await self.handle_request(request_line, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def handle_request(self, request_line: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        '''This method reads one request, writes its response and returns whether the connection stays open.'''
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+        except ValueError:
+            self.write_response(writer, HTTPStatus.BAD_REQUEST, {'error': 'Malformed request line'}, False)
+            return False
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+        try:
+            length = int(headers.get('content-length', '0'))
+            if length > MAX_BODY_SIZE:
+                raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'Request body too large')
+            body = await reader.readexactly(length) if length else b''
+            with use_session(headers.get('x-calculator-session')):
+                status, payload = await self.dispatch(method, target.split('?')[0], body)
+        except HTTPError as e:
+            status, payload = e.status, {'error': str(e)}
+        except (ArithmeticError, ValueError) as e:
+            status, payload = HTTPStatus.BAD_REQUEST, {'error': error_message(e)}
+        except Exception as e:
+            logger.error("Error serving %s %s: %s", method, target, e)
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+        self.write_response(writer, status, payload, keep_alive)
+        return keep_alive
+
+    @staticmethod
+    def write_response(writer: asyncio.StreamWriter, status: HTTPStatus, payload, keep_alive: bool):
+        '''This method writes a JSON response.'''
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+
+    async def dispatch(self, method: str, path: str, body: bytes):
+        '''This method routes a request and returns its status and JSON payload.'''
+        if path == '/health' and method == 'GET':
+            return HTTPStatus.OK, {'status': 'ok'}
+        if path == '/operations' and method == 'GET':
+            return HTTPStatus.OK, {'operations': [*BINARY_OPERATIONS, *STATISTIC_OPERATIONS]}
+        if path == '/calculate' and method == 'POST':
+            return await self.calculate(self.parse_body(body))
+        if path == '/history':
+            if method == 'GET':
+                return HTTPStatus.OK, {'history': self.history()}
+            if method == 'DELETE':
+                Calculator.clear_history()
+                return HTTPStatus.OK, {'history': []}
+        if path.startswith('/history/') and method in ('POST', 'DELETE'):
+            return self.history_operation(method, path[len('/history/'):])
+        if path in ('/health', '/operations', '/calculate', '/history'):
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not allowed on {path}")
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"No such endpoint: {path}")
+
+    @staticmethod
+    def parse_body(body: bytes):
+        '''This method parses a JSON body, numbers with a fraction become Decimals.'''
+        try:
+            return json.loads(body or b'null', parse_float=Decimal)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValueError(f"Invalid JSON body: {e}") from e
+
+    async def calculate(self, request):
+        '''This method evaluates one operation, or a batch of them when the request is an array.'''
+        if isinstance(request, list):
+            # Record every operation in request order, then wait for the statistic ones together.
+            jobs = []
+            for item in request:
+                try:
+                    jobs.append(self.submit(item))
+                except (ArithmeticError, ValueError) as e:
+                    jobs.append(e)
+            results = []
+            for job in jobs:
+                results.append(await self.collect(job))
+            return HTTPStatus.OK, {'results': results}
+        result = await self.collect(self.submit(request))
+        return (HTTPStatus.BAD_REQUEST if 'error' in result else HTTPStatus.OK), result
+
+    def submit(self, request):
+        '''This method records an operation in the history and starts its evaluation, statistic operations on the pool.'''
+        if not isinstance(request, dict):
+            raise ValueError('An operation must be a JSON object')
+        name = request.get('operation')
+        if name in BINARY_OPERATIONS:
+            a, b = to_decimal(request.get('a')), to_decimal(request.get('b'))
+            return name, BINARY_OPERATIONS[name](a, b)
+        if name in STATISTIC_OPERATIONS:
+            numbers = request.get('numbers')
+            if not isinstance(numbers, list):
+                raise ValueError('numbers must be an array')
+            calculation = CalculationStatistic.create([to_decimal(number) for number in numbers], STATISTIC_OPERATIONS[name])
+            current_session().add_statistic_calculation(calculation)
+            return name, asyncio.ensure_future(self.compute(calculation))
+        raise ValueError(f"Unsupported operation: {name!r}")
+
+    async def compute(self, calculation: CalculationStatistic):
+        '''This method evaluates a statistic calculation on the worker pool.'''
+        async with self._pending:
+            loop = asyncio.get_running_loop()
+            if self.executor == 'process':
+                return await loop.run_in_executor(self.pool, calculation.operation, calculation.a)
+            return await loop.run_in_executor(self.pool, calculation.perform)
+
+    @staticmethod
+    async def collect(job) -> dict:
+        '''This method returns the JSON result of a submitted operation.'''
+        if isinstance(job, Exception):
+            return {'error': error_message(job)}
+        name, result = job
+        try:
+            if isinstance(result, asyncio.Future):
+                result = await result
+        except (ArithmeticError, ValueError) as e:
+            return {'operation': name, 'error': error_message(e)}
+        return {'operation': name, 'result': to_json(result)}
+
+    @staticmethod
+    def history() -> list[dict]:
+        '''This method returns the calculations of the local history and their results.'''
+        entries = []
+        for calculation in current_session().get_history():
+            try:
+                entries.append({'calculation': repr(calculation), 'result': to_json(calculation.perform())})
+            except (ArithmeticError, ValueError) as e:
+                entries.append({'calculation': repr(calculation), 'error': error_message(e)})
+        return entries
+
+    @staticmethod
+    def history_operation(method: str, name: str):
+        '''This method saves, loads or deletes from the local history.'''
+        if method == 'POST' and name == 'save':
+            Calculator.save_history_to_csv()
+            return HTTPStatus.OK, {'saved': True}
+        if method == 'POST' and name == 'load':
+            Calculator.load_csv_data()
+            return HTTPStatus.OK, {'size': len(current_session().get_history())}
+        if method == 'DELETE' and name.isdigit():
+            index = int(name)
+            if not 1 <= index <= len(current_session().get_history()):
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"No calculation at index {index}")
+            Calculator.delete_at_index(index - 1)
+            return HTTPStatus.OK, {'size': len(current_session().get_history())}
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"No such endpoint: /history/{name}")
@@ -0,0 +1,10 @@
+'''
+Performance benchmarks for the calculator, run as modules, for example python -m benchmarks.bench_operand_parsing.
+The calculator reads its history location from the environment at import time, so unless it is configured
+the benchmarks point it at a temporary folder that is not the user's history.
+'''
+import os
+import tempfile
+
+os.environ.setdefault('CALCULATOR_HISTORY_FOLDER_PATH', tempfile.mkdtemp(prefix='calculator-bench-'))
+os.environ.setdefault('CALCULATOR_HISTORY_FILE_NAME', 'bench_history.csv')
@@ -0,0 +1,43 @@
+# pylint: disable=line-too-long
+'''
+Benchmark of the batch mode: runs a generated script of arithmetic and statistic commands through the BatchRunner
+and prints the throughput in lines per second.
+
+    python -m benchmarks.bench_batch --lines 100000
+'''
+import argparse
+import io
+import random
+import time
+from app import App
+from app.batch import BatchRunner
+
+OPERATIONS = ['add', 'subtract', 'multiply', 'divide']
+
+def generate_script(lines: int) -> list[str]:
+    '''Return a script mixing arithmetic commands and one mean every fifth line.'''
+    rng = random.Random(0)
+    script = []
+    for number in range(lines):
+        if number % 5 == 4:
+            script.append('mean ' + ','.join(str(rng.randint(1, 99)) for _ in range(5)) + '\n')
+        else:
+            script.append(f'{OPERATIONS[number % 4]} {rng.randint(0, 999)}.{rng.randint(0, 99)} {rng.randint(1, 99)}\n')
+    return script
+
+def main():
+    '''Run the benchmark and print the throughput.'''
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=100_000)
+    args = parser.parse_args()
+    script = generate_script(args.lines)
+    app = App()
+    app.load_plugins()
+    runner = BatchRunner(app.command_handler, io.StringIO(), io.StringIO())
+    start = time.perf_counter()
+    failed = runner.run(script)
+    elapsed = time.perf_counter() - start
+    print(f"{args.lines} lines in {elapsed:.3f}s   {args.lines / elapsed:,.0f} lines/s   {failed} failed")
+
+if __name__ == '__main__':
+    main()
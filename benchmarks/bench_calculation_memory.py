@@ -0,0 +1,61 @@
+# pylint: disable=line-too-long
+'''
+Benchmark of the memory taken by history entries: 1M Calculation and CalculationStatistic objects with a per-instance
+__dict__ (the former classes, b = 0 stored on every statistic) against the slotted classes keeping an operator code.
+The operands are shared by every entry, so only the size of the objects themselves is measured (tracemalloc).
+
+    python -m benchmarks.bench_calculation_memory --entries 1e6
+'''
+import argparse
+import gc
+import tracemalloc
+from decimal import Decimal
+from calculator.calculation import Calculation
+from calculator.operations import add, mean
+from calculator.statistic import CalculationStatistic
+
+class DictCalculation:
+    '''The former Calculation, with a __dict__ holding the operands, the operation and the result.'''
+    def __init__(self, a, b, operation):
+        '''Keep the operands and the operation.'''
+        self.a = a
+        self.b = b
+        self.operation = operation
+        self._result = None
+
+class DictCalculationStatistic:
+    '''The former CalculationStatistic, with a __dict__ holding b = 0 as well.'''
+    def __init__(self, a, operation):
+        '''Keep the numbers and the operation.'''
+        self.a = a
+        self.b = 0
+        self.operation = operation
+        self._result = None
+
+def measure(factory, entries: int) -> int:
+    '''Return the bytes allocated to build a list of entries.'''
+    gc.collect()
+    tracemalloc.start()
+    history = [factory() for _ in range(entries)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del history
+    return size
+
+def main():
+    '''Run the benchmark and print the memory of both representations.'''
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=float, default=1e6)
+    args = parser.parse_args()
+    entries = int(args.entries)
+    a, b, numbers = Decimal('1.5'), Decimal('2'), [Decimal('1'), Decimal('2'), Decimal('3')]
+    print(f"{'entries':>10} {'class':<22} {'__dict__':>10} {'__slots__':>10}   saved")
+    for name, before, after in (
+            ('Calculation', lambda: DictCalculation(a, b, add), lambda: Calculation(a, b, add)),
+            ('CalculationStatistic', lambda: DictCalculationStatistic(numbers, mean), lambda: CalculationStatistic(numbers, mean))):
+        dict_size = measure(before, entries)
+        slots_size = measure(after, entries)
+        print(f"{entries:>10} {name:<22} {dict_size / 2 ** 20:8.1f}MB {slots_size / 2 ** 20:8.1f}MB   {1 - slots_size / dict_size:.0%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# pylint: disable=line-too-long
+'''
+Benchmark of the expressions: evaluating a formula parsed every time against the program compiled once and cached by
+source text, and a chain of separate Calculator calls against one Calculator.evaluate recorded as a single entry.
+
+    python -m benchmarks.bench_expression --repeat 100000
+'''
+import argparse
+import time
+from decimal import Decimal
+from calculator import Calculator
+from calculator.expression import CompiledExpression, Parser, compile_expression
+
+SOURCE = '(1.5 + 2) * mean(3, 4, 5) / 7 - median(1, 2, 3) * -2'
+
+def timed(function, repeat: int) -> float:
+    '''Return the duration of calling a function repeat times.'''
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return time.perf_counter() - start
+
+def chained():
+    '''Evaluate the formula one operation at a time, as with one command per operation.'''
+    total = Calculator.multiply(Calculator.add(Decimal('1.5'), Decimal('2')), Calculator.mean([Decimal(3), Decimal(4), Decimal(5)]))
+    return Calculator.subtract(Calculator.divide(total, Decimal(7)), Calculator.multiply(Calculator.median([Decimal(1), Decimal(2), Decimal(3)]), Decimal(-2)))
+
+def main():
+    '''Run the benchmark and print the duration of every path.'''
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=100000)
+    args = parser.parse_args()
+    assert compile_expression(SOURCE).evaluate() == CompiledExpression(SOURCE, Parser(SOURCE).parse()).evaluate() == chained()
+    parsed = timed(lambda: CompiledExpression(SOURCE, Parser(SOURCE).parse()).evaluate(), args.repeat)
+    cached = timed(lambda: compile_expression(SOURCE).evaluate(), args.repeat)
+    print(f"{'parse every time':<28} {parsed:8.3f}s")
+    print(f"{'compiled and cached':<28} {cached:8.3f}s   x{parsed / cached:.2f}")
+    Calculator.clear_history()
+    calls = timed(chained, args.repeat)
+    Calculator.clear_history()
+    evaluated = timed(lambda: Calculator.evaluate(SOURCE), args.repeat)
+    print(f"{'chained Calculator calls':<28} {calls:8.3f}s")
+    print(f"{'Calculator.evaluate':<28} {evaluated:8.3f}s   x{calls / evaluated:.2f}")
+    Calculator.clear_history()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# pylint: disable=line-too-long
+'''
+Benchmark of the logging on the command path: the latency of the mean command with the logging of logging.conf enabled,
+a rotating log file and stderr (sent to /dev/null), as measured by the metrics of the CommandHandler.
+
+    before   sync handlers, and the mean command logging the whole list of numbers in an eagerly built f-string
+    after    queue mode, and the mean command logging a preview of the numbers with lazy %-style arguments
+
+The two other combinations tell the share of each change. The log file is written to a temporary folder.
+
+    python -m benchmarks.bench_logging --numbers 1000 --dispatches 2000
+'''
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+from decimal import Decimal
+from app.commands import CommandHandler, CommandResult
+from app.log_pipeline import configure_logging, stop_logging
+from app.plugins.mean import MeanCommand
+from calculator import Calculator
+
+class FormerMeanCommand(MeanCommand):
+    '''The mean command as it logged before the queue pipeline.'''
+    def run(self, numbers: list[Decimal]) -> CommandResult:
+        logging.info('Mean command called')
+        text = ','.join(str(number) for number in numbers)
+        logging.info(f"Mean command called with arguments: {text}")
+        result = Calculator.mean(numbers)
+        logging.info('Mean calculated.')
+        return CommandResult(result, f"mean({text}) = {result}")
+
+def latencies(mode: str, command_class, numbers: list[Decimal], dispatches: int, config_path: str) -> tuple[float, float, float]:
+    '''Return the mean, p50 and p99 latency of the mean command in microseconds, with the logging in the given mode.'''
+    os.environ['CALCULATOR_LOG_MODE'] = mode
+    configure_logging(config_path)
+    handler = CommandHandler()
+    handler.set_command('mean', command_class())
+    for _ in range(dispatches // 10):
+        handler.execute('mean', [numbers])
+    Calculator.clear_history()
+    handler.metrics.commands.clear()
+    for _ in range(dispatches):
+        handler.execute('mean', [numbers])
+    Calculator.clear_history()
+    # The records still queued are written before the next configuration.
+    stop_logging()
+    latency = handler.metrics.commands['mean'].latency
+    return latency.mean / 1e3, latency.percentile(0.5) / 1e3, latency.percentile(0.99) / 1e3
+
+def main():
+    '''Run the benchmark and print the latencies of every combination.'''
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--numbers', type=int, default=1000)
+    parser.add_argument('--dispatches', type=int, default=2000)
+    args = parser.parse_args()
+    numbers = [Decimal(number) / 7 for number in range(args.numbers)]
+    folder = tempfile.mkdtemp(prefix='calculator-logging-')
+    with open('logging.conf', encoding='utf-8') as file:
+        config = file.read().replace('logs/app.log', os.path.join(folder, 'app.log'))
+    config_path = os.path.join(folder, 'logging.conf')
+    with open(config_path, 'w', encoding='utf-8') as file:
+        file.write(config)
+    print(f"{'':<8} {'mode':<6} {'command':<8} {'mean':>10} {'p50':>10} {'p99':>10}")
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stderr(devnull):
+        rows = []
+        for label, mode, command_class, name in (('before', 'sync', FormerMeanCommand, 'former'), ('', 'sync', MeanCommand, 'current'), ('', 'queue', FormerMeanCommand, 'former'), ('after', 'queue', MeanCommand, 'current')):
+            rows.append((label, mode, name, *latencies(mode, command_class, numbers, args.dispatches, config_path)))
+    for label, mode, name, mean, p50, p99 in rows:
+        print(f"{label:<8} {mode:<6} {name:<8} {mean:8.1f}µs {p50:8.1f}µs {p99:8.1f}µs")
+    sys.stdout.flush()
+
+if __name__ == '__main__':
+    main()
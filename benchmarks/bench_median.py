@@ -0,0 +1,58 @@
+# pylint: disable=line-too-long
+'''
+Benchmark of the median: the sorted() path against the selection, on lists of Decimals and floats (copying and in place)
+and on float64 NumPy arrays (np.sort against the partition), for sizes from 1e3 to 1e8.
+Lists take about 100 bytes per Decimal, so they are only built up to --list-limit numbers.
+
+    python -m benchmarks.bench_median --sizes 1e3,1e4,1e5,1e6,1e7,1e8 --list-limit 1e7
+'''
+import argparse
+import random
+import time
+from decimal import Decimal
+import numpy as np
+from calculator import selection
+
+def sorted_median(values):
+    '''Return the median picked from a sorted copy, the former path of operations.median.'''
+    ordered = sorted(values)
+    n = len(ordered)
+    if n % 2 == 0:
+        return (ordered[n//2 - 1] + ordered[n//2]) / 2
+    return ordered[n//2]
+
+def timed(function, *args, **kwargs):
+    '''Return the result and the duration of a call.'''
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def main():
+    '''Run the benchmark and print the duration of every path for every size.'''
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1e3,1e4,1e5,1e6,1e7,1e8')
+    parser.add_argument('--list-limit', type=float, default=1e7)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    print(f"{'size':>10} {'input':<10} {'sorted':>9} {'select':>9} {'in place':>9}   speed-up")
+    for size in (int(float(size)) for size in args.sizes.split(',')):
+        if size <= args.list_limit:
+            floats = rng.random(size).tolist()
+            decimals = [Decimal(random.Random(index).randint(0, 10 ** 6)) / 1000 for index in range(size)] if size <= 10 ** 4 else [Decimal(int(x * 10 ** 9)) / 1000 for x in floats]
+            for name, values in (('Decimal', decimals), ('float', floats)):
+                expected, sort_time = timed(sorted_median, values)
+                result, select_time = timed(selection.median, values)
+                in_place, in_place_time = timed(selection.median, values, in_place=True)
+                assert result == expected == in_place
+                print(f"{size:>10} {name:<10} {sort_time:9.4f} {select_time:9.4f} {in_place_time:9.4f}   x{sort_time / select_time:.2f}")
+            del decimals, floats
+        array = rng.random(size)
+        expected, sort_time = timed(lambda values: np.sort(values)[[(len(values) - 1) // 2, len(values) // 2]].mean(), array)
+        result, select_time = timed(selection.median, array)
+        in_place, in_place_time = timed(selection.median, array, in_place=True)
+        assert result == expected == in_place
+        print(f"{size:>10} {'ndarray':<10} {sort_time:9.4f} {select_time:9.4f} {in_place_time:9.4f}   x{sort_time / select_time:.2f}")
+        del array
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+# pylint: disable=line-too-long
+'''
+Benchmark of the metrics of the CommandHandler: the time of a dispatch of a command that does nothing through
+CommandHandler.execute, with the metrics on and off, and the overhead per dispatch of measuring it.
+
+    python -m benchmarks.bench_metrics --dispatches 1e6 --repeat 5
+'''
+import argparse
+import os
+import time
+from app.commands import Command, CommandHandler, CommandResult
+
+RESULT = CommandResult()
+
+class NoopCommand(Command):
+    '''A command that returns at once, so the dispatch is all that is measured.'''
+    def execute(self, args=None) -> CommandResult:
+        return RESULT
+
+    def run(self) -> CommandResult:
+        return RESULT
+
+def dispatch_time(setting: str, dispatches: int, repeat: int) -> float:
+    '''Return the best time per dispatch, in nanoseconds, with the metrics on or off.'''
+    os.environ['CALCULATOR_METRICS'] = setting
+    handler = CommandHandler()
+    handler.set_command('noop', NoopCommand())
+    execute = handler.execute
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(dispatches):
+            execute('noop', ())
+        best = min(best, (time.perf_counter_ns() - start) / dispatches)
+    return best
+
+def main():
+    '''Run the benchmark and print the time per dispatch and the overhead of the metrics.'''
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dispatches', type=float, default=1e6)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    dispatches = int(args.dispatches)
+    off = dispatch_time('off', dispatches, args.repeat)
+    on = dispatch_time('on', dispatches, args.repeat)
+    print(f"dispatch   metrics off: {off:7.1f}ns   metrics on: {on:7.1f}ns   overhead: {on - off:7.1f}ns")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# pylint: disable=line-too-long
+'''
+Benchmark of the mode: the former dict loop against collections.Counter on lists of Decimals, and np.unique on float64
+NumPy arrays, with a high cardinality (about as many distinct numbers as numbers) and a low one (100 distinct numbers).
+Lists take about 100 bytes per Decimal, so they are only built up to --list-limit numbers.
+
+    python -m benchmarks.bench_mode --sizes 1e5,1e6,1e7 --list-limit 1e7
+'''
+import argparse
+import time
+from decimal import Decimal
+import numpy as np
+from calculator import modes
+
+def dict_mode(values):
+    '''Return the modes counted with a dict loop, the former path of operations.mode.'''
+    counts = {}
+    for num in values:
+        counts[num] = counts.get(num, 0) + 1
+    max_count = max(counts.values())
+    return [num for num, count in counts.items() if count == max_count]
+
+def timed(function, *args):
+    '''Return the result and the duration of a call.'''
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    '''Run the benchmark and print the duration of every path for every size and cardinality.'''
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1e5,1e6,1e7')
+    parser.add_argument('--list-limit', type=float, default=1e7)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    print(f"{'size':>10} {'cardinality':<12} {'dict':>9} {'Counter':>9} {'np.unique':>10}   speed-up")
+    for size in (int(float(size)) for size in args.sizes.split(',')):
+        for name, distinct in (('high', size), ('low', 100)):
+            array = rng.integers(0, distinct, size).astype(np.float64)
+            unique_modes, unique_time = timed(modes.multimode, array)
+            if size <= args.list_limit:
+                values = [Decimal(int(x)) for x in array.tolist()]
+                expected, dict_time = timed(dict_mode, values)
+                result, counter_time = timed(modes.multimode, values)
+                assert result == expected == unique_modes
+                del values
+                print(f"{size:>10} {name:<12} {dict_time:9.4f} {counter_time:9.4f} {unique_time:10.4f}   x{dict_time / counter_time:.2f}")
+            else:
+                print(f"{size:>10} {name:<12} {'-':>9} {'-':>9} {unique_time:10.4f}")
+            del array
+
+if __name__ == '__main__':
+    main()
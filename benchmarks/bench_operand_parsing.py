@@ -0,0 +1,63 @@
+# pylint: disable=line-too-long, eval-used
+'''
+Benchmark of the statistic operand list parser against the previous eval based conversion.
+Generates a history CSV of statistic rows and times both the bare parsing of the num_1 column
+and the full DataHandler.iter_calculations path.
+
+    python -m benchmarks.bench_operand_parsing --rows 1000000 --size 5
+'''
+import argparse
+import os
+import random
+import tempfile
+import time
+from decimal import Decimal
+import pandas as pd
+# calculator has to be imported before data_handler, which it depends on
+import calculator  # pylint: disable=unused-import,wrong-import-order
+import data_handler
+from data_handler import DataHandler
+from data_handler.parsing import parse_decimal_list
+
+def eval_decimal_list(text: str) -> list[Decimal]:
+    '''The previous conversion, evaluating the repr in an environment that only permits the Decimal constructor.'''
+    return eval(text, {"__builtins__": {}}, {"Decimal": Decimal})
+
+def generate_csv(path: str, rows: int, size: int):
+    '''Write a history CSV with the given number of statistic rows.'''
+    rng = random.Random(0)
+    num_1 = [repr([Decimal(rng.randint(-99999, 99999)).scaleb(-2) for _ in range(size)]) for _ in range(rows)]
+    pd.DataFrame({'num_1': num_1, 'num_2': 0, 'operator': 'mean'}).to_csv(path, index=False)
+    return num_1
+
+def timed(function, *args) -> float:
+    '''Return the wall time of a single call in seconds.'''
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+def main():
+    '''Run the benchmark and print the timings.'''
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--size', type=int, default=5, help='number of operands per row')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ['CALCULATOR_HISTORY_FOLDER_PATH'] = folder
+        os.environ['CALCULATOR_HISTORY_FILE_NAME'] = 'bench_history.csv'
+        handler = DataHandler()
+        column = generate_csv(handler.csv_filepath, args.rows, args.size)
+        print(f"{args.rows} rows of {args.size} operands")
+        eval_time = timed(lambda: [eval_decimal_list(text) for text in column])
+        parse_time = timed(lambda: [parse_decimal_list(text) for text in column])
+        print(f"parse only    eval: {eval_time:8.3f}s   parser: {parse_time:8.3f}s   speedup: {eval_time / parse_time:5.1f}x")
+        load_parser = timed(lambda: sum(1 for _ in handler.iter_calculations()))
+        data_handler.parse_decimal_list = eval_decimal_list
+        try:
+            load_eval = timed(lambda: sum(1 for _ in handler.iter_calculations()))
+        finally:
+            data_handler.parse_decimal_list = parse_decimal_list
+        print(f"full load     eval: {load_eval:8.3f}s   parser: {load_parser:8.3f}s   speedup: {load_eval / load_parser:5.1f}x")
+
+if __name__ == '__main__':
+    main()
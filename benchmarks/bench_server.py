@@ -0,0 +1,96 @@
+# pylint: disable=line-too-long
+'''
+Load test of the HTTP/JSON calculation service: starts the server in a separate process, then opens concurrent
+keep-alive connections sending a mix of arithmetic and statistic operations, and prints the throughput and the
+p50/p99 latency of the requests.
+
+    python -m benchmarks.bench_server --clients 32 --requests 500 --batch 1 --workers 4 --executor thread
+'''
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import signal
+import statistics
+import time
+
+OPERATIONS = ['add', 'subtract', 'multiply', 'divide']
+
+def run_server(ready, workers: int, executor: str):
+    '''Serve on a free port of localhost, send the port back through the ready queue and serve until interrupted.'''
+    from app.server import CalculatorServer # pylint: disable=import-outside-toplevel
+    async def serve():
+        server = CalculatorServer(port=0, workers=workers, executor=executor, keep_alive_timeout=60)
+        await server.start()
+        ready.put(server.port)
+        try:
+            await server.server.serve_forever()
+        finally:
+            await server.stop()
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+def generate_operation(rng: random.Random, size: int) -> dict:
+    '''Return an arithmetic operation, or a mean over size numbers one time in five.'''
+    if rng.random() < 0.2:
+        return {'operation': 'mean', 'numbers': [str(rng.randint(1, 999)) for _ in range(size)]}
+    return {'operation': rng.choice(OPERATIONS), 'a': f'{rng.randint(0, 999)}.{rng.randint(0, 99)}', 'b': str(rng.randint(1, 99))}
+
+async def client(port: int, requests: int, batch: int, size: int, seed: int, latencies: list[float]):
+    '''Send the requests on one keep-alive connection and record the latency of every one of them.'''
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for _ in range(requests):
+        payload = generate_operation(rng, size) if batch == 1 else [generate_operation(rng, size) for _ in range(batch)]
+        body = json.dumps(payload).encode()
+        start = time.perf_counter()
+        writer.write(f"POST /calculate HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await reader.readline()
+        length = 0
+        while (line := await reader.readline()) != b'\r\n':
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+async def load(port: int, clients: int, requests: int, batch: int, size: int) -> list[float]:
+    '''Run the clients concurrently and return the latencies.'''
+    latencies = []
+    await asyncio.gather(*(client(port, requests, batch, size, seed, latencies) for seed in range(clients)))
+    return latencies
+
+def main():
+    '''Run the load test and print the throughput and latency percentiles.'''
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=500, help='requests per client')
+    parser.add_argument('--batch', type=int, default=1, help='operations per request')
+    parser.add_argument('--size', type=int, default=1000, help='numbers per mean')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--executor', choices=['thread', 'process'], default='thread')
+    args = parser.parse_args()
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=run_server, args=(ready, args.workers, args.executor))
+    server.start()
+    try:
+        port = ready.get(timeout=30)
+        start = time.perf_counter()
+        latencies = asyncio.run(load(port, args.clients, args.requests, args.batch, args.size))
+        elapsed = time.perf_counter() - start
+    finally:
+        # Interrupted rather than terminated, so the server shuts its worker pool down.
+        os.kill(server.pid, signal.SIGINT)
+        server.join()
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{len(latencies)} requests x {args.batch} operations in {elapsed:.3f}s   {len(latencies) / elapsed:,.0f} requests/s   "
+        f"p50 {percentiles[49] * 1000:.2f}ms   p99 {percentiles[98] * 1000:.2f}ms"
+    )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# pylint: disable=line-too-long
+'''
+Benchmark of the REPL startup: registering the plugins and running the greet command in a fresh interpreter,
+with the lazy manifest based loading against importing every plugin up front as load_plugins used to.
+
+    python -m benchmarks.bench_startup --repeat 10
+'''
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+STARTUP = '''
+from app import App
+app = App()
+app.load_plugins()
+{load}
+app.command_handler.executed_command('greet')
+'''
+# The previous behaviour, every plugin module is imported while the plugins are registered.
+EAGER = 'for command in app.command_handler.commands.values(): command.load()'
+LAZY = ''
+
+def run(code: str) -> float:
+    '''Return the wall time of a fresh interpreter running the code.'''
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=os.environ)
+    return time.perf_counter() - start
+
+def main():
+    '''Run the benchmark and print the median timings.'''
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    # Write the manifest once so the runs measure a warm cache, as in every start after the first one.
+    run(STARTUP.format(load=LAZY))
+    eager = statistics.median(run(STARTUP.format(load=EAGER)) for _ in range(args.repeat))
+    lazy = statistics.median(run(STARTUP.format(load=LAZY)) for _ in range(args.repeat))
+    print(f"startup + greet   eager: {eager:6.3f}s   lazy: {lazy:6.3f}s   speedup: {eager / lazy:5.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+# pylint: disable=line-too-long
+'''
+Benchmark of the statistic operations: times mean, median and mode over a large list of Decimals in a single process
+and with the parallel engine, and checks that both return the same result.
+
+    python -m benchmarks.bench_statistics --size 2000000 --workers 4
+'''
+import argparse
+import os
+import random
+import time
+from decimal import Decimal
+from calculator import operations, parallel
+
+def main():
+    '''Run the benchmark and print the time of every operation on both paths.'''
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=2_000_000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    rng = random.Random(0)
+    numbers = [Decimal(rng.randint(0, 99_999)) / 100 for _ in range(args.size)]
+    print(f"{args.size} numbers, {args.workers} workers, {os.cpu_count()} cores")
+    parallel.PARALLEL_WORKERS = 1
+    for name in ('mean', 'median', 'mode'):
+        start = time.perf_counter()
+        expected = getattr(operations, name)(numbers)
+        single = time.perf_counter() - start
+        start = time.perf_counter()
+        result = getattr(parallel, name)(numbers, args.workers)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<7} single process {single:7.3f}s   parallel {elapsed:7.3f}s   x{single / elapsed:.2f}   {'same result' if repr(result) == repr(expected) else 'DIFFERENT RESULT'}")
+
+if __name__ == '__main__':
+    main()
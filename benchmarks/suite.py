@@ -0,0 +1,253 @@
+# pylint: disable=line-too-long
+'''
+Benchmark suite of the calculator: every case is run a few times unmeasured (warmup) and then measured --repeat times,
+and the median, minimum, mean and standard deviation of the runs are printed and written as JSON.
+
+    operations    the arithmetic over n pairs and mean, median and mode of n numbers, with Decimal and float inputs
+    history       Calculations append of n entries, find_by_operation and 100 deletes in a history of n entries
+    persistence   DataHandler save, load and convert (to Calculations and to the columnar format) of an n rows CSV file
+    plugins       App.load_plugins in a fresh interpreter, and the manifest rebuild it falls back to without a cache
+
+The data is generated with NumPy from a fixed seed, so every run measures the same inputs. A stored result file is a
+baseline: with --compare the run fails (exit status 1) when the median of a case is more than --threshold slower.
+
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --groups operations,history --compare baseline.json --threshold 0.25
+    python -m benchmarks.suite --groups history --history-sizes 1e3,1e5,1e7 --repeat 3
+'''
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from calculator import operations
+from calculator.calculation import Calculation
+from calculator.calculations import Calculations
+from data_handler import CSV_COLUMNS, DataHandler
+
+GROUPS = ('operations', 'history', 'persistence', 'plugins')
+BINARY_OPERATIONS = ('add', 'subtract', 'multiply', 'divide')
+STATISTIC_OPERATIONS = ('mean', 'median', 'mode')
+DELETES = 100
+
+# Timed in a fresh interpreter, so the imports of the app are part of the cold start.
+LOAD_PLUGINS = '''
+import time
+start = time.perf_counter()
+from app import App
+App().load_plugins()
+print(time.perf_counter() - start)
+'''
+
+def sizes(text: str) -> list[int]:
+    '''Return the sizes of a comma separated list such as 1e3,1e4.'''
+    return [int(float(size)) for size in text.split(',')]
+
+def generate_pairs(size: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''Return the operands and the operator names of size random calculations, divisors are never zero.'''
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 100, size)
+    b = rng.integers(1, 100, size)
+    operators = np.array(BINARY_OPERATIONS)[rng.integers(0, len(BINARY_OPERATIONS), size)]
+    return a, b, operators
+
+def generate_csv(path: str, size: int, seed: int = 0):
+    '''Write a history file of size random calculations.'''
+    a, b, operators = generate_pairs(size, seed)
+    pd.DataFrame({'num_1': a, 'num_2': b, 'operator': operators}, columns=CSV_COLUMNS).to_csv(path, index=False)
+
+def timer(run, setup=None):
+    '''Return a function timing one call of run(setup()), setup being left out of the timing.'''
+    def sample() -> float:
+        state = setup() if setup else None
+        start = time.perf_counter()
+        run(state)
+        return time.perf_counter() - start
+    return sample
+
+def measure(sample, warmup: int = 1, repeat: int = 5) -> dict:
+    '''Return the statistics of repeat durations returned by sample, after warmup unmeasured ones.'''
+    for _ in range(warmup):
+        sample()
+    return summary([sample() for _ in range(repeat)])
+
+def summary(durations: list[float]) -> dict:
+    '''Return the statistics of a list of durations.'''
+    return {
+        'median': statistics.median(durations),
+        'min': min(durations),
+        'mean': statistics.fmean(durations),
+        'stdev': statistics.stdev(durations) if len(durations) > 1 else 0.0,
+        'repeat': len(durations),
+    }
+
+def operation_cases(size_list: list[int]):
+    '''Yield the cases of the operations, with Decimal and float inputs.'''
+    for size in size_list:
+        a, b, _ = generate_pairs(size)
+        for kind, convert in (('decimal', Decimal), ('float', float)):
+            left, right = [convert(int(x)) for x in a], [convert(int(x)) for x in b]
+            for name in BINARY_OPERATIONS:
+                operation = getattr(operations, name)
+                yield f"operations.{name}.{kind}.{size}", timer(lambda _, operation=operation, left=left, right=right: [operation(x, y) for x, y in zip(left, right)])
+            for name in STATISTIC_OPERATIONS:
+                operation = getattr(operations, name)
+                yield f"operations.{name}.{kind}.{size}", timer(lambda _, operation=operation, numbers=left: operation(numbers))
+
+def history_cases(size_list: list[int]):
+    '''Yield the cases of the shared history, which is cleared before every run.'''
+    for size in size_list:
+        a, b, operators = generate_pairs(size)
+        functions = {name: getattr(operations, name) for name in BINARY_OPERATIONS}
+        calculations = [Calculation.create(Decimal(int(x)), Decimal(int(y)), functions[name]) for x, y, name in zip(a, b, operators)]
+
+        def empty():
+            Calculations.clear_history()
+
+        def filled(calculations=calculations):
+            Calculations.clear_history()
+            for calculation in calculations:
+                Calculations.add_calculation(calculation)
+            # Merge the buffered entries now, so the runs only measure the operation itself.
+            len(Calculations.get_history())
+
+        def append(_, calculations=calculations):
+            for calculation in calculations:
+                Calculations.add_calculation(calculation)
+            len(Calculations.get_history())
+
+        def delete(_, size=size):
+            for index in range(DELETES):
+                Calculations.delete_at_index((size - index) // 2)
+
+        yield f"history.append.{size}", timer(append, empty)
+        yield f"history.find.{size}", timer(lambda _: Calculations.find_by_operation('divide'), filled)
+        if size > DELETES:
+            yield f"history.delete_{DELETES}.{size}", timer(delete, filled)
+
+def persistence_cases(size_list: list[int], folder: str):
+    '''Yield the cases of the history file, each run working on its own copy of a generated file.'''
+    for size in size_list:
+        source = os.path.join(folder, f"source_{size}.csv")
+        generate_csv(source, size)
+        rows = pd.read_csv(source).to_dict('records')
+
+        def fresh(name: str, copy: bool, size=size, source=source) -> DataHandler:
+            shutil.rmtree(os.path.join(folder, name), ignore_errors=True)
+            data_handler = DataHandler(folder_path=os.path.join(folder, name), file_name=f"history_{size}.csv")
+            os.makedirs(data_handler.folder_path, exist_ok=True)
+            if copy:
+                shutil.copyfile(source, data_handler.csv_filepath)
+            return data_handler
+
+        def save(data_handler, rows=rows):
+            data_handler.csv_data = rows
+            data_handler.save_csv_data()
+
+        yield f"persistence.save.{size}", timer(save, lambda: fresh('save', False))
+        yield f"persistence.load.{size}", timer(lambda data_handler: data_handler.load_csv_data(), lambda: fresh('load', True))
+        yield f"persistence.convert.{size}", timer(lambda data_handler: data_handler.convert_to_calculation(), lambda: fresh('convert', True))
+        yield f"persistence.convert_columnar.{size}", timer(lambda data_handler: data_handler.convert_csv_to_columnar(), lambda: fresh('columnar', True))
+
+def load_plugins_time() -> float:
+    '''Return the duration of App.load_plugins, imports included, measured in a fresh interpreter.'''
+    output = subprocess.run([sys.executable, '-c', LOAD_PLUGINS], check=True, capture_output=True, text=True, env=os.environ)
+    return float(output.stdout.split()[-1])
+
+def plugin_cases():
+    '''Yield the cases of the plugin loading.'''
+    from app.manifest import build_manifest # pylint: disable=import-outside-toplevel
+    # The interpreter start is left out, the fresh interpreter reports the time of the imports and the loading.
+    yield "plugins.load_plugins.cold_start", load_plugins_time
+    yield "plugins.build_manifest", timer(lambda _: build_manifest('app.plugins', 'app/plugins'))
+
+def run_suite(args) -> dict:
+    '''Run the cases of the selected groups and return their results by name.'''
+    results = {}
+    groups = args.groups.split(',')
+    for group in groups:
+        if group not in GROUPS:
+            raise SystemExit(f"Unknown group {group!r}, expected some of {', '.join(GROUPS)}")
+    folder = tempfile.mkdtemp(prefix='calculator-suite-')
+    try:
+        cases = []
+        if 'operations' in groups:
+            cases.append(operation_cases(sizes(args.operation_sizes)))
+        if 'history' in groups:
+            cases.append(history_cases(sizes(args.history_sizes)))
+        if 'persistence' in groups:
+            cases.append(persistence_cases(sizes(args.csv_sizes), folder))
+        if 'plugins' in groups:
+            cases.append(plugin_cases())
+        for group_cases in cases:
+            for name, sample in group_cases:
+                results[name] = measure(sample, args.warmup, args.repeat)
+                print(f"{name:<48} {results[name]['median'] * 1000:12.3f} ms  (min {results[name]['min'] * 1000:.3f}, stdev {results[name]['stdev'] * 1000:.3f})", flush=True)
+    finally:
+        Calculations.clear_history()
+        shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    '''Print the ratio of every case to its baseline and return the names of the cases slower than the threshold allows.'''
+    regressions = []
+    print(f"\n{'case':<48} {'baseline':>12} {'current':>12}    ratio")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<48} {'-':>12} {result['median'] * 1000:9.3f} ms      new")
+            continue
+        ratio = result['median'] / baseline[name]['median']
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<48} {baseline[name]['median'] * 1000:9.3f} ms {result['median'] * 1000:9.3f} ms  {ratio:6.2f}x{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def main():
+    '''Run the suite, write the results and compare them with the baseline.'''
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--groups', default=','.join(GROUPS))
+    parser.add_argument('--operation-sizes', default='1e3,1e4,1e5')
+    parser.add_argument('--history-sizes', default='1e3,1e4,1e5')
+    parser.add_argument('--csv-sizes', default='1e3,1e4,1e5')
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='file the JSON results are written to')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.25, help='slowdown of the median allowed before a case is a regression')
+    args = parser.parse_args()
+    if args.repeat < 1 or args.warmup < 0:
+        parser.error('--repeat must be positive and --warmup not negative')
+    results = run_suite(args)
+    if args.output:
+        document = {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'warmup': args.warmup,
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(document, file, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nNo case regressed by more than {args.threshold:.0%}")
+
+if __name__ == '__main__':
+    main()
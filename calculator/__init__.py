@@ -3,10 +3,14 @@
 This document contains the Calculator class, which is a static class that performs arithmetic operations on two numbers.
 '''
 from decimal import Decimal
-from typing import Callable
+from typing import Callable, Union
+from calculator.batch import BatchResult, CalculationBatch
+from calculator.cache import result_cache
 from calculator.calculation import Calculation
-from calculator.calculations import Calculations
+from calculator.expression import ExpressionCalculation
+from calculator.modes import Modes, top_modes
 from calculator.operations import add, mode, subtract, multiply, divide, mean, median
+from calculator.sessions import current_session, use_session
 from calculator.statistic import CalculationStatistic
 
 class Calculator:
@@ -15,14 +19,13 @@ class Calculator:
     def _perform_operation(a: Decimal, b: Decimal, operation: Callable[[Decimal, Decimal], Decimal]) -> Decimal:
         '''This function performs an arithmetic operation on two numbers.'''
         calculation = Calculation.create(a, b, operation)
-        Calculations.add_calculation(calculation)
-        Calculations
+        current_session().add_calculation(calculation)
         return calculation.perform()
     @staticmethod
     def _perform_statistic_operation(a: list[Decimal], operation: Callable[[list[Decimal]], Decimal]) -> Decimal:
         '''This function performs a statistic operation on a list of numbers.'''
         calculation = CalculationStatistic.create(a, operation)
-        Calculations.add_statistic_calculation(calculation)
+        current_session().add_statistic_calculation(calculation)
         return calculation.perform()
     @staticmethod
     def add(a: Decimal, b: Decimal) -> Decimal:
@@ -49,32 +52,85 @@ class Calculator:
         '''This function calculates the median of a list of numbers.'''
         return Calculator._perform_statistic_operation(a, median)
     @staticmethod
-    def mode(a: list[Decimal]) -> Decimal:
-        '''This function calculates the mode of a list of numbers.'''
+    def mode(a: list[Decimal]) -> Union[Decimal, Modes]:
+        '''This function calculates the mode of a list of numbers, the Modes in the order of their first occurrence when they are tied.'''
         return Calculator._perform_statistic_operation(a, mode)
     @staticmethod
+    def top_modes(a: list[Decimal], k: int) -> list[tuple[Decimal, int]]:
+        '''This function returns the k most frequent numbers of a list with their counts, without recording them in the history.'''
+        return top_modes(a, k)
+    @staticmethod
+    def record_accumulator(accumulator):
+        '''This function records the current result of a streaming accumulator (see calculator.streaming) in the history and returns it.'''
+        calculation = accumulator.to_calculation()
+        current_session().add_statistic_calculation(calculation)
+        return calculation.perform()
+    @staticmethod
+    def evaluate(source: str):
+        '''
+        This function evaluates an expression such as "(1.5 + 2) * mean(3, 4, 5) / 7", see calculator.expression.
+        The whole expression is recorded as a single entry in the history.
+        '''
+        calculation = ExpressionCalculation.create(source)
+        current_session().add_calculation(calculation)
+        return calculation.perform()
+    @staticmethod
+    def batch(operation: Union[str, Callable[[Decimal, Decimal], Decimal]], a, b, exact: bool = False) -> BatchResult:
+        '''
+        This function evaluates an arithmetic operation over arrays or columns of operands in one vectorized pass.
+        The float64 path is used by default, exact=True evaluates with Decimal objects instead.
+        The whole batch is recorded as a single entry in the history, once it is evaluated.
+        '''
+        calculation = CalculationBatch.create(a, b, operation, exact)
+        result = calculation.perform()
+        current_session().add_batch_calculation(calculation)
+        return result
+    @staticmethod
+    def session(session_id: str = None):
+        '''
+        This function returns a context manager under which the calculations are recorded in, and the history functions
+        work on, the session with the given id (see calculator.sessions). None is the default session.
+        '''
+        return use_session(session_id)
+    @staticmethod
+    def history_lines() -> list[str]:
+        '''This function returns the history of calculations as numbered lines with their results.'''
+        return [f'{index+1}. {calculation} = {calculation.perform()}' for index, calculation in enumerate(current_session().get_history())]
+    @staticmethod
     def print_history():
         '''This function prints the history of calculations.'''
-        for index, calculation in enumerate(Calculations.get_history()):
-            print(f'{index+1}. {calculation} = {calculation.perform()}')
+        for line in Calculator.history_lines():
+            print(line)
+    @staticmethod
+    def saved_history_lines(page: int = 1, size: int = 20) -> list[str]:
+        '''This function returns a page of the saved history file as numbered lines with their results.'''
+        return current_session().saved_page_lines(page, size)
+    @staticmethod
+    def print_saved_history(page: int = 1, size: int = 20) -> int:
+        '''This function prints a page of the saved history file and returns the number of printed calculations.'''
+        return current_session().print_saved_page(page, size)
+    @staticmethod
+    def cache_stats() -> dict[str, int]:
+        '''This function returns the hit and miss statistics of the shared result cache.'''
+        return result_cache.stats()
     @staticmethod
     def clear_history():
         '''This function clears the history of calculations.'''
-        Calculations.clear_history()
+        current_session().clear_history()
     @staticmethod
-    def save_history_to_csv():
-        '''This function saves the history of calculations to a CSV file.'''
-        Calculations.add_calculations_data_to_csv()
+    def save_history_to_csv() -> bool:
+        '''This function saves the history of calculations to a CSV file, and returns whether it was saved.'''
+        return current_session().add_calculations_data_to_csv()
     @staticmethod
     def print_all_calculations():
-        Calculations.print_all_calculations()
+        current_session().print_all_calculations()
     @staticmethod
     def delete_at_index(index):
-        Calculations.delete_at_index(index)
+        current_session().delete_at_index(index)
     @staticmethod
     def load_csv_data():
-        Calculations.add_csv_data()
+        current_session().add_csv_data()
     @staticmethod
     def delete_csv():
-        Calculations.delete_csv()
+        current_session().delete_csv()
         
@@ -0,0 +1,124 @@
+# pylint: disable=line-too-long
+'''This document contains the vectorized batch evaluation of arithmetic operations over arrays of operands.'''
+from decimal import Decimal
+from typing import Callable, Union
+import numpy as np
+from calculator.operations import add, subtract, multiply, divide
+
+BATCH_OPERATIONS = {
+    'add': add,
+    'subtract': subtract,
+    'multiply': multiply,
+    'divide': divide,
+}
+UFUNCS = {
+    add: np.add,
+    subtract: np.subtract,
+    multiply: np.multiply,
+    divide: np.divide,
+}
+
+def resolve_operation(operation: Union[str, Callable]) -> Callable:
+    '''This function returns the arithmetic operation for an operation name or function.'''
+    if isinstance(operation, str):
+        try:
+            return BATCH_OPERATIONS[operation]
+        except KeyError as e:
+            raise ValueError(f"Unsupported batch operation: {operation}") from e
+    if operation not in UFUNCS:
+        raise ValueError(f"Unsupported batch operation: {getattr(operation, '__name__', operation)}")
+    return operation
+
+def _to_decimal(value) -> Decimal:
+    '''This function converts a single operand to Decimal without going through binary floats.'''
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+_to_decimal_array = np.frompyfunc(_to_decimal, 1, 1)
+
+def as_operand_array(values, exact: bool = False, copy: bool = False) -> np.ndarray:
+    '''
+    This function converts a list, array or column of operands to a float64 or Decimal object array.
+    With copy=True the array never shares memory with the values, the Decimal arrays are always new ones.
+    '''
+    if exact:
+        return np.asarray(_to_decimal_array(np.asarray(values, dtype=object)), dtype=object)
+    return np.array(values, dtype=np.float64) if copy else np.asarray(values, dtype=np.float64)
+
+class BatchResult:
+    '''This class holds the values of a batch evaluation and the mask of elements that divided by zero.'''
+    def __init__(self, values: np.ndarray, zero_division: np.ndarray):
+        '''This function initializes the BatchResult class.'''
+        self.values = values
+        self.zero_division = zero_division
+
+    @property
+    def valid(self) -> np.ndarray:
+        '''This function returns the mask of elements that were evaluated successfully.'''
+        return ~self.zero_division
+
+    @property
+    def error_count(self) -> int:
+        '''This function returns the number of elements that divided by zero.'''
+        return int(np.count_nonzero(self.zero_division))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __repr__(self):
+        '''This function returns a string representation of the BatchResult object.'''
+        return f"BatchResult({len(self)} values, {self.error_count} division by zero)"
+
+def evaluate(operation: Callable, a, b, exact: bool = False) -> BatchResult:
+    '''
+    This function evaluates an arithmetic operation over two arrays of operands in one vectorized pass.
+    Division by zero does not raise, the affected elements are NaN and flagged in the result mask.
+    '''
+    ufunc = UFUNCS[resolve_operation(operation)]
+    a_array, b_array = np.broadcast_arrays(as_operand_array(a, exact), as_operand_array(b, exact))
+    if ufunc is np.divide:
+        zero_division = np.asarray(b_array == 0, dtype=bool)
+    else:
+        zero_division = np.zeros(a_array.shape, dtype=bool)
+    if exact:
+        out = np.full(a_array.shape, Decimal('NaN'), dtype=object)
+    else:
+        out = np.full(a_array.shape, np.nan, dtype=np.float64)
+    values = ufunc(a_array, b_array, out=out, where=~zero_division)
+    return BatchResult(values, zero_division)
+
+class CalculationBatch:
+    '''This class represents an arithmetic operation applied element-wise to two arrays of numbers.'''
+    def __init__(self, a, b, operation: Callable[[Decimal, Decimal], Decimal], exact: bool = False):
+        '''This function initializes the CalculationBatch class.'''
+        self.a = a
+        self.b = b
+        self.operation = operation
+        self.exact = exact
+    @staticmethod
+    def create(a, b, operation: Callable[[Decimal, Decimal], Decimal], exact: bool = False):
+        '''
+        This function creates a CalculationBatch object from copies of the operands, so later changes to the arrays
+        of the caller do not change it, and checks that the operands broadcast together.
+        '''
+        operation = resolve_operation(operation)
+        a_array, b_array = as_operand_array(a, exact, copy=True), as_operand_array(b, exact, copy=True)
+        try:
+            np.broadcast_shapes(a_array.shape, b_array.shape)
+        except ValueError as e:
+            raise ValueError(f"The operands of a batch do not match: shapes {a_array.shape} and {b_array.shape}") from e
+        return CalculationBatch(a_array, b_array, operation, exact)
+
+    def __len__(self) -> int:
+        return int(np.broadcast(np.asarray(self.a, dtype=object), np.asarray(self.b, dtype=object)).size)
+
+    def pairs(self):
+        '''This function yields the operand pairs of the batch, one per element.'''
+        a_array, b_array = np.broadcast_arrays(as_operand_array(self.a, self.exact), as_operand_array(self.b, self.exact))
+        return zip(a_array.tolist(), b_array.tolist())
+
+    def perform(self) -> BatchResult:
+        '''This function performs the arithmetic operation over the whole batch.'''
+        return evaluate(self.operation, self.a, self.b, self.exact)
+    def __repr__(self):
+        '''This function returns a string representation of the CalculationBatch object.'''
+        return f"CalculationBatch({len(self)} rows, {self.operation.__name__})"
@@ -0,0 +1,47 @@
+# pylint: disable=line-too-long
+'''This document contains the ResultCache class, a bounded LRU memo of operation results shared by the whole process.'''
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+class ResultCache:
+    '''This class keeps the most recently used operation results, keyed on the operation and its operands.'''
+    def __init__(self, maxsize: int = 4096):
+        '''This function initializes the ResultCache class.'''
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable):
+        '''This function returns the cached result for the key, computing and storing it on a miss.'''
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            except KeyError:
+                self.misses += 1
+        # Compute outside of the lock, errors such as division by zero are not cached.
+        result = compute()
+        if self.maxsize > 0:
+            with self._lock:
+                self._entries[key] = result
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        '''This function removes every cached result and resets the statistics.'''
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        '''This function returns the hit and miss counters and the current size of the cache.'''
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+result_cache = ResultCache(int(os.environ.get('CALCULATOR_RESULT_CACHE_SIZE', '4096')))
@@ -2,22 +2,48 @@
 '''This document contains the Calculation class, which represents an arithmetic operation on two numbers.'''
 from decimal import Decimal
 from typing import Callable
+from calculator.cache import result_cache
+from calculator.operators import operation_for, operator_code
 
 class Calculation:
-    '''This class represents an arithmetic operation on two numbers.'''
+    '''
+    This class represents an arithmetic operation on two numbers.
+    Instances have no __dict__ and keep the operation as its operator code, histories hold millions of them.
+    '''
+    __slots__ = ('a', 'b', 'code')
+
     def __init__(self, a: Decimal, b: Decimal, operation: Callable[[Decimal, Decimal], Decimal]):
         '''This function initializes the Calculation class.'''
         self.a = a
         self.b = b
-        self.operation = operation
+        self.code = operator_code(operation)
     @staticmethod
     def create(a: Decimal, b: Decimal, operation: Callable[[Decimal, Decimal], Decimal]):
         '''This function creates a Calculation object.'''
         return Calculation(a, b, operation)
 
+    @property
+    def operation(self) -> Callable[[Decimal, Decimal], Decimal]:
+        '''The operation of the calculation.'''
+        return operation_for(self.code)
+
     def perform(self) -> Decimal:
-        '''This function performs the arithmetic operation.'''
-        return self.operation(self.a, self.b)
+        '''
+        This function performs the arithmetic operation, reusing the result of an identical calculation from the shared cache.
+        The result is not kept on the object: the history builds a new view of an entry every time it is read.
+        '''
+        operation = self.operation
+        return result_cache.get_or_compute((operation, repr(self.a), repr(self.b)), lambda: operation(self.a, self.b))
+    def __eq__(self, other):
+        '''This function compares two Calculation objects by their operands and operation.'''
+        if type(other) is not type(self):
+            return NotImplemented
+        return (self.a, self.b, self.code) == (other.a, other.b, other.code)
+    def __hash__(self):
+        return hash((self.a, self.b, self.code))
+    def __reduce__(self):
+        '''This function pickles the operation itself, the codes of custom operations differ between processes.'''
+        return (Calculation, (self.a, self.b, self.operation))
     def __repr__(self):
         '''This function returns a string representation of the Calculation object.'''
         return f"Calculation({self.a}, {self.b}, {self.operation.__name__})"
@@ -1,69 +1,192 @@
 # pylint: disable=line-too-long
-'''This document contains the Calculations class, which represents a collection of Calculation objects.'''
+'''
+This document contains the Session class, the history of calculations of one user and the handler of its history file,
+and the Calculations class, the default session shared by the whole process (see calculator.sessions for the others).
+'''
+import os
 from typing import List
+from calculator.batch import CalculationBatch
 from calculator.calculation import Calculation
+from calculator.history import ShardedHistory
 from calculator.statistic import CalculationStatistic
 from data_handler import DataHandler
 
-class Calculations:
-    '''This class represents a collection of Calculation objects.'''
-    history: List[Calculation] = []
-    data_handler = DataHandler()
+class Session:
+    '''
+    This class represents the collection of Calculation objects of one session, saved to its own history file.
+    The history and the data handler are only created when they are first used, so an idle session holds its id and
+    little else.
+    '''
+    __slots__ = ('session_id', 'last_used', 'users', '_history', '_data_handler')
+
+    def __init__(self, session_id: str):
+        '''This function initializes the Session class.'''
+        self.session_id = session_id
+        # Monotonic time of the last use and number of callers using the session, see SessionManager.
+        self.last_used = 0.0
+        self.users = 0
+        self._history = None
+        self._data_handler = None
+
+    @property
+    def history(self) -> ShardedHistory:
+        '''The history of the session.'''
+        if self._history is None:
+            self._history = ShardedHistory()
+        return self._history
+
+    @property
+    def data_handler(self) -> DataHandler:
+        '''The handler of the history file of the session, sessions/<session id>.csv next to the default history file.'''
+        if self._data_handler is None:
+            folder_path = os.environ.get('CALCULATOR_SESSIONS_FOLDER_PATH') or os.path.join(os.environ.get('CALCULATOR_HISTORY_FOLDER_PATH', ''), 'sessions')
+            self._data_handler = DataHandler(folder_path=folder_path, file_name=f'{self.session_id}.csv')
+        return self._data_handler
 
-    @classmethod
-    def add_calculation(cls, calculation: Calculation) -> None:
+    @property
+    def unsaved(self) -> bool:
+        '''Whether the history has changes that are not saved to the history file.'''
+        return self._history is not None and (len(self._history) > 0 or len(self._history.dropped_sources) > 0)
+
+    def add_calculation(self, calculation: Calculation) -> None:
         '''This function adds a Calculation object to the collection.'''
-        cls.history.append(calculation)
-    
-    @classmethod
-    def add_statistic_calculation(cls, calculation: CalculationStatistic) -> None:
+        self.history.append(calculation)
+
+    def add_statistic_calculation(self, calculation: CalculationStatistic) -> None:
         '''This function adds a Calculation object to the collection.'''
-        cls.history.append(calculation)
+        self.history.append(calculation)
 
-    @classmethod
-    def clear_history(cls) -> None:
+    def add_batch_calculation(self, calculation: CalculationBatch) -> None:
+        '''This function adds a CalculationBatch object to the collection as a single entry.'''
+        self.history.append(calculation)
+
+    def clear_history(self) -> None:
         '''This function clears the collection of Calculation objects.'''
-        cls.history.clear()
+        self.history.clear()
 
-    @classmethod
-    def get_history(cls) -> List[Calculation]:
-        '''This function returns the collection of Calculation objects.'''
-        return cls.history
+    def get_history(self) -> ShardedHistory:
+        '''This function returns the collection of Calculation objects, materialized lazily from the columnar store.'''
+        return self.history
 
-    @classmethod
-    def get_latest(cls) -> Calculation:
+    def get_latest(self) -> Calculation:
         '''This function returns the most recent Calculation object.'''
-        return None if not cls.history else cls.history[-1]
+        with self.history.lock:
+            return None if not self.history else self.history[-1]
 
-    @classmethod
-    def find_by_operation(cls, operation_name: str) -> List[Calculation]:
+    def find_by_operation(self, operation_name: str) -> List[Calculation]:
         '''This function returns a list of Calculation objects that match the specified operation.'''
-        return [calculation for calculation in cls.history if calculation.operation.__name__ == operation_name]
-    @classmethod
-    def clear_csv_data(cls):
+        return self.history.find_by_operation(operation_name)
+
+    def count_by_operation(self, operation_name: str) -> int:
+        '''This function returns the number of Calculation objects that match the specified operation.'''
+        return self.history.count_by_operation(operation_name)
+
+    def get_latest_by_operation(self, operation_name: str) -> Calculation:
+        '''This function returns the most recent Calculation object that matches the specified operation.'''
+        return self.history.latest_by_operation(operation_name)
+
+    def get_operation_counts(self) -> dict[str, int]:
+        '''This function returns the number of Calculation objects per operation.'''
+        return self.history.operation_counts()
+
+    def clear_csv_data(self):
         '''This function clears the CSV data.'''
-        cls.data_handler.clear_csv_data()
-    @classmethod
-    def add_csv_data(cls):
-        cls.history += cls.data_handler.convert_to_calculation()
-        cls.data_handler.clear_csv_data()
-    @classmethod
-    def add_calculations_data_to_csv(cls):
-        for calc in cls.history:
-            cls.data_handler.add_to_csv(calc)
-        cls.data_handler.save_csv_data()
-        cls.clear_history()
-    @classmethod
-    def print_all_calculations(cls):
-        # print(cls.history)
-        for index, calc in enumerate(cls.history):
+        self.data_handler.clear_csv_data()
+    def add_csv_data(self):
+        '''
+        This function streams the saved calculations into the history, remembering their row in the file.
+        Rows already in the history, or removed from it since the last save, are not loaded again.
+        '''
+        with self.history.lock:
+            skipped = set(self.history.sources).union(self.history.dropped_sources)
+            for row_number, calculation in self.data_handler.iter_indexed_calculations():
+                if row_number is None:
+                    self.history.append(calculation)
+                elif row_number not in skipped:
+                    self.history.append(calculation, row_number)
+            self.data_handler.clear_csv_data()
+    def add_calculations_data_to_csv(self):
+        '''
+        This function saves the history and clears it, it returns whether the history was saved.
+        In append mode entries loaded from the file are not written again,
+        and loaded entries that were removed from the history are marked as deleted in the file.
+        If the save fails the history is left as it was.
+        '''
+        append_mode = self.data_handler.write_mode == 'append'
+        # The saved entries are taken out of the history at once, calculations added meanwhile stay for the next save.
+        with self.history.lock:
+            history = self.history.drain()
+            pending = list(self.data_handler.csv_data)
+            saved = False
+            try:
+                for calc, source in zip(history, history.sources):
+                    if append_mode and source >= 0:
+                        continue
+                    self.data_handler.add_to_csv(calc)
+                if append_mode:
+                    # A row is only marked as deleted once no entry left in the history comes from it.
+                    live = set(history.sources)
+                    self.data_handler.add_tombstones(source for source in history.dropped_sources if source not in live)
+                saved = self.data_handler.save_csv_data()
+            finally:
+                if not saved:
+                    self.data_handler.csv_data = pending
+                    self.history.restore(history)
+            return saved
+    def print_all_calculations(self):
+        for index, calc in enumerate(self.history):
             print(f'{index+1}. {calc} = {calc.perform()}')
-    @classmethod
-    def delete_at_index(cls, index):
+    def saved_page_lines(self, page: int, size: int) -> list[str]:
+        '''This function returns a page of the saved history file as numbered lines, without loading the rest of it.'''
+        lines = []
+        for position, calc in self.data_handler.iter_history_page(page, size):
+            try:
+                result = calc.perform()
+            except (ArithmeticError, ValueError) as e:
+                result = f'error: {e}'
+            lines.append(f'{position+1}. {calc} = {result}')
+        return lines
+    def print_saved_page(self, page: int, size: int):
+        '''This function prints a page of the saved history file without loading the rest of it.'''
+        lines = self.saved_page_lines(page, size)
+        print('\n'.join(lines) if lines else f'No saved calculations on page {page}')
+        return len(lines)
+    def delete_at_index(self, index):
         try:
-            cls.history.pop(index)
+            self.history.pop(index)
         except IndexError:
             print(f'Delete from improrper index : {index}')
-    @classmethod
-    def delete_csv(cls):
-        cls.data_handler.delete_csv_file_data()
+    def delete_csv(self):
+        with self.history.lock:
+            self.data_handler.delete_csv_file_data()
+            self.history.forget_sources()
+
+    def __repr__(self):
+        '''This function returns a string representation of the Session object.'''
+        return f"Session({self.session_id!r})"
+
+class Calculations:
+    '''This class represents a collection of Calculation objects, the default session shared by the whole process.'''
+    # Safe to use from several threads, see ShardedHistory.
+    history = ShardedHistory()
+    data_handler = DataHandler()
+
+    # The methods of a session, working on the history and data handler of the class.
+    add_calculation = classmethod(Session.add_calculation)
+    add_statistic_calculation = classmethod(Session.add_statistic_calculation)
+    add_batch_calculation = classmethod(Session.add_batch_calculation)
+    clear_history = classmethod(Session.clear_history)
+    get_history = classmethod(Session.get_history)
+    get_latest = classmethod(Session.get_latest)
+    find_by_operation = classmethod(Session.find_by_operation)
+    count_by_operation = classmethod(Session.count_by_operation)
+    get_latest_by_operation = classmethod(Session.get_latest_by_operation)
+    get_operation_counts = classmethod(Session.get_operation_counts)
+    clear_csv_data = classmethod(Session.clear_csv_data)
+    add_csv_data = classmethod(Session.add_csv_data)
+    add_calculations_data_to_csv = classmethod(Session.add_calculations_data_to_csv)
+    print_all_calculations = classmethod(Session.print_all_calculations)
+    saved_page_lines = classmethod(Session.saved_page_lines)
+    print_saved_page = classmethod(Session.print_saved_page)
+    delete_at_index = classmethod(Session.delete_at_index)
+    delete_csv = classmethod(Session.delete_csv)
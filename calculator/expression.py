@@ -0,0 +1,235 @@
+# pylint: disable=line-too-long
+'''
+This document contains the expression compiler, which evaluates formulas such as "(1.5 + 2) * mean(3, 4, 5) / 7" over
+the functions of calculator.operations in one step instead of one command per operation.
+
+    expression := term (('+' | '-') term)*
+    term       := unary (('*' | '/') unary)*
+    unary      := ('+' | '-') unary | primary
+    primary    := number | name '(' [expression (',' expression)*] ')' | '(' expression ')'
+
+The names are the operations: add, subtract, multiply and divide take two arguments, mean, median and mode any number.
+A source is tokenized and parsed once into a postfix program of instructions run on a stack, and the compiled programs
+are kept by source text, so a formula that is evaluated again skips the parsing. Signs and parentheses may be nested
+at most MAX_DEPTH levels deep, so a hostile source is refused instead of exhausting the stack of the parser.
+'''
+import os
+import re
+from decimal import Decimal
+from typing import Callable
+from calculator.cache import ResultCache, result_cache
+from calculator.operations import add, subtract, multiply, divide, mean, median, mode
+
+class ExpressionError(ValueError):
+    '''This class is the error raised for sources that are not valid expressions.'''
+
+BINARY_OPERATORS = {'+': add, '-': subtract, '*': multiply, '/': divide}
+BINARY_FUNCTIONS = {operation.__name__: operation for operation in (add, subtract, multiply, divide)}
+STATISTIC_FUNCTIONS = {operation.__name__: operation for operation in (mean, median, mode)}
+
+MAX_DEPTH = 100
+
+TOKEN = re.compile(r'\s*(?:(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)|(?P<name>[A-Za-z_]\w*)|(?P<symbol>[-+*/(),]))')
+
+# The opcodes of the compiled programs.
+PUSH = 0
+BINARY = 1
+NEGATE = 2
+STATISTIC = 3
+
+def tokenize(source: str) -> list[tuple[str, str, int]]:
+    '''This function splits a source into (kind, text, position) tokens, the kinds being number, name and symbol.'''
+    tokens = []
+    position = 0
+    end = len(source.rstrip())
+    while position < end:
+        match = TOKEN.match(source, position)
+        if match is None:
+            offset = len(source) - len(source[position:].lstrip())
+            raise ExpressionError(f"Unexpected character {source[offset]!r} at position {offset + 1}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind), match.start(kind)))
+        position = match.end()
+    return tokens
+
+class Parser:
+    '''This class parses the tokens of a source by recursive descent and emits the postfix program.'''
+    def __init__(self, source: str):
+        '''This function initializes the Parser class.'''
+        self.tokens = tokenize(source)
+        self.index = 0
+        self.depth = 0
+        self.program: list[tuple] = []
+
+    def peek(self) -> str:
+        '''This function returns the text of the current token, or an empty string at the end.'''
+        return self.tokens[self.index][1] if self.index < len(self.tokens) else ''
+
+    def take(self, expected: str = None) -> tuple[str, str, int]:
+        '''This function returns the current token and moves to the next one, checking its text if one is expected.'''
+        if self.index == len(self.tokens):
+            raise ExpressionError("Unexpected end of expression" + (f", expected {expected!r}" if expected else ''))
+        token = self.tokens[self.index]
+        if expected is not None and token[1] != expected:
+            raise ExpressionError(f"Expected {expected!r} at position {token[2] + 1}, got {token[1]!r}")
+        self.index += 1
+        return token
+
+    def parse(self) -> tuple[tuple, ...]:
+        '''This function parses the whole source and returns its program.'''
+        if not self.tokens:
+            raise ExpressionError("Empty expression")
+        self.expression()
+        if self.index < len(self.tokens):
+            _, text, position = self.tokens[self.index]
+            raise ExpressionError(f"Unexpected {text!r} at position {position + 1}")
+        return tuple(self.program)
+
+    def expression(self):
+        '''This function parses a sum or difference of terms.'''
+        self.term()
+        while self.peek() in ('+', '-'):
+            operation = BINARY_OPERATORS[self.take()[1]]
+            self.term()
+            self.program.append((BINARY, operation))
+
+    def term(self):
+        '''This function parses a product or quotient of factors.'''
+        self.unary()
+        while self.peek() in ('*', '/'):
+            operation = BINARY_OPERATORS[self.take()[1]]
+            self.unary()
+            self.program.append((BINARY, operation))
+
+    def unary(self):
+        '''This function parses a signed factor, every sign, call and parenthesis nesting one level deeper.'''
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise ExpressionError(f"Expression nested more than {MAX_DEPTH} levels deep")
+        if self.peek() in ('+', '-'):
+            negate = self.take()[1] == '-'
+            self.unary()
+            if negate:
+                self.program.append((NEGATE, None))
+        else:
+            self.primary()
+        self.depth -= 1
+
+    def primary(self):
+        '''This function parses a number, a call or a parenthesized expression.'''
+        kind, text, position = self.take()
+        if kind == 'number':
+            self.program.append((PUSH, Decimal(text)))
+        elif kind == 'name':
+            self.call(text, position)
+        elif text == '(':
+            self.expression()
+            self.take(')')
+        else:
+            raise ExpressionError(f"Unexpected {text!r} at position {position + 1}")
+
+    def call(self, name: str, position: int):
+        '''This function parses the arguments of a call and emits the operation.'''
+        if name not in BINARY_FUNCTIONS and name not in STATISTIC_FUNCTIONS:
+            raise ExpressionError(f"Unknown function {name!r} at position {position + 1}")
+        self.take('(')
+        count = 0
+        if self.peek() != ')':
+            self.expression()
+            count = 1
+            while self.peek() == ',':
+                self.take()
+                self.expression()
+                count += 1
+        self.take(')')
+        if name in BINARY_FUNCTIONS:
+            if count != 2:
+                raise ExpressionError(f"{name} expects 2 arguments, got {count}")
+            self.program.append((BINARY, BINARY_FUNCTIONS[name]))
+        else:
+            self.program.append((STATISTIC, (STATISTIC_FUNCTIONS[name], count)))
+
+class CompiledExpression:
+    '''This class is a compiled expression: its source and the postfix program that evaluates it.'''
+    __slots__ = ('source', 'program')
+
+    def __init__(self, source: str, program: tuple[tuple, ...]):
+        '''This function initializes the CompiledExpression class.'''
+        self.source = source
+        self.program = program
+
+    def evaluate(self):
+        '''This function runs the program and returns the value of the expression, arithmetic errors raise an ExpressionError.'''
+        try:
+            stack = []
+            last = len(self.program) - 1
+            for index, (opcode, argument) in enumerate(self.program):
+                if opcode == PUSH:
+                    stack.append(argument)
+                elif opcode == BINARY:
+                    right = stack.pop()
+                    stack[-1] = argument(stack[-1], right)
+                elif opcode == NEGATE:
+                    stack[-1] = -stack[-1]
+                else:
+                    operation, count = argument
+                    start = len(stack) - count
+                    result = operation(stack[start:])
+                    del stack[start:]
+                    # Only the final value may be the list of tied modes, anything else needs a single number.
+                    if isinstance(result, list) and index != last:
+                        raise ExpressionError(f"The {operation.__name__} is tied between {', '.join(str(number) for number in result)}, it cannot be used as a number")
+                    stack.append(result)
+            return stack[0]
+        except ArithmeticError as e:
+            raise ExpressionError(f"Cannot evaluate {self.source!r}: {type(e).__name__}") from e
+
+    def __repr__(self):
+        '''This function returns a string representation of the CompiledExpression object.'''
+        return f"CompiledExpression({self.source!r})"
+
+compiled_expressions = ResultCache(int(os.environ.get('CALCULATOR_EXPRESSION_CACHE_SIZE', '1024')))
+
+def compile_expression(source: str) -> CompiledExpression:
+    '''This function returns the compiled expression of a source, parsing it only the first time the source is seen.'''
+    source = source.strip()
+    return compiled_expressions.get_or_compute(source, lambda: CompiledExpression(source, Parser(source).parse()))
+
+def evaluate(source: str):
+    '''This function evaluates an expression.'''
+    return compile_expression(source).evaluate()
+
+class ExpressionCalculation:
+    '''
+    This class represents an evaluated expression in the history, a single entry however many operations it has.
+    a holds the source, b is 0 as for statistics, and the operation is evaluate.
+    '''
+    __slots__ = ('a', 'expression', '_result')
+    b = 0
+    operation: Callable = staticmethod(evaluate)
+
+    def __init__(self, source: str):
+        '''This function initializes the ExpressionCalculation class, compiling the source.'''
+        self.expression = compile_expression(source)
+        self.a = self.expression.source
+        self._result = None
+    @staticmethod
+    def create(source: str):
+        '''This function creates an ExpressionCalculation object.'''
+        return ExpressionCalculation(source)
+
+    def perform(self):
+        '''This function evaluates the expression once and keeps the result.'''
+        if self._result is None:
+            self._result = result_cache.get_or_compute((evaluate, self.a), self.expression.evaluate)
+        return self._result
+    def __eq__(self, other):
+        '''This function compares two ExpressionCalculation objects by their source.'''
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.a == other.a
+    def __hash__(self):
+        return hash((evaluate, self.a))
+    def __repr__(self):
+        '''This function returns a string representation of the ExpressionCalculation object.'''
+        return f"ExpressionCalculation({self.a!r})"
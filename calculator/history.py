@@ -0,0 +1,335 @@
+# pylint: disable=line-too-long
+'''
+This document contains the HistoryStore class, a columnar backend for the calculation history.
+Instead of keeping one Calculation object per entry, the history is kept as parallel columns
+(operands, operator code, record kind, timestamp and the result of statistics) and Calculation objects are only built when asked for.
+The ShardedHistory class wraps a HistoryStore for concurrent callers: every thread appends to its own buffer and the
+buffers are merged into the store, under a lock, before it is read or changed.
+'''
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from array import array
+from bisect import bisect_left
+from enum import IntEnum
+from typing import Iterator
+import numpy as np
+from calculator.batch import CalculationBatch
+from calculator.calculation import Calculation
+from calculator.operators import operation_for, operator_code, operator_codes
+from calculator.statistic import CalculationStatistic
+
+class RecordKind(IntEnum):
+    '''This class enumerates the kinds of records that can be stored in the history.'''
+    CALCULATION = 0
+    STATISTIC = 1
+    BATCH = 2
+    BATCH_EXACT = 3
+    # Any other object is kept as is, so callers can still store their own records.
+    OBJECT = 255
+
+class HistoryStore:
+    '''
+    This class stores the calculation history in columns and materializes Calculation views lazily.
+    A secondary index maps every operator code to the sorted positions of its entries,
+    so lookups, counts and the latest entry per operation do not scan the history.
+    '''
+    def __init__(self):
+        '''This function initializes the HistoryStore class.'''
+        self.a: list = []
+        self.b: list = []
+        self.codes = array('H')
+        self.kinds = array('B')
+        self.timestamps = array('d')
+        # The result cell of every statistic (see CalculationStatistic), None for the other entries.
+        self.results: list = []
+        self.positions: dict[int, array] = {}
+        # Row number of the entry in the saved history file, -1 for entries that are not saved.
+        self.sources = array('q')
+        # Row numbers of saved entries that were removed from the history since the last save.
+        self.dropped_sources = array('q')
+
+    @staticmethod
+    def _columns(calculation) -> tuple:
+        '''This function splits a calculation into its column values.'''
+        record_type = type(calculation)
+        if record_type is Calculation:
+            return calculation.a, calculation.b, calculation.code, RecordKind.CALCULATION, None
+        if record_type is CalculationStatistic:
+            return calculation.a, 0, calculation.code, RecordKind.STATISTIC, calculation.result_cell
+        if record_type is CalculationBatch:
+            kind = RecordKind.BATCH_EXACT if calculation.exact else RecordKind.BATCH
+            return calculation.a, calculation.b, operator_code(calculation.operation), kind, None
+        operation = getattr(calculation, 'operation', None)
+        return calculation, None, 0 if operation is None else operator_code(operation), RecordKind.OBJECT, None
+
+    def append(self, calculation, source: int = -1, timestamp: float = None) -> None:
+        '''This function appends a calculation to the columns, optionally with its row number in the saved history file.'''
+        a, b, code, kind, result = self._columns(calculation)
+        self.a.append(a)
+        self.b.append(b)
+        self.codes.append(code)
+        self.kinds.append(kind)
+        self.results.append(result)
+        self.timestamps.append(time.time() if timestamp is None else timestamp)
+        self.sources.append(source)
+        if code not in self.positions:
+            self.positions[code] = array('q')
+        self.positions[code].append(len(self.kinds) - 1)
+
+    def extend(self, calculations) -> None:
+        '''This function appends every calculation of an iterable to the columns.'''
+        for calculation in calculations:
+            self.append(calculation)
+
+    def append_entries(self, entries) -> None:
+        '''This function appends (calculation, source, timestamp) entries, with the column methods looked up once.'''
+        columns, positions = self._columns, self.positions
+        a, b, codes, kinds = self.a.append, self.b.append, self.codes.append, self.kinds.append
+        timestamps, sources, results = self.timestamps.append, self.sources.append, self.results.append
+        index = len(self.kinds)
+        for calculation, source, timestamp in entries:
+            value_a, value_b, code, kind, result = columns(calculation)
+            a(value_a)
+            b(value_b)
+            codes(code)
+            kinds(kind)
+            results(result)
+            timestamps(timestamp)
+            sources(source)
+            if code not in positions:
+                positions[code] = array('q')
+            positions[code].append(index)
+            index += 1
+
+    def materialize(self, index: int):
+        '''This function builds the Calculation view of the entry at the given position.'''
+        kind = self.kinds[index]
+        if kind == RecordKind.CALCULATION:
+            return Calculation(self.a[index], self.b[index], operation_for(self.codes[index]))
+        if kind == RecordKind.STATISTIC:
+            return CalculationStatistic(self.a[index], operation_for(self.codes[index]), self.results[index])
+        if kind in (RecordKind.BATCH, RecordKind.BATCH_EXACT):
+            return CalculationBatch(self.a[index], self.b[index], operation_for(self.codes[index]), kind == RecordKind.BATCH_EXACT)
+        return self.a[index]
+
+    def _positions(self, operation_name: str) -> list[array]:
+        '''This function returns the position index of every operator code with the given name.'''
+        return [self.positions[code] for code in operator_codes(operation_name) if self.positions.get(code)]
+
+    def find_by_operation(self, operation_name: str) -> list:
+        '''This function returns the Calculation views of every entry that uses the named operation.'''
+        indexes = self._positions(operation_name)
+        positions = indexes[0] if len(indexes) == 1 else heapq.merge(*indexes)
+        return [self.materialize(index) for index in positions]
+
+    def count_by_operation(self, operation_name: str) -> int:
+        '''This function returns the number of entries that use the named operation.'''
+        return sum(len(positions) for positions in self._positions(operation_name))
+
+    def latest_by_operation(self, operation_name: str):
+        '''This function returns the Calculation view of the most recent entry that uses the named operation.'''
+        indexes = self._positions(operation_name)
+        return self.materialize(max(positions[-1] for positions in indexes)) if indexes else None
+
+    def operation_counts(self) -> dict[str, int]:
+        '''This function returns the number of entries per operation name.'''
+        counts: dict[str, int] = {}
+        for code, positions in self.positions.items():
+            if positions:
+                name = operation_for(code).__name__ if code else 'unknown'
+                counts[name] = counts.get(name, 0) + len(positions)
+        return counts
+
+    def pop(self, index: int = -1):
+        '''This function removes the entry at the given position and returns its Calculation view.'''
+        calculation = self.materialize(index)
+        index %= len(self)
+        code = self.codes[index]
+        if self.sources[index] >= 0:
+            self.dropped_sources.append(self.sources[index])
+        del self.a[index], self.b[index], self.codes[index], self.kinds[index], self.timestamps[index], self.sources[index], self.results[index]
+        # Drop the entry from its own index and shift every later position down by one.
+        positions = self.positions[code]
+        del positions[bisect_left(positions, index)]
+        for positions in self.positions.values():
+            start = bisect_left(positions, index)
+            if start < len(positions):
+                # A NumPy view over the buffer of the array shifts the positions in place, without a Python loop.
+                np.frombuffer(positions, dtype=np.int64)[start:] -= 1
+        return calculation
+
+    def clear(self) -> None:
+        '''This function removes every entry.'''
+        self.dropped_sources.extend(source for source in self.sources if source >= 0)
+        self.a.clear()
+        self.b.clear()
+        self.results.clear()
+        del self.codes[:], self.kinds[:], self.timestamps[:], self.sources[:]
+        self.positions.clear()
+
+    def copy(self) -> 'HistoryStore':
+        '''This function returns a copy of the columns, the calculations themselves are shared.'''
+        store = HistoryStore()
+        # The result cells are shared, a result computed through the copy is kept by the history as well.
+        store.a, store.b, store.results = list(self.a), list(self.b), list(self.results)
+        store.codes, store.kinds, store.timestamps = array('H', self.codes), array('B', self.kinds), array('d', self.timestamps)
+        store.positions = {code: array('q', positions) for code, positions in self.positions.items()}
+        store.sources, store.dropped_sources = array('q', self.sources), array('q', self.dropped_sources)
+        return store
+
+    def forget_sources(self) -> None:
+        '''This function detaches every entry from the saved history file, for example after the file is saved or deleted.'''
+        self.sources = array('q', [-1]) * len(self.sources)
+        self.dropped_sources = array('q')
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.materialize(i) for i in range(*index.indices(len(self)))]
+        return self.materialize(index)
+
+    def __iter__(self) -> Iterator:
+        return (self.materialize(index) for index in range(len(self)))
+
+    def __repr__(self):
+        '''This function returns a string representation of the HistoryStore object.'''
+        return f"HistoryStore({len(self)} entries)"
+
+class ShardedHistory:
+    '''
+    This class is the calculation history shared by concurrent callers.
+    append() only adds the calculation to a buffer of the calling thread, numbered from a counter shared by every thread,
+    so appends from many threads neither contend on a lock nor lose entries. Every other method first merges the buffers
+    into the HistoryStore in the order of those numbers, then works on the store under a lock. Iteration goes over a
+    snapshot of the store, so calculations can be appended or removed while the history is iterated.
+    '''
+    def __init__(self):
+        '''This function initializes the ShardedHistory class.'''
+        self.store = HistoryStore()
+        self.lock = threading.RLock()
+        self._sequence = itertools.count()
+        self._local = threading.local()
+        # (thread, buffer) pairs, the buffers of finished threads are dropped once they are merged.
+        self._shards: list[tuple[threading.Thread, deque]] = []
+
+    def _shard(self) -> deque:
+        '''This function returns the buffer of the calling thread, registering it the first time.'''
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = deque()
+            with self.lock:
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def append(self, calculation, source: int = -1) -> None:
+        '''This function appends a calculation to the buffer of the calling thread.'''
+        # deque.append and next() on a count are atomic, the buffer is only ever popped from its left end by merges.
+        self._shard().append((next(self._sequence), calculation, source, time.time()))
+
+    def extend(self, calculations) -> None:
+        '''This function appends every calculation of an iterable.'''
+        for calculation in calculations:
+            self.append(calculation)
+
+    def _merge(self) -> HistoryStore:
+        '''This function moves the buffered calculations into the store and returns it, the caller holds the lock.'''
+        batches = []
+        for _, shard in self._shards:
+            batch = []
+            # Entries appended while the buffer is drained are either taken now or left for the next merge.
+            while shard:
+                batch.append(shard.popleft())
+            if batch:
+                batches.append(batch)
+        self._shards = [(thread, shard) for thread, shard in self._shards if shard or thread.is_alive()]
+        entries = batches[0] if len(batches) == 1 else heapq.merge(*batches, key=lambda entry: entry[0])
+        self.store.append_entries(entry[1:] for entry in entries)
+        return self.store
+
+    def snapshot(self) -> HistoryStore:
+        '''This function returns a copy of the merged history, which later changes do not affect.'''
+        with self.lock:
+            return self._merge().copy()
+
+    def drain(self) -> HistoryStore:
+        '''This function returns the merged history and leaves an empty one in its place, for example to save it.'''
+        with self.lock:
+            store = self._merge()
+            self.store = HistoryStore()
+            return store
+
+    def restore(self, store: HistoryStore) -> None:
+        '''This function puts a drained history back in front of the calculations added since, for example when saving it failed.'''
+        with self.lock:
+            current = self._merge()
+            store.append_entries(zip(current, current.sources, current.timestamps))
+            store.dropped_sources.extend(current.dropped_sources)
+            self.store = store
+
+    def find_by_operation(self, operation_name: str) -> list:
+        '''This function returns the Calculation views of every entry that uses the named operation.'''
+        with self.lock:
+            return self._merge().find_by_operation(operation_name)
+
+    def count_by_operation(self, operation_name: str) -> int:
+        '''This function returns the number of entries that use the named operation.'''
+        with self.lock:
+            return self._merge().count_by_operation(operation_name)
+
+    def latest_by_operation(self, operation_name: str):
+        '''This function returns the Calculation view of the most recent entry that uses the named operation.'''
+        with self.lock:
+            return self._merge().latest_by_operation(operation_name)
+
+    def operation_counts(self) -> dict[str, int]:
+        '''This function returns the number of entries per operation name.'''
+        with self.lock:
+            return self._merge().operation_counts()
+
+    def pop(self, index: int = -1):
+        '''This function removes the entry at the given position and returns its Calculation view.'''
+        with self.lock:
+            return self._merge().pop(index)
+
+    def clear(self) -> None:
+        '''This function removes every entry, the ones still buffered included.'''
+        with self.lock:
+            self._merge().clear()
+
+    def forget_sources(self) -> None:
+        '''This function detaches every entry from the saved history file.'''
+        with self.lock:
+            self._merge().forget_sources()
+
+    @property
+    def sources(self) -> array:
+        '''The row number of every entry in the saved history file, -1 for entries that are not saved.'''
+        with self.lock:
+            return self._merge().sources
+
+    @property
+    def dropped_sources(self) -> array:
+        '''The row numbers of saved entries that were removed from the history since the last save.'''
+        with self.lock:
+            return self._merge().dropped_sources
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self._merge())
+
+    def __getitem__(self, index):
+        with self.lock:
+            return self._merge()[index]
+
+    def __iter__(self) -> Iterator:
+        return iter(self.snapshot())
+
+    def __repr__(self):
+        '''This function returns a string representation of the ShardedHistory object.'''
+        return f"ShardedHistory({len(self)} entries)"
@@ -0,0 +1,56 @@
+# pylint: disable=line-too-long
+'''
+This document contains the counting behind the mode: the Modes result for tied numbers, the most frequent numbers of a
+list or a NumPy array, and the k most frequent ones.
+
+Lists are counted with collections.Counter, NumPy arrays with np.unique. In both cases tied numbers come in the order of
+their first occurrence, and equal numbers such as Decimal('2') and Decimal('2.0') are counted together under the first one.
+'''
+from collections import Counter
+from typing import Mapping, Union
+import numpy as np
+
+class Modes(list):
+    '''This class is the result of a mode with tied numbers: the most frequent numbers, in the order of their first occurrence.'''
+    def __init__(self, numbers=(), count: int = 0):
+        '''This function initializes the Modes class with the numbers and how many times each of them occurs.'''
+        super().__init__(numbers)
+        self.count = count
+
+def most_frequent(counts: Mapping) -> Modes:
+    '''This function returns the most frequent numbers of a mapping of counts, in the order of the mapping.'''
+    max_count = max(counts.values())
+    return Modes((number for number, count in counts.items() if count == max_count), max_count)
+
+def _unique(a: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    '''This function returns the distinct numbers of an array in the order of their first occurrence, and their counts.'''
+    values, first, counts = np.unique(a, return_index=True, return_counts=True)
+    order = np.argsort(first, kind='stable')
+    return values[order], counts[order]
+
+def multimode(a) -> Modes:
+    '''This function returns the most frequent numbers of a list or array, a single number included.'''
+    if len(a) == 0:
+        raise ValueError("Cannot calculate the mode of an empty list")
+    if isinstance(a, np.ndarray):
+        values, counts = _unique(a)
+        max_count = counts.max()
+        return Modes(values[counts == max_count].tolist(), int(max_count))
+    return most_frequent(Counter(a))
+
+def single_or_modes(modes: Modes) -> Union[object, Modes]:
+    '''This function returns the number of a mode without ties, and the Modes themselves otherwise.'''
+    return modes[0] if len(modes) == 1 else modes
+
+def top_modes(a, k: int) -> list[tuple]:
+    '''This function returns the k most frequent numbers of a list or array with their counts, ties in the order of their first occurrence.'''
+    if k < 1:
+        raise ValueError("The number of modes must be positive")
+    if len(a) == 0:
+        raise ValueError("Cannot calculate the mode of an empty list")
+    if isinstance(a, np.ndarray):
+        values, counts = _unique(a)
+        top = np.argsort(-counts, kind='stable')[:k]
+        return list(zip(values[top].tolist(), counts[top].tolist()))
+    # most_common sorts by count only, which is stable, so ties keep the order of their first occurrence.
+    return Counter(a).most_common(k)
@@ -1,5 +1,8 @@
 '''This module contains the basic arithmetic operations of a calculator'''
 from decimal import Decimal
+from typing import Union
+from calculator import parallel, selection
+from calculator.modes import Modes, multimode, single_or_modes
 # Defining Functions with type hints
 def add(a: Decimal, b: Decimal) -> Decimal:
     '''Add two numbers'''
@@ -27,20 +30,13 @@ def median(a: list[Decimal]) -> Decimal:
     '''Calculate the median of a list of numbers'''
     if len(a) == 0:
         raise ValueError("Cannot calculate the median of an empty list")
-    sorted_a = sorted(a)
-    n = len(sorted_a)
-    if n % 2 == 0:
-        return (sorted_a[n//2 - 1] + sorted_a[n//2]) / 2
-    return sorted_a[n//2]
-def mode(a: list[Decimal]) -> Decimal:
-    '''Calculate the mode of a list of numbers'''
+    if parallel.use_parallel(a):
+        return parallel.median(a)
+    return selection.median(a)
+def mode(a: list[Decimal]) -> Union[Decimal, Modes]:
+    '''Calculate the mode of a list of numbers, tied numbers are returned as Modes in the order of their first occurrence'''
     if len(a) == 0:
         raise ValueError("Cannot calculate the mode of an empty list")
-    counts = {}
-    for num in a:
-        counts[num] = counts.get(num, 0) + 1
-    max_count = max(counts.values())
-    mode = [num for num, count in counts.items() if count == max_count]
-    if len(mode) == 1:
-        return mode[0]
-    return mode
+    if parallel.use_parallel(a):
+        return parallel.mode(a)
+    return single_or_modes(multimode(a))
@@ -0,0 +1,51 @@
+# pylint: disable=line-too-long
+'''
+This document contains the operator codes: every operation stored in a calculation or in the history is interned as a
+small integer code, the built-in operations have fixed codes and any other operation gets one the first time it is seen.
+'''
+from enum import IntEnum
+from typing import Callable
+from calculator.operations import add, subtract, multiply, divide, mean, median, mode
+
+class Operator(IntEnum):
+    '''This class enumerates the codes of the built-in operations.'''
+    ADD = 1
+    SUBTRACT = 2
+    MULTIPLY = 3
+    DIVIDE = 4
+    MEAN = 5
+    MEDIAN = 6
+    MODE = 7
+
+# Operations outside of the built-in set get a code assigned the first time they are stored.
+FIRST_CUSTOM_CODE = 64
+_operations: dict[int, Callable] = {
+    Operator.ADD: add,
+    Operator.SUBTRACT: subtract,
+    Operator.MULTIPLY: multiply,
+    Operator.DIVIDE: divide,
+    Operator.MEAN: mean,
+    Operator.MEDIAN: median,
+    Operator.MODE: mode,
+}
+_codes: dict[Callable, int] = {operation: code for code, operation in _operations.items()}
+_names: dict[str, set[int]] = {operation.__name__: {code} for code, operation in _operations.items()}
+
+def operator_code(operation: Callable) -> int:
+    '''This function returns the operator code of an operation, registering it if it is not known yet.'''
+    try:
+        return _codes[operation]
+    except KeyError:
+        code = max(FIRST_CUSTOM_CODE - 1, *_operations) + 1
+        _operations[code] = operation
+        _codes[operation] = code
+        _names.setdefault(operation.__name__, set()).add(code)
+        return code
+
+def operation_for(code: int) -> Callable:
+    '''This function returns the operation registered for an operator code.'''
+    return _operations[code]
+
+def operator_codes(operation_name: str) -> set[int]:
+    '''This function returns the codes of every registered operation with the given name.'''
+    return _names.get(operation_name, set())
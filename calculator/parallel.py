@@ -0,0 +1,121 @@
+# pylint: disable=line-too-long
+'''
+This document contains the parallel statistics engine, which computes the mean, median and mode of large lists of numbers
+by partitioning them across a process pool. The results are the same Decimals as the single process operations.
+
+    mean    every worker sums its chunk exactly, the sums are merged and divided once
+    mode    every worker counts its chunk, the counts are merged in chunk order so ties keep their first occurrence order
+    median  the median is bracketed with a random sample, the workers count the numbers below the bracket and return the
+            ones inside it, and the median is selected among those
+
+Where the fork start method is available the workers inherit the list instead of receiving pickled chunks: it is handed
+to the pool of every call as the argument of its initializer, so concurrent calls never see each other's list.
+operations.median and operations.mode switch to this engine above CALCULATOR_PARALLEL_THRESHOLD numbers. operations.mean
+does not, the built-in sum of Decimals is faster than starting the pool.
+'''
+import math
+import multiprocessing
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from decimal import Context, Decimal, MAX_EMAX, MAX_PREC, MIN_EMIN, localcontext
+from calculator import selection
+from calculator.modes import most_frequent, single_or_modes
+
+PARALLEL_THRESHOLD = int(os.environ.get('CALCULATOR_PARALLEL_THRESHOLD', '1000000'))
+PARALLEL_WORKERS = int(os.environ.get('CALCULATOR_PARALLEL_WORKERS', '0')) or os.cpu_count() or 1
+# Sums in this context are exact, whatever the number of digits.
+EXACT_CONTEXT = Context(prec=MAX_PREC, Emax=MAX_EMAX, Emin=MIN_EMIN)
+MEDIAN_SAMPLE_SIZE = 20000
+
+# The list being partitioned, set in every forked worker by the initializer of its pool.
+_shared = None
+
+def _share(a: list[Decimal]):
+    '''This function keeps the list being partitioned in the worker process, it is the initializer of the pool.'''
+    global _shared # pylint: disable=global-statement
+    _shared = a
+
+def use_parallel(a: list[Decimal]) -> bool:
+    '''This function decides whether a list is large enough, and there are enough cores, for the parallel engine.'''
+    return len(a) >= PARALLEL_THRESHOLD and PARALLEL_WORKERS > 1 and not isinstance(a, np.ndarray)
+
+def _chunks(size: int, workers: int) -> list[range]:
+    '''This function splits the positions of a list into one contiguous range per worker.'''
+    step = math.ceil(size / workers)
+    return [range(start, min(start + step, size)) for start in range(0, size, step)]
+
+def _chunk(chunk) -> list[Decimal]:
+    '''This function returns the numbers of a chunk, read from the inherited list when it was given as a range.'''
+    return _shared[chunk.start:chunk.stop] if isinstance(chunk, range) else chunk
+
+def _map(function, a: list[Decimal], workers: int, *args) -> list:
+    '''This function runs function(chunk, *args) for every chunk of the list on a process pool, and returns the results in chunk order.'''
+    chunks = _chunks(len(a), workers)
+    if 'fork' in multiprocessing.get_all_start_methods():
+        # The forked workers inherit the arguments of the initializer, the list is not pickled.
+        with ProcessPoolExecutor(len(chunks), mp_context=multiprocessing.get_context('fork'), initializer=_share, initargs=(a,)) as pool:
+            return list(pool.map(function, chunks, *([arg] * len(chunks) for arg in args)))
+    with ProcessPoolExecutor(len(chunks)) as pool:
+        return list(pool.map(function, [a[chunk.start:chunk.stop] for chunk in chunks], *([arg] * len(chunks) for arg in args)))
+
+def _sum(chunk) -> Decimal:
+    '''This function sums the numbers of a chunk exactly.'''
+    with localcontext(EXACT_CONTEXT):
+        return sum(_chunk(chunk), Decimal(0))
+
+def _count(chunk) -> Counter:
+    '''This function counts the numbers of a chunk, in the order of their first occurrence.'''
+    return Counter(_chunk(chunk))
+
+def _bracket(chunk, lower, upper) -> tuple[int, list[Decimal]]:
+    '''This function counts the numbers of a chunk below lower and returns the ones between lower and upper, a bound of None is open.'''
+    below = 0
+    inside = []
+    for num in _chunk(chunk):
+        if lower is not None and num < lower:
+            below += 1
+        elif upper is None or num <= upper:
+            inside.append(num)
+    return below, inside
+
+def mean(a: list[Decimal], workers: int = None) -> Decimal:
+    '''This function calculates the mean of a list of numbers on a process pool.'''
+    partial_sums = _map(_sum, a, workers or PARALLEL_WORKERS)
+    with localcontext(EXACT_CONTEXT):
+        total = sum(partial_sums, Decimal(0))
+    return total / len(a)
+
+def mode(a: list[Decimal], workers: int = None):
+    '''This function calculates the mode of a list of numbers on a process pool.'''
+    counts = Counter()
+    for partial_counts in _map(_count, a, workers or PARALLEL_WORKERS):
+        counts.update(partial_counts)
+    return single_or_modes(most_frequent(counts))
+
+def median(a: list[Decimal], workers: int = None) -> Decimal:
+    '''This function calculates the median of a list of numbers on a process pool.'''
+    n = len(a)
+    ranks = ((n - 1) // 2, n // 2)
+    # The ranks of the median in a sorted random sample are within a few standard deviations of its position.
+    rng = random.Random(n)
+    sample_size = min(n, MEDIAN_SAMPLE_SIZE)
+    sample = sorted(a[index] for index in rng.sample(range(n), sample_size))
+    position = ranks[0] * sample_size // n
+    margin = 3 * math.isqrt(sample_size) + 1
+    lower = sample[position - margin] if position - margin >= 0 else None
+    upper = sample[position + margin] if position + margin < sample_size else None
+    below = 0
+    inside = []
+    for partial_below, partial_inside in _map(_bracket, a, workers or PARALLEL_WORKERS, lower, upper):
+        below += partial_below
+        inside.extend(partial_inside)
+    if not below <= ranks[0] <= ranks[1] < below + len(inside):
+        # The sample missed the median, which is unlikely, so the selection runs over every number.
+        below, inside = 0, a
+    if n % 2 == 0:
+        lower, upper = selection.select_pair(inside, ranks[1] - below)
+        return (lower + upper) / 2
+    return selection.select(inside, ranks[1] - below)
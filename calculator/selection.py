@@ -0,0 +1,121 @@
+# pylint: disable=line-too-long
+'''
+This document contains the selection functions, which find the k-th smallest number and the median of a list in linear
+time instead of sorting it. They work on any comparable numbers, Decimals or floats, and on NumPy arrays.
+
+Without in_place the list is left untouched and the number returned is the one sorted(a)[k] would return, equal numbers
+with a different representation such as Decimal('2') and Decimal('2.0') included. With in_place the caller provided
+buffer is reordered instead of copied: afterwards a[k] is the k-th smallest number, the ones before it are smaller or
+equal and the ones after it are larger or equal.
+
+Lists are partitioned around a pivot taken as the median of three random numbers (quickselect). Past 2 log2(n) rounds the
+pivot becomes the median of medians of groups of five, which bounds the worst case to linear time (introselect).
+NumPy arrays are partitioned by NumPy, which also uses introselect.
+'''
+import random
+from itertools import islice
+import numpy as np
+
+# Below this size the remaining numbers are sorted, the C sort is faster than partitioning them in Python.
+SMALL_SIZE = 1024
+
+_random = random.Random()
+
+def _median_of_three(values, lo: int, hi: int):
+    '''This function returns the median of three random numbers of values[lo:hi].'''
+    first, second, third = (values[_random.randrange(lo, hi)] for _ in range(3))
+    if first < second:
+        return second if second < third else max(first, third)
+    return first if first < third else max(second, third)
+
+def _median_of_medians(values, lo: int, hi: int):
+    '''This function returns the median of the medians of the groups of five numbers of values[lo:hi].'''
+    medians = [sorted(values[start:min(start + 5, hi)])[(min(start + 5, hi) - start - 1) // 2] for start in range(lo, hi, 5)]
+    return _introselect(medians, (len(medians) - 1) // 2)
+
+def _quickselect(values: list, k: int):
+    '''This function returns the k-th smallest number of values, partitioning copies that keep the order of the numbers.'''
+    depth = 2 * len(values).bit_length()
+    while len(values) > SMALL_SIZE:
+        pivot = _median_of_three(values, 0, len(values)) if depth > 0 else _median_of_medians(values, 0, len(values))
+        depth -= 1
+        lows = [x for x in values if x < pivot]
+        if k < len(lows):
+            values = lows
+            continue
+        highs = [x for x in values if pivot < x]
+        if k >= len(values) - len(highs):
+            k -= len(values) - len(highs)
+            values = highs
+            continue
+        return [x for x in values if x == pivot][k - len(lows)]
+    return sorted(values)[k]
+
+def _introselect(values: list, k: int, lo: int = 0, hi: int = None):
+    '''This function moves the k-th smallest number of values[lo:hi] to values[k] by partitioning in place, and returns it.'''
+    hi = len(values) if hi is None else hi
+    depth = 2 * (hi - lo).bit_length()
+    while hi - lo > SMALL_SIZE:
+        pivot = _median_of_three(values, lo, hi) if depth > 0 else _median_of_medians(values, lo, hi)
+        depth -= 1
+        # Three-way partition: values[lo:lt] < pivot, values[lt:gt] == pivot, values[gt:hi] > pivot.
+        lt, i, gt = lo, lo, hi
+        while i < gt:
+            x = values[i]
+            if x < pivot:
+                values[i] = values[lt]
+                values[lt] = x
+                lt += 1
+                i += 1
+            elif pivot < x:
+                gt -= 1
+                values[i] = values[gt]
+                values[gt] = x
+            else:
+                i += 1
+        if k < lt:
+            hi = lt
+        elif k >= gt:
+            lo = gt
+        else:
+            return values[k]
+    values[lo:hi] = sorted(values[lo:hi])
+    return values[k]
+
+def select(a, k: int, in_place: bool = False):
+    '''This function returns the k-th smallest number of a, counting from 0.'''
+    if not 0 <= k < len(a):
+        raise IndexError(f"Cannot select rank {k} of {len(a)} numbers")
+    if isinstance(a, np.ndarray):
+        buffer = a if in_place else a.copy()
+        buffer.partition(k)
+        return buffer[k]
+    return _introselect(a, k) if in_place else _quickselect(a, k)
+
+def select_pair(a, k: int, in_place: bool = False) -> tuple:
+    '''This function returns the (k-1)-th and k-th smallest numbers of a, counting from 0.'''
+    if not 1 <= k < len(a):
+        raise IndexError(f"Cannot select ranks {k - 1} and {k} of {len(a)} numbers")
+    if isinstance(a, np.ndarray):
+        buffer = a if in_place else a.copy()
+        buffer.partition([k - 1, k])
+        return buffer[k - 1], buffer[k]
+    upper = select(a, k, in_place)
+    if in_place:
+        # The k numbers before a[k] are the smallest ones.
+        return max(islice(a, k)), upper
+    lows = [x for x in a if x < upper]
+    if len(lows) == k:
+        # The last of the largest numbers below upper is the one a stable sort puts at k-1.
+        return max(reversed(lows)), upper
+    return [x for x in a if x == upper][k - 1 - len(lows)], upper
+
+def median(a, in_place: bool = False):
+    '''This function calculates the median of a list of numbers by selection.'''
+    n = len(a)
+    if n == 0:
+        raise ValueError("Cannot calculate the median of an empty list")
+    if n % 2 == 0:
+        lower, upper = select_pair(a, n // 2, in_place)
+        return (lower + upper) / 2
+    return select(a, n // 2, in_place)
@@ -0,0 +1,144 @@
+# pylint: disable=line-too-long
+'''
+This document contains the sessions: independent histories of calculations hosted by one process, each saved to its
+own history file. The Calculator records into the session of the current context, entered with use_session (or
+Calculator.session), and into the default Calculations session outside of one.
+
+The SessionManager keeps the sessions in the order they were last used. Sessions unused for longer than the idle
+timeout, or the least recently used ones past the maximum number of sessions, are saved to their history file and
+evicted from memory, as the save_data command would do. When an evicted session is used again it starts with an empty
+local history, and its saved calculations are loaded back with load_data like any other saved history. The evicted
+sessions are saved outside of the lock of the SessionManager, a session acquired again while its history is being saved
+waits for the save, so only one writer at a time uses its history file.
+'''
+import contextlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Iterator, Union
+from calculator.calculations import Calculations, Session
+
+MAX_SESSIONS = int(os.environ.get('CALCULATOR_MAX_SESSIONS', '1024'))
+SESSION_IDLE_TIMEOUT = float(os.environ.get('CALCULATOR_SESSION_IDLE_TIMEOUT', '900'))
+# Session ids name their history file, so they are restricted to characters that are safe in a file name.
+SESSION_ID = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+class SessionManager:
+    '''This class creates the sessions on first use and evicts the idle ones to their history file.'''
+    def __init__(self, max_sessions: int = MAX_SESSIONS, idle_timeout: float = SESSION_IDLE_TIMEOUT):
+        '''This function initializes the SessionManager class.'''
+        if max_sessions < 1:
+            raise ValueError("The maximum number of sessions must be positive")
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sessions: OrderedDict[str, Session] = OrderedDict()
+        self.evictions = 0
+        # The evicted sessions whose history is being saved, by id, set when the save is done.
+        self._saving: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, session_id: str) -> Session:
+        '''This function returns the session with the given id, creating it if needed, and marks it as in use.'''
+        if not isinstance(session_id, str) or not SESSION_ID.fullmatch(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = Session(session_id)
+            else:
+                self.sessions.move_to_end(session_id)
+            session.users += 1
+            session.last_used = time.monotonic()
+            saving = self._saving.get(session_id)
+            evicted = self._select_evictions(session.last_used)
+        self._save(evicted)
+        if saving is not None:
+            saving.wait()
+        return session
+
+    def release(self, session: Session) -> None:
+        '''This function marks a session acquired with acquire() as no longer in use.'''
+        with self._lock:
+            session.users -= 1
+            session.last_used = time.monotonic()
+
+    def _select_evictions(self, now: float) -> list[Session]:
+        '''This function removes the idle and the least recently used sessions past the maximum, the caller holds the lock.'''
+        evicted = []
+        excess = len(self.sessions) - self.max_sessions
+        for session_id, session in list(self.sessions.items()):
+            if excess <= 0 and now - session.last_used <= self.idle_timeout:
+                # The sessions are in the order of their last use, the following ones are not idle either.
+                break
+            if session.users == 0:
+                evicted.append(session)
+                excess -= 1
+        self._evict(evicted)
+        return evicted
+
+    def _evict(self, evicted: list[Session]) -> None:
+        '''This function removes sessions from memory and marks them as being saved, the caller holds the lock.'''
+        for session in evicted:
+            del self.sessions[session.session_id]
+            self._saving[session.session_id] = threading.Event()
+        self.evictions += len(evicted)
+
+    def _save(self, evicted: list[Session]) -> None:
+        '''This function saves the history of evicted sessions that have unsaved changes, then lets their ids be acquired again.'''
+        try:
+            for session in evicted:
+                if session.unsaved:
+                    session.add_calculations_data_to_csv()
+        finally:
+            with self._lock:
+                for session in evicted:
+                    self._saving.pop(session.session_id).set()
+
+    def evict_idle(self) -> int:
+        '''This function evicts the sessions that are idle, and returns how many were evicted.'''
+        with self._lock:
+            evicted = self._select_evictions(time.monotonic())
+        self._save(evicted)
+        return len(evicted)
+
+    def close(self) -> None:
+        '''This function saves and evicts every session that is not in use.'''
+        with self._lock:
+            evicted = [session for session in self.sessions.values() if session.users == 0]
+            self._evict(evicted)
+        self._save(evicted)
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.sessions
+
+sessions = SessionManager()
+_current: ContextVar[Session] = ContextVar('calculator_session', default=None)
+
+def current_session() -> Union[Session, type[Calculations]]:
+    '''This function returns the session of the current context, or the default Calculations session.'''
+    return _current.get() or Calculations
+
+@contextlib.contextmanager
+def use_session(session_id: str = None, manager: SessionManager = None) -> Iterator[Union[Session, type[Calculations]]]:
+    '''This function records the calculations of the context into the given session, the default one when session_id is None.'''
+    if session_id is None:
+        token = _current.set(None)
+        try:
+            yield Calculations
+        finally:
+            _current.reset(token)
+        return
+    manager = sessions if manager is None else manager
+    session = manager.acquire(session_id)
+    token = _current.set(session)
+    try:
+        yield session
+    finally:
+        _current.reset(token)
+        manager.release(session)
@@ -2,22 +2,63 @@
 '''This document contains the Calculation class, which represents an arithmetic operation on two numbers.'''
 from decimal import Decimal
 from typing import Callable
+from calculator.cache import result_cache
+from calculator.operators import operation_for, operator_code
+
+# Statistics of more numbers are not put in the shared cache, their key would cost as much to build and keep as the
+# result to compute. They keep their result themselves instead.
+CACHE_MAX_OPERANDS = 100
 
 class CalculationStatistic:
-    '''This class represents an arithmetic operation on two numbers.'''
-    def __init__(self, a: list[Decimal], operation: Callable[[list[Decimal]], Decimal]):
+    '''
+    This class represents an arithmetic operation on two numbers.
+    Like Calculation it has no __dict__ and keeps the operation as its operator code.
+    The result is kept in a one item list, which the history stores with the entry, so that every view of the entry
+    built by the history shares the result once it is computed.
+    '''
+    __slots__ = ('a', 'code', 'result_cell')
+    # Statistics have no second operand, b is shared by every instance so they keep the layout of a Calculation.
+    b = 0
+
+    def __init__(self, a: list[Decimal], operation: Callable[[list[Decimal]], Decimal], result_cell: list = None):
         '''This function initializes the Calculation class.'''
         self.a = a
-        self.b = 0
-        self.operation = operation
+        self.code = operator_code(operation)
+        self.result_cell = [None] if result_cell is None else result_cell
     @staticmethod
     def create(a: list[Decimal], operation: Callable[[Decimal, Decimal], Decimal]):
         '''This function creates a Calculation object.'''
         return CalculationStatistic(a, operation)
 
+    @property
+    def operation(self) -> Callable[[list[Decimal]], Decimal]:
+        '''The operation of the statistic.'''
+        return operation_for(self.code)
+
     def perform(self) -> Decimal:
-        '''This function performs the arithmetic operation.'''
-        return self.operation(self.a)
+        '''
+        This function performs the statistic operation once and keeps the result, reusing the result of an identical
+        statistic of at most CACHE_MAX_OPERANDS numbers from the shared cache.
+        '''
+        result = self.result_cell[0]
+        if result is None:
+            operation = self.operation
+            if len(self.a) > CACHE_MAX_OPERANDS:
+                result = operation(self.a)
+            else:
+                result = result_cache.get_or_compute((operation, repr(self.a)), lambda: operation(self.a))
+            self.result_cell[0] = result
+        return result
+    def __eq__(self, other):
+        '''This function compares two CalculationStatistic objects by their operands and operation.'''
+        if type(other) is not type(self):
+            return NotImplemented
+        return (self.a, self.code) == (other.a, other.code)
+    def __hash__(self):
+        return hash((tuple(self.a), self.code))
+    def __reduce__(self):
+        '''This function pickles the operation itself, the codes of custom operations differ between processes.'''
+        return (CalculationStatistic, (self.a, self.operation))
     def __repr__(self):
         '''This function returns a string representation of the Calculation object.'''
         return f"CalculationStatistic({self.a}, {self.b}, {self.operation.__name__})"
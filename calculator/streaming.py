@@ -0,0 +1,290 @@
+# pylint: disable=line-too-long
+'''
+This document contains the streaming accumulators, which compute the mean, median and mode of numbers that arrive over
+time, for example read from a file or a pipe, without keeping them in one list.
+
+    MeanAccumulator     exact running sum and count
+    ModeAccumulator     exact counts, or with a capacity a Misra-Gries sketch keeping the most frequent numbers
+    MedianAccumulator   every number, or with a capacity only a window of numbers around the median and the count of
+                        the numbers dropped below and above it
+
+Every accumulator has update(numbers), merge(other) and result(), and an exact flag telling whether the result is the
+one the list operations would return. An accumulator is recorded in the history through to_calculation().
+'''
+from abc import ABC, abstractmethod
+from decimal import Decimal, localcontext
+from typing import Iterable
+from calculator import selection
+from calculator.modes import most_frequent, single_or_modes
+from calculator.operations import mean, median, mode
+from calculator.parallel import EXACT_CONTEXT
+
+def read_numbers(lines: Iterable[str]) -> Iterable[Decimal]:
+    '''This function yields the numbers of lines of text, separated by commas or whitespace.'''
+    for line in lines:
+        for number in line.replace(',', ' ').split():
+            yield Decimal(number)
+
+class StreamCalculation:
+    '''
+    This class is the history record of an accumulator: its result, frozen when it was recorded.
+    a holds the result as a list of numbers whose statistic is that result, so a saved record loads back as a
+    CalculationStatistic with the same result. b holds the count of numbers the accumulator saw.
+    '''
+    def __init__(self, operation, result, count: int, exact: bool = True):
+        '''This function initializes the StreamCalculation class.'''
+        self.operation = operation
+        self.result = result
+        self.a = list(result) if isinstance(result, list) else [result]
+        self.b = count
+        self.exact = exact
+
+    def perform(self):
+        '''This function returns the recorded result.'''
+        return self.result
+
+    def __repr__(self):
+        '''This function returns a string representation of the StreamCalculation object.'''
+        return f"StreamCalculation({self.b} numbers, {self.operation.__name__}{'' if self.exact else ', approximate'})"
+
+class Accumulator(ABC):
+    '''This class is the abstract base class of the accumulators.'''
+    operation = None
+
+    def __init__(self):
+        '''This function initializes the Accumulator class.'''
+        self.count = 0
+
+    @property
+    def exact(self) -> bool:
+        '''Whether the result is the one the list operation would return for every number seen.'''
+        return True
+
+    @abstractmethod
+    def update(self, numbers: Iterable[Decimal]) -> 'Accumulator':
+        '''This function adds numbers to the accumulator and returns it.'''
+
+    @abstractmethod
+    def merge(self, other: 'Accumulator') -> 'Accumulator':
+        '''This function adds the numbers seen by another accumulator of the same kind and returns this one.'''
+
+    @abstractmethod
+    def result(self):
+        '''This function returns the statistic of the numbers seen so far.'''
+
+    def _check_merge(self, other: 'Accumulator'):
+        '''This function checks that another accumulator can be merged into this one.'''
+        if type(other) is not type(self):
+            raise TypeError(f"Cannot merge {type(other).__name__} into {type(self).__name__}")
+
+    def _check_empty(self):
+        '''This function checks that the accumulator saw numbers.'''
+        if self.count == 0:
+            raise ValueError(f"Cannot calculate the {self.operation.__name__} of an empty stream")
+
+    def to_calculation(self) -> StreamCalculation:
+        '''This function returns the history record of the current result.'''
+        return StreamCalculation(self.operation, self.result(), self.count, self.exact)
+
+class MeanAccumulator(Accumulator):
+    '''This class computes the mean of a stream with an exact running sum.'''
+    operation = mean
+
+    def __init__(self):
+        '''This function initializes the MeanAccumulator class.'''
+        super().__init__()
+        self.total = Decimal(0)
+
+    def update(self, numbers: Iterable[Decimal]) -> 'MeanAccumulator':
+        '''This function adds numbers to the running sum and count.'''
+        total, count = self.total, self.count
+        with localcontext(EXACT_CONTEXT):
+            for number in numbers:
+                total += number
+                count += 1
+        self.total, self.count = total, count
+        return self
+
+    def merge(self, other: 'MeanAccumulator') -> 'MeanAccumulator':
+        '''This function adds the sum and count of another accumulator.'''
+        self._check_merge(other)
+        with localcontext(EXACT_CONTEXT):
+            self.total += other.total
+        self.count += other.count
+        return self
+
+    def result(self) -> Decimal:
+        '''This function returns the mean of the numbers seen so far.'''
+        self._check_empty()
+        return self.total / self.count
+
+class ModeAccumulator(Accumulator):
+    '''
+    This class computes the mode of a stream by counting its numbers, in the order of their first occurrence.
+    With a capacity at most that many numbers are counted (Misra-Gries): once full, a new number decrements every count
+    instead, so counts become lower bounds and only numbers more frequent than 1/(capacity+1) of the stream are sure to
+    be kept.
+    '''
+    operation = mode
+
+    def __init__(self, capacity: int = None):
+        '''This function initializes the ModeAccumulator class.'''
+        super().__init__()
+        if capacity is not None and capacity < 1:
+            raise ValueError("The capacity must be positive")
+        self.capacity = capacity
+        self.counts: dict[Decimal, int] = {}
+        self._decremented = False
+
+    @property
+    def exact(self) -> bool:
+        '''Whether no count was decremented to make room.'''
+        return not self._decremented
+
+    def update(self, numbers: Iterable[Decimal]) -> 'ModeAccumulator':
+        '''This function counts numbers.'''
+        counts = self.counts
+        if self.capacity is None:
+            count = self.count
+            for number in numbers:
+                counts[number] = counts.get(number, 0) + 1
+                count += 1
+            self.count = count
+            return self
+        for number in numbers:
+            self.count += 1
+            if number in counts or len(counts) < self.capacity:
+                counts[number] = counts.get(number, 0) + 1
+                continue
+            self._decremented = True
+            self.counts = counts = {key: value - 1 for key, value in counts.items() if value > 1}
+        return self
+
+    def merge(self, other: 'ModeAccumulator') -> 'ModeAccumulator':
+        '''This function adds the counts of another accumulator, the numbers it saw first come after the ones of this one.'''
+        self._check_merge(other)
+        for number, count in other.counts.items():
+            self.counts[number] = self.counts.get(number, 0) + count
+        self.count += other.count
+        self._decremented = self._decremented or other._decremented
+        if self.capacity is not None and len(self.counts) > self.capacity:
+            # Subtracting the count of the first number that does not fit keeps the sketch guarantees (mergeable summaries).
+            excess = sorted(self.counts.values(), reverse=True)[self.capacity]
+            self.counts = {key: value - excess for key, value in self.counts.items() if value > excess}
+            self._decremented = True
+        return self
+
+    def result(self):
+        '''This function returns the most frequent number, or the list of the most frequent numbers when they are tied.'''
+        self._check_empty()
+        if not self.counts:
+            raise ValueError("No number of the stream is frequent enough to be counted, the capacity is too small")
+        return single_or_modes(most_frequent(self.counts))
+
+class MedianAccumulator(Accumulator):
+    '''
+    This class computes the median of a stream by keeping its numbers and selecting the median when asked for.
+    With a capacity the numbers are compacted once twice that many are kept: only the capacity numbers around the median
+    stay, the others are counted as below or above. Later numbers beyond those bounds are only counted. The median stays
+    exact as long as it falls among the kept numbers, otherwise the nearest kept number is returned and exact is False.
+    '''
+    operation = median
+
+    def __init__(self, capacity: int = None):
+        '''This function initializes the MedianAccumulator class.'''
+        super().__init__()
+        if capacity is not None and capacity < 2:
+            raise ValueError("The capacity must be at least 2")
+        self.capacity = capacity
+        self.values: list[Decimal] = []
+        self.below = 0
+        self.above = 0
+        # Every number counted below is at most lower, every number counted above at least upper.
+        self.lower = None
+        self.upper = None
+        # Set when merged windows did not overlap, the counts no longer tell where the median is.
+        self._lost = False
+
+    def _ranks(self) -> tuple[int, int]:
+        '''This function returns the ranks of the median among the kept numbers.'''
+        return (self.count - 1) // 2 - self.below, self.count // 2 - self.below
+
+    @property
+    def exact(self) -> bool:
+        '''Whether the median falls among the kept numbers.'''
+        low, high = self._ranks()
+        return not self._lost and low >= 0 and high < len(self.values)
+
+    def _keep(self, number) -> bool:
+        '''This function counts a number beyond the bounds, and tells whether it has to be kept otherwise.'''
+        if self.lower is not None and number < self.lower:
+            self.below += 1
+            return False
+        if self.upper is not None and number > self.upper:
+            self.above += 1
+            return False
+        return True
+
+    def update(self, numbers: Iterable[Decimal]) -> 'MedianAccumulator':
+        '''This function adds numbers to the accumulator.'''
+        if self.capacity is None:
+            start = len(self.values)
+            self.values.extend(numbers)
+            self.count += len(self.values) - start
+            return self
+        for number in numbers:
+            self.count += 1
+            if self._keep(number):
+                self.values.append(number)
+                if len(self.values) >= 2 * self.capacity:
+                    self._compact()
+        return self
+
+    def _compact(self):
+        '''This function keeps the capacity numbers around the median and counts the others as below or above.'''
+        self.values.sort()
+        low, _ = self._ranks()
+        start = min(max(low - self.capacity // 2, 0), len(self.values) - self.capacity)
+        stop = start + self.capacity
+        if start > 0:
+            self.below += start
+            self.lower = self.values[start]
+        if stop < len(self.values):
+            self.above += len(self.values) - stop
+            self.upper = self.values[stop - 1]
+        self.values = self.values[start:stop]
+
+    def merge(self, other: 'MedianAccumulator') -> 'MedianAccumulator':
+        '''This function adds the numbers and counts of another accumulator.'''
+        self._check_merge(other)
+        self.count += other.count
+        self.below += other.below
+        self.above += other.above
+        if other.lower is not None:
+            self.lower = other.lower if self.lower is None else max(self.lower, other.lower)
+        if other.upper is not None:
+            self.upper = other.upper if self.upper is None else min(self.upper, other.upper)
+        kept = self.values + other.values
+        self._lost = self._lost or other._lost
+        if self.lower is not None and self.upper is not None and self.lower > self.upper:
+            self._lost = True
+            self.values = kept
+        else:
+            # Numbers kept by one accumulator may be beyond the bounds of the other one.
+            self.values = [number for number in kept if self._keep(number)]
+        if self.capacity is not None and len(self.values) >= 2 * self.capacity:
+            self._compact()
+        return self
+
+    def result(self) -> Decimal:
+        '''This function returns the median of the numbers seen so far, or the nearest kept number when it was dropped.'''
+        self._check_empty()
+        low, high = self._ranks()
+        if low < 0:
+            return min(self.values)
+        if high >= len(self.values):
+            return max(self.values)
+        if low == high:
+            return selection.select(self.values, high)
+        lower, upper = selection.select_pair(self.values, high)
+        return (lower + upper) / 2
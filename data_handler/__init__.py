@@ -2,24 +2,50 @@
 import os  
 import logging
 import pandas as pd
+from calculator.batch import CalculationBatch
+from calculator.expression import ExpressionCalculation
 from calculator.statistic import CalculationStatistic
 from dotenv import load_dotenv
 from calculator.calculation import Calculation
 from calculator.operations import add, mean, median, mode, subtract, multiply, divide
-from decimal import Decimal
+from data_handler import columnar
+from data_handler.parsing import parse_decimal_list
+from data_handler.viewer import HistoryViewer
+
+logger = logging.getLogger(__name__)
+
+CSV_COLUMNS = ['num_1', 'num_2', 'operator']
 
 class DataHandler:
-    def __init__(self):
+    def __init__(self, chunk_size: int = None, folder_path: str = None, file_name: str = None):
         load_dotenv()
-        folder_path = os.environ.get('CALCULATOR_HISTORY_FOLDER_PATH')
-        file_name = os.environ.get('CALCULATOR_HISTORY_FILE_NAME')
+        # A session passes its own history file, see calculator.sessions.
+        folder_path = folder_path or os.environ.get('CALCULATOR_HISTORY_FOLDER_PATH')
+        file_name = file_name or os.environ.get('CALCULATOR_HISTORY_FILE_NAME')
         
         if not folder_path or not file_name:
             raise ValueError("Environment variables 'CALCULATOR_HISTORY_FOLDER_PATH' or 'CALCULATOR_HISTORY_FILE_NAME' are not set")
         
-        os.makedirs(folder_path, exist_ok=True)
+        self.folder_path = folder_path
         self.csv_filepath = os.path.join(folder_path, file_name)
-        self.csv_data = self.load_csv_data()
+        # 'csv' keeps the history in the CSV file, 'numpy' in a directory of binary columnar segments next to it.
+        self.history_format = os.environ.get('CALCULATOR_HISTORY_FORMAT', 'csv')
+        if self.history_format not in ('csv', 'numpy'):
+            raise ValueError(f"Unsupported history format: {self.history_format}")
+        self.columnar_path = os.path.join(folder_path, os.path.splitext(file_name)[0] + '.columnar')
+        self.history_filepath = self.columnar_path if self.history_format == 'numpy' else self.csv_filepath
+        # Number of rows read from the history file at a time, the file itself is only opened when rows are needed.
+        self.chunk_size = chunk_size or int(os.environ.get('CALCULATOR_HISTORY_CHUNK_SIZE', '10000'))
+        # In 'append' mode saves only write the new rows and deleted rows are recorded as tombstones,
+        # in 'rewrite' mode the whole file is written on every save.
+        self.write_mode = os.environ.get('CALCULATOR_HISTORY_WRITE_MODE', 'append')
+        if self.write_mode not in ('append', 'rewrite'):
+            raise ValueError(f"Unsupported history write mode: {self.write_mode}")
+        self.tombstone_filepath = self.history_filepath + '.tombstones'
+        self.compact_threshold = int(os.environ.get('CALCULATOR_HISTORY_COMPACT_THRESHOLD', '1000'))
+        # In append mode the in-memory CSV data only holds the rows that are not saved yet.
+        self._csv_data = [] if self.write_mode == 'append' else None
+        self._viewer = None
         self.operations = {
             'add': add,
             'subtract': subtract,
@@ -31,84 +57,263 @@ class DataHandler:
         }
         self.statistic_operations = ['mean', 'median','mode']
 
+    @property
+    def csv_data(self) -> list[dict]:
+        '''The in-memory CSV data, read from the file the first time it is used.'''
+        if self._csv_data is None:
+            self._csv_data = self.load_csv_data()
+        return self._csv_data
+
+    @csv_data.setter
+    def csv_data(self, data: list[dict]):
+        self._csv_data = data
+
+    @property
+    def viewer(self) -> HistoryViewer:
+        '''The memory-mapped, read-only view of the CSV history file, created the first time it is used.'''
+        if self.history_format != 'csv':
+            raise ValueError("The history viewer only supports the CSV history format")
+        if self._viewer is None:
+            self._viewer = HistoryViewer(self.csv_filepath, self.tombstone_filepath)
+        return self._viewer
+
+    def iter_history_page(self, page: int, size: int):
+        '''Yield (position, calculation) pairs of a page of the saved history, only the rows of that page are parsed.'''
+        if page < 1 or size < 1:
+            raise ValueError("Page and page size must be positive")
+        if not os.path.exists(self.csv_filepath):
+            logger.warning('CSV file not found')
+            return
+        for position, row in self.viewer.page(page, size):
+            yield position, self.row_to_calculation(row)
+
+    def iter_indexed_csv_rows(self, chunk_size: int = None):
+        '''Yield (row number, row) pairs of the history, reading chunk_size rows into memory at a time and skipping deleted rows.'''
+        if self.history_format == 'numpy':
+            yield from columnar.iter_indexed_rows(self.columnar_path, self.load_tombstones())
+            return
+        yield from self.iter_indexed_csv_file_rows(chunk_size, self.load_tombstones())
+
+    def iter_indexed_csv_file_rows(self, chunk_size: int = None, tombstones: set[int] = frozenset()):
+        '''Yield (row number, row) pairs of the CSV file, whatever the history format is.'''
+        if not os.path.exists(self.csv_filepath):
+            logger.warning('CSV file not found')
+            return
+        row_number = 0
+        try:
+            # Do not force numeric conversion so that list data remain intact
+            for chunk in pd.read_csv(self.csv_filepath, chunksize=chunk_size or self.chunk_size):
+                for row in chunk.to_dict(orient='records'):
+                    if row_number not in tombstones:
+                        yield row_number, row
+                    row_number += 1
+        except Exception as e:
+            logger.error("Error reading CSV file: %s", e)
+
+    def iter_csv_rows(self, chunk_size: int = None):
+        '''Yield the rows of the CSV file one by one, reading chunk_size rows into memory at a time.'''
+        for _, row in self.iter_indexed_csv_rows(chunk_size):
+            yield row
+
     def load_csv_data(self) -> list[dict]:
         '''Load CSV data from the file system.'''
-        if os.path.exists(self.csv_filepath):
-            try:
-                df = pd.read_csv(self.csv_filepath)
-                # Do not force numeric conversion so that list data remain intact
-                data = df.to_dict(orient='records')
-                return data
-            except Exception as e:
-                logging.error(f"Error reading CSV file: {e}")
-                return []
-        else:
-            logging.warning('CSV file not found')
-            return []
+        return list(self.iter_csv_rows())
 
-    def add_to_csv(self, calculation):
-        '''Add a calculation to the CSV data.'''
-        # If calculation.a is a list (as in CalculationStatistic), convert it to a string representation.
-        if isinstance(calculation.a, list):
+    def calculation_to_row(self, calculation, statistic_as_list: bool = None) -> dict:
+        '''Convert a calculation to a row of the CSV data.'''
+        if statistic_as_list is None:
+            statistic_as_list = self.history_format == 'numpy'
+        # If calculation.a is a list (as in CalculationStatistic), convert it to a string representation,
+        # the columnar format stores the list itself.
+        if isinstance(calculation.a, list) and not statistic_as_list:
             num_1_val = repr(calculation.a)
         else:
             num_1_val = calculation.a
-
-        to_add_data = {
+        return {
             'num_1': num_1_val,
             'num_2': calculation.b,
             'operator': calculation.operation.__name__,
         }
+
+    def add_to_csv(self, calculation):
+        '''Add a calculation to the CSV data.'''
+        # A batch is stored as one row per element so that it loads back as plain calculations.
+        if isinstance(calculation, CalculationBatch):
+            operator = calculation.operation.__name__
+            self.csv_data.extend({'num_1': a, 'num_2': b, 'operator': operator} for a, b in calculation.pairs())
+            return
         # Append new row to the list
-        self.csv_data.append(to_add_data)
+        self.csv_data.append(self.calculation_to_row(calculation))
 
-    def save_csv_data(self):
-        '''Save the CSV data to the file system using pandas.'''
+    def save_csv_data(self) -> bool:
+        '''Save the CSV data to the file system using pandas, return whether it was saved.'''
         try:
-            df = pd.DataFrame(self.csv_data)
-            df.to_csv(self.csv_filepath, index=False)
-            logging.info(f"Data saved to {self.csv_filepath}")
+            os.makedirs(self.folder_path, exist_ok=True)
+            if self.write_mode == 'append':
+                self.append_csv_rows(self.csv_data)
+                self.csv_data = []
+            elif self.history_format == 'numpy':
+                columnar.remove_segments(self.columnar_path)
+                columnar.write_rows(self.columnar_path, self.csv_data, self.chunk_size)
+                self.remove_tombstones()
+            else:
+                df = pd.DataFrame(self.csv_data)
+                df.to_csv(self.csv_filepath, index=False)
+                # The rewritten file no longer contains the deleted rows.
+                self.remove_tombstones()
+            # Every save is reported by the command that saves, the file is only worth logging when debugging.
+            logger.debug("Data saved to %s", self.history_filepath)
+            return True
         except Exception as e:
-            logging.error(f"Error saving data to CSV: {e}")
+            logger.error("Error saving data to CSV: %s", e)
+            return False
+
+    def append_csv_rows(self, rows: list[dict]):
+        '''Append rows to the end of the CSV file with a single write and fsync.'''
+        if self.history_format == 'numpy':
+            if rows:
+                columnar.write_segment(self.columnar_path, rows)
+            return
+        write_header = not os.path.exists(self.csv_filepath) or os.path.getsize(self.csv_filepath) == 0
+        df = pd.DataFrame(rows, columns=CSV_COLUMNS)
+        with open(self.csv_filepath, 'a', newline='') as file:
+            df.to_csv(file, index=False, header=write_header)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def load_tombstones(self, tombstone_filepath: str = None) -> set[int]:
+        '''Load the row numbers of the deleted rows of the history.'''
+        tombstone_filepath = tombstone_filepath or self.tombstone_filepath
+        if not os.path.exists(tombstone_filepath):
+            return set()
+        with open(tombstone_filepath) as file:
+            return {int(line) for line in file if line.strip()}
+
+    def add_tombstones(self, row_numbers):
+        '''Mark rows of the CSV file as deleted, compacting the file once enough rows are deleted.'''
+        row_numbers = sorted(set(row_numbers))
+        if not row_numbers:
+            return
+        os.makedirs(self.folder_path, exist_ok=True)
+        with open(self.tombstone_filepath, 'a') as file:
+            file.writelines(f"{row_number}\n" for row_number in row_numbers)
+            file.flush()
+            os.fsync(file.fileno())
+        logger.info("%s rows marked as deleted in %s", len(row_numbers), self.history_filepath)
+        if len(self.load_tombstones()) >= self.compact_threshold:
+            self.compact()
+
+    def remove_tombstones(self):
+        '''Forget every deleted row marker.'''
+        if os.path.exists(self.tombstone_filepath):
+            os.remove(self.tombstone_filepath)
+
+    def compact(self):
+        '''
+        Rewrite the CSV file without its deleted rows, streaming it chunk by chunk, and drop the tombstones.
+        Row numbers of the remaining rows change, so this only runs while saving, right before the history is cleared.
+        '''
+        tombstones = self.load_tombstones()
+        if not tombstones or not os.path.exists(self.history_filepath):
+            self.remove_tombstones()
+            return
+        if self.history_format == 'numpy':
+            columnar.compact(self.columnar_path, tombstones, self.chunk_size)
+            self.remove_tombstones()
+            logger.info("Compacted %s, %s deleted rows removed", self.columnar_path, len(tombstones))
+            return
+        compact_filepath = self.csv_filepath + '.compact'
+        row_number = 0
+        with open(compact_filepath, 'w', newline='') as file:
+            # Keep the values as text so that they are written back exactly as they were read.
+            for index, chunk in enumerate(pd.read_csv(self.csv_filepath, chunksize=self.chunk_size, dtype=str, keep_default_na=False)):
+                keep = [number not in tombstones for number in range(row_number, row_number + len(chunk))]
+                chunk[keep].to_csv(file, index=False, header=index == 0)
+                row_number += len(chunk)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(compact_filepath, self.csv_filepath)
+        self.remove_tombstones()
+        logger.info("Compacted %s, %s deleted rows removed", self.csv_filepath, len(tombstones))
 
     def clear_csv_data(self):
         '''Clear all CSV data.'''
         self.csv_data = []
-        logging.info("CSV data cleared.")
+        logger.info("CSV data cleared.")
 
     def get_csv_data(self) -> list[dict]:
         '''Return the current CSV data.'''
         return self.csv_data
 
+    def row_to_calculation(self, row: dict):
+        '''Convert a single CSV row to a Calculation or CalculationStatistic object.'''
+        operator = row['operator']
+        # An expression is stored with its source in num_1 and compiled again.
+        if operator == 'evaluate':
+            return ExpressionCalculation(str(row['num_1']))
+        if operator in self.statistic_operations:
+            # For statistic operations, num_1 is stored as a string representation of a list of Decimals,
+            # the columnar format already gives back the list.
+            if isinstance(row['num_1'], list):
+                return CalculationStatistic(row['num_1'], self.operations[operator])
+            try:
+                a_val = parse_decimal_list(row['num_1'])
+            except ValueError as e:
+                logger.error("Error converting num_1 to list of Decimals: %s", e)
+                a_val = row['num_1']
+            return CalculationStatistic(a_val, self.operations[operator])
+        # For normal calculations, try to convert num_1 and num_2 to float.
+        try:
+            a_val = float(row['num_1'])
+        except Exception:
+            a_val = row['num_1']
+        try:
+            b_val = float(row['num_2'])
+        except Exception:
+            b_val = row['num_2']
+        return Calculation(a_val, b_val, self.operations[operator])
+
+    def iter_indexed_calculations(self, chunk_size: int = None):
+        '''
+        Yield (row number, calculation) pairs for the CSV data, streaming from the file unless it is already in memory.
+        The row number is None for rows that are not saved in append mode yet, and always None in rewrite mode.
+        '''
+        if self.write_mode == 'append':
+            for row_number, row in self.iter_indexed_csv_rows(chunk_size):
+                yield row_number, self.row_to_calculation(row)
+            rows = self.csv_data
+        else:
+            rows = self.iter_csv_rows(chunk_size) if self._csv_data is None else self._csv_data
+        for row in rows:
+            yield None, self.row_to_calculation(row)
+
+    def iter_calculations(self, chunk_size: int = None):
+        '''Yield the CSV data as Calculation objects, streaming from the file unless it is already in memory.'''
+        for _, calculation in self.iter_indexed_calculations(chunk_size):
+            yield calculation
+
     def convert_to_calculation(self) -> list:
         '''Convert the CSV data to a list of Calculation objects.'''
-        calculations = []
-        for row in self.csv_data:
-            operator = row['operator']
-            if operator in self.statistic_operations:
-                # For statistic operations, num_1 is stored as a string representation of a list of Decimals.
-                try:
-                    # Evaluate the string in a safe environment that only permits the Decimal constructor.
-                    a_val = eval(row['num_1'], {"__builtins__": {}}, {"Decimal": Decimal})
-                except Exception as e:
-                    logging.error(f"Error converting num_1 to list of Decimals: {e}")
-                    a_val = row['num_1']
-                calculations.append(CalculationStatistic(a_val, self.operations[operator]))
-            else:
-                # For normal calculations, try to convert num_1 and num_2 to float.
-                try:
-                    a_val = float(row['num_1'])
-                except Exception:
-                    a_val = row['num_1']
-                try:
-                    b_val = float(row['num_2'])
-                except Exception:
-                    b_val = row['num_2']
-                calculations.append(Calculation(a_val, b_val, self.operations[operator]))
-        return calculations
+        return list(self.iter_calculations())
 
     def delete_csv_file_data(self):
         '''Clear all CSV data.'''
         self.csv_data = []
+        self.remove_tombstones()
+        if self.history_format == 'numpy':
+            columnar.remove_segments(self.columnar_path)
+        elif self.write_mode == 'append' and os.path.exists(self.csv_filepath):
+            # Truncate instead of rewriting, the header is written again by the next append.
+            open(self.csv_filepath, 'w').close()
         self.save_csv_data()
-        logging.info("CSV data cleared.")
+        logger.info("CSV data cleared.")
+
+    def convert_csv_to_columnar(self) -> int:
+        '''Convert the CSV history file into the binary columnar format, replacing any existing segments.'''
+        tombstones = self.load_tombstones(self.csv_filepath + '.tombstones')
+        rows = (self.calculation_to_row(self.row_to_calculation(row), statistic_as_list=True)
+                for _, row in self.iter_indexed_csv_file_rows(self.chunk_size, tombstones))
+        columnar.remove_segments(self.columnar_path)
+        count = columnar.write_rows(self.columnar_path, rows, self.chunk_size)
+        logger.info("Converted %s rows of %s to %s", count, self.csv_filepath, self.columnar_path)
+        return count
@@ -0,0 +1,122 @@
+'''
+This module contains the binary columnar history format.
+The history is a directory of NumPy .npz segments, every save appends a new segment. A segment holds
+  - operators: the operator dictionary of the segment
+  - operator: the index of every row's operator in the dictionary
+  - num_1, num_2: fixed width float64 operand columns (NaN for statistic rows)
+  - values, offsets: a ragged list column with the Decimal inputs of statistic rows,
+    row i owns values[offsets[i]:offsets[i + 1]]
+  - is_list: whether the row's num_1 is a list of Decimals
+  - texts: the num_1 of rows whose operand is a text that is not a number, such as the source of an expression,
+    and an empty string for the other rows (segments written before it have no texts column)
+'''
+import os
+import shutil
+from decimal import Decimal
+import numpy as np
+
+SEGMENT_PREFIX = 'segment-'
+SEGMENT_SUFFIX = '.npz'
+
+def segment_paths(directory: str) -> list[str]:
+    '''Return the paths of the segments of the history directory, in the order they were written.'''
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory) if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX))
+    return [os.path.join(directory, name) for name in names]
+
+def _to_float(value) -> float:
+    '''Convert an operand to float64, values that are not numbers become NaN.'''
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _to_text(value) -> str:
+    '''Return an operand that is a text and not a number, or an empty string.'''
+    return value if isinstance(value, str) and np.isnan(_to_float(value)) else ''
+
+def rows_to_columns(rows: list[dict]) -> dict[str, np.ndarray]:
+    '''Convert row dictionaries into the columns of a segment.'''
+    operators = sorted({row['operator'] for row in rows})
+    codes = {operator: code for code, operator in enumerate(operators)}
+    is_list = [isinstance(row['num_1'], list) for row in rows]
+    values = [str(value) for row, listed in zip(rows, is_list) if listed for value in row['num_1']]
+    lengths = [len(row['num_1']) if listed else 0 for row, listed in zip(rows, is_list)]
+    return {
+        'operators': np.array(operators, dtype=str),
+        'operator': np.array([codes[row['operator']] for row in rows], dtype=np.uint16),
+        'num_1': np.array([np.nan if listed else _to_float(row['num_1']) for row, listed in zip(rows, is_list)], dtype=np.float64),
+        'num_2': np.array([_to_float(row['num_2']) for row in rows], dtype=np.float64),
+        'values': np.array(values, dtype=str),
+        'offsets': np.concatenate(([0], np.cumsum(lengths, dtype=np.int64))),
+        'is_list': np.array(is_list, dtype=bool),
+        'texts': np.array([_to_text(row['num_1']) for row in rows], dtype=str),
+    }
+
+def iter_segment_rows(path: str):
+    '''Yield the row dictionaries of a single segment.'''
+    with np.load(path, allow_pickle=False) as segment:
+        operators = segment['operators'].tolist()
+        values = segment['values'].tolist()
+        offsets = segment['offsets'].tolist()
+        columns = zip(segment['operator'].tolist(), segment['num_1'].tolist(), segment['num_2'].tolist(), segment['is_list'].tolist())
+        texts = segment['texts'].tolist() if 'texts' in segment.files else None
+        for index, (code, num_1, num_2, is_list) in enumerate(columns):
+            if is_list:
+                num_1 = [Decimal(value) for value in values[offsets[index]:offsets[index + 1]]]
+            elif texts and texts[index]:
+                num_1 = texts[index]
+            yield {'num_1': num_1, 'num_2': num_2, 'operator': operators[code]}
+
+def iter_indexed_rows(directory: str, tombstones: set[int] = frozenset()):
+    '''Yield (row number, row) pairs of every segment, skipping deleted rows.'''
+    row_number = 0
+    for path in segment_paths(directory):
+        for row in iter_segment_rows(path):
+            if row_number not in tombstones:
+                yield row_number, row
+            row_number += 1
+
+def write_segment(directory: str, rows: list[dict]) -> str:
+    '''Write rows as a new segment at the end of the history directory.'''
+    os.makedirs(directory, exist_ok=True)
+    paths = segment_paths(directory)
+    number = int(os.path.basename(paths[-1])[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) + 1 if paths else 0
+    path = os.path.join(directory, f"{SEGMENT_PREFIX}{number:08d}{SEGMENT_SUFFIX}")
+    with open(path, 'wb') as file:
+        np.savez(file, **rows_to_columns(rows))
+        file.flush()
+        os.fsync(file.fileno())
+    return path
+
+def remove_segments(directory: str):
+    '''Remove every segment of the history directory.'''
+    for path in segment_paths(directory):
+        os.remove(path)
+
+def compact(directory: str, tombstones: set[int], chunk_size: int):
+    '''Rewrite the segments without the deleted rows, streaming them into a new directory that replaces the old one.'''
+    compact_directory = directory + '.compact'
+    shutil.rmtree(compact_directory, ignore_errors=True)
+    os.makedirs(compact_directory)
+    write_rows(compact_directory, (row for _, row in iter_indexed_rows(directory, tombstones)), chunk_size)
+    old_directory = directory + '.old'
+    os.replace(directory, old_directory)
+    os.replace(compact_directory, directory)
+    shutil.rmtree(old_directory)
+
+def write_rows(directory: str, rows, chunk_size: int) -> int:
+    '''Write an iterable of rows at the end of the history directory, one segment per chunk_size rows.'''
+    chunk = []
+    count = 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            write_segment(directory, chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        write_segment(directory, chunk)
+        count += len(chunk)
+    return count
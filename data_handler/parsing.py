@@ -0,0 +1,42 @@
+'''
+This module contains the parser for the serialized operand lists of statistic rows.
+Lists are written as the repr of a list of Decimals, for example "[Decimal('1'), Decimal('2.5')]",
+plain numbers such as "[1, 2.5]" are accepted as well. Nothing is evaluated, every item goes through the Decimal constructor.
+'''
+import re
+from decimal import Decimal, InvalidOperation
+
+DECIMAL_PREFIX = 'Decimal('
+# The exact format written by repr(), matched and split by the regular expression engine in one pass.
+REPR_LIST = re.compile(r"\[\s*(?:Decimal\('[^']*'\)\s*(?:,\s*Decimal\('[^']*'\)\s*)*)?\]")
+REPR_ITEM = re.compile(r"Decimal\('([^']*)'\)")
+
+def _parse_item(item: str) -> Decimal:
+    '''Parse a single list item into a Decimal.'''
+    item = item.strip()
+    if item.startswith(DECIMAL_PREFIX) and item.endswith(')'):
+        item = item[len(DECIMAL_PREFIX):-1].strip()
+        if len(item) < 2 or item[0] != item[-1] or item[0] not in '\'"':
+            raise ValueError(f"Invalid Decimal literal: {item!r}")
+        item = item[1:-1]
+    try:
+        return Decimal(item)
+    except InvalidOperation as e:
+        raise ValueError(f"Invalid number in list: {item!r}") from e
+
+def parse_decimal_list(text: str) -> list[Decimal]:
+    '''Parse a serialized list of Decimals without evaluating it.'''
+    if not isinstance(text, str):
+        raise ValueError(f"Expected a serialized list, got {type(text).__name__}")
+    text = text.strip()
+    if REPR_LIST.fullmatch(text):
+        try:
+            return list(map(Decimal, REPR_ITEM.findall(text)))
+        except InvalidOperation as e:
+            raise ValueError(f"Invalid number in list: {text!r}") from e
+    if len(text) < 2 or text[0] != '[' or text[-1] != ']':
+        raise ValueError(f"Not a list of Decimals: {text!r}")
+    body = text[1:-1]
+    if not body.strip():
+        return []
+    return [_parse_item(item) for item in body.split(',')]
@@ -0,0 +1,158 @@
+'''
+This module contains the HistoryViewer class, a read-only paged view of the CSV history file.
+The file is memory-mapped and the byte offset of every line is indexed once, the index is kept next to the
+CSV file (<file>.idx) so reopening is instant. A page only decodes and parses the lines inside its window.
+Because the history is append-only, a grown file only has its new lines indexed.
+'''
+import csv
+import mmap
+import os
+import numpy as np
+
+INDEX_MAGIC = 0x31584449434c4143  # b'CALCIDX1'
+HEADER_FIELDS = 6  # magic, csv size, csv mtime, tombstones size, tombstones mtime, number of lines
+SCAN_WINDOW = 64 * 1024 * 1024
+
+def _stat(path: str) -> tuple[int, int]:
+    '''Return the size and modification time of a file, zeros when it does not exist.'''
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return 0, 0
+    return stat.st_size, stat.st_mtime_ns
+
+def _line_starts(buffer, start: int, end: int) -> np.ndarray:
+    '''Return the offsets right after every newline between start and end, scanning in fixed size windows.'''
+    starts = []
+    for window in range(start, end, SCAN_WINDOW):
+        chunk = np.frombuffer(buffer, dtype=np.uint8, count=min(SCAN_WINDOW, end - window), offset=window)
+        starts.append(np.flatnonzero(chunk == ord('\n')).astype(np.uint64) + np.uint64(window + 1))
+    return np.concatenate(starts) if starts else np.empty(0, dtype=np.uint64)
+
+class HistoryViewer:
+    '''This class pages through the saved CSV history without loading it.'''
+    def __init__(self, csv_filepath: str, tombstone_filepath: str = None):
+        '''This function initializes the HistoryViewer class.'''
+        self.csv_filepath = csv_filepath
+        self.tombstone_filepath = tombstone_filepath or csv_filepath + '.tombstones'
+        self.index_filepath = csv_filepath + '.idx'
+        self.columns: list[str] = []
+        # Offset of the first byte of every data line, followed by the end of the last line.
+        self.starts = np.empty(1, dtype=np.uint64)
+        # Line numbers that are not deleted, None when no line is deleted.
+        self.visible = None
+        self._signature = None
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self.starts) - 1 if self.visible is None else len(self.visible)
+
+    def _read_header(self, buffer) -> int:
+        '''Read the column names and return the offset of the first data line.'''
+        end = buffer.find(b'\n')
+        end = len(buffer) if end == -1 else end
+        self.columns = next(csv.reader([buffer[:end].decode()]))
+        return min(end + 1, len(buffer))
+
+    def _load_index(self, signature: tuple) -> bool:
+        '''Load the persisted index, returns False when it is missing or does not match the CSV file.'''
+        try:
+            index = np.load(self.index_filepath, mmap_mode='r', allow_pickle=False)
+        except (OSError, ValueError):
+            return False
+        if len(index) < HEADER_FIELDS or int(index[0]) != INDEX_MAGIC:
+            return False
+        stored = tuple(int(value) for value in index[1:5])
+        lines = int(index[5])
+        starts = index[HEADER_FIELDS:HEADER_FIELDS + lines + 1]
+        visible = index[HEADER_FIELDS + lines + 1:] if signature[2] else None
+        if stored == signature:
+            self.starts, self.visible = starts, visible
+            return True
+        # The file only grew and the deleted rows did not change: keep the index and scan the new bytes only.
+        if stored[2:] == signature[2:] and signature[0] > stored[0] > 0:
+            return self._extend(np.array(starts), None if visible is None else np.array(visible), signature)
+        return False
+
+    def _extend(self, starts: np.ndarray, visible: np.ndarray, signature: tuple) -> bool:
+        '''Index the lines appended after the end of an existing index.'''
+        indexed_size = int(starts[-1])
+        with open(self.csv_filepath, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            # A last line without a newline may have been completed by the append, the index is rebuilt then.
+            if buffer[indexed_size - 1:indexed_size] != b'\n':
+                return False
+            self._read_header(buffer)
+            new_starts = _line_starts(buffer, indexed_size, len(buffer))
+        self.starts = self._with_end(np.concatenate((starts, new_starts)), signature[0])
+        self.visible = visible
+        if visible is not None:
+            self.visible = np.concatenate((visible, np.arange(len(starts) - 1, len(self.starts) - 1, dtype=np.uint64)))
+        self._save_index(signature)
+        return True
+
+    @staticmethod
+    def _with_end(starts: np.ndarray, size: int) -> np.ndarray:
+        '''Make sure the offsets end with the end of the file, whether or not it ends with a newline.'''
+        starts = starts.astype(np.uint64)
+        if len(starts) == 0 or int(starts[-1]) != size:
+            starts = np.append(starts, np.uint64(size))
+        return starts
+
+    def _build_index(self, signature: tuple):
+        '''Scan the whole CSV file for line offsets.'''
+        size = signature[0]
+        if size == 0:
+            self.starts, self.visible, self.columns = np.zeros(1, dtype=np.uint64), None, []
+            return
+        with open(self.csv_filepath, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            first = self._read_header(buffer)
+            starts = _line_starts(buffer, first, len(buffer))
+        self.starts = self._with_end(np.concatenate((np.array([first], dtype=np.uint64), starts)), size)
+        self.visible = None
+        if signature[2]:
+            with open(self.tombstone_filepath) as file:
+                deleted = np.array([int(line) for line in file if line.strip()], dtype=np.uint64)
+            self.visible = np.setdiff1d(np.arange(len(self.starts) - 1, dtype=np.uint64), deleted)
+        self._save_index(signature)
+
+    def _save_index(self, signature: tuple):
+        '''Persist the index next to the CSV file, a failure only costs a rebuild next time.'''
+        lines = len(self.starts) - 1
+        visible = self.visible if self.visible is not None else np.empty(0, dtype=np.uint64)
+        header = np.array([INDEX_MAGIC, *signature, lines], dtype=np.uint64)
+        index = np.concatenate((header, self.starts, visible))
+        temporary = self.index_filepath + '.tmp'
+        try:
+            with open(temporary, 'wb') as file:
+                np.save(file, index, allow_pickle=False)
+            os.replace(temporary, self.index_filepath)
+        except OSError:
+            pass
+
+    def refresh(self):
+        '''Make sure the index matches the current CSV and tombstone files.'''
+        signature = (*_stat(self.csv_filepath), *_stat(self.tombstone_filepath))
+        if signature == self._signature:
+            return
+        if not self._load_index(signature):
+            self._build_index(signature)
+        if not self.columns and signature[0]:
+            with open(self.csv_filepath, 'rb') as file:
+                self.columns = next(csv.reader([file.readline().decode()]))
+        self._signature = signature
+
+    def page(self, page: int, size: int = 100) -> list[tuple[int, dict]]:
+        '''Return the (row number, row) pairs of a 1-based page, parsing only the lines of that page.'''
+        if page < 1 or size < 1:
+            raise ValueError("Page and page size must be positive")
+        self.refresh()
+        first = (page - 1) * size
+        lines = self.visible[first:first + size] if self.visible is not None else range(first, min(first + size, len(self.starts) - 1))
+        if len(lines) == 0:
+            return []
+        rows = []
+        with open(self.csv_filepath, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for position, line in enumerate(lines, start=first):
+                text = buffer[int(self.starts[line]):int(self.starts[int(line) + 1])].decode().rstrip('\r\n')
+                rows.append((position, dict(zip(self.columns, next(csv.reader([text]))))))
+        return rows
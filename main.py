@@ -1,4 +1,29 @@
+import argparse # pragma: no cover
+import sys # pragma: no cover
 from app import App # pragma: no cover
 
 if __name__ == '__main__': # pragma: no cover
-    APP = App().start()
+    parser = argparse.ArgumentParser(description='Advanced Python calculator')
+    parser.add_argument('--completion', choices=['json', 'bash'], help='print the registered commands for shell completion and exit')
+    parser.add_argument('--batch', metavar='SCRIPT', help="run the commands of a script file ('-' for stdin) without prompting, for example 'add 1 2' or 'mean 1,2,3'")
+    parser.add_argument('--output', metavar='FILE', help='write the batch results to a file instead of stdout')
+    parser.add_argument('--session', help='record into the history of this session, saved to its own history file')
+    parser.add_argument('--serve', action='store_true', help='serve the calculator over HTTP/JSON on localhost')
+    parser.add_argument('--host', default='127.0.0.1', help='the loopback address the server listens on')
+    parser.add_argument('--port', type=int, default=8000, help='the port the server listens on')
+    parser.add_argument('--workers', type=int, default=4, help='the size of the pool evaluating statistic operations')
+    parser.add_argument('--executor', choices=['thread', 'process'], default='thread', help='the kind of pool evaluating statistic operations')
+    parser.add_argument('--metrics-port', type=int, help='serve the metrics of the commands in the Prometheus format on localhost at /metrics')
+    options = parser.parse_args()
+    APP = App()
+    if options.metrics_port is not None:
+        APP.serve_metrics(options.metrics_port, options.host)
+    if options.completion:
+        APP.load_plugins()
+        print(APP.command_handler.dump(options.completion))
+    elif options.batch:
+        sys.exit(APP.run_batch(options.batch, options.output, options.session))
+    elif options.serve:
+        APP.serve(options.host, options.port, options.workers, options.executor)
+    else:
+        APP.start(options.session)
@@ -1,8 +1,9 @@
 # pylint: disable=line-too-long, comparison-with-callable
 '''This document contains the Calculation class, which represents an arithmetic operation on two numbers.'''
-# import pytest
 from decimal import Decimal
+import pytest
 from faker import Faker
+from app.log_pipeline import stop_logging
 from calculator.operations import add, subtract, multiply, divide
 
 fake = Faker()
@@ -27,6 +28,12 @@ def generate_test_data(num_records):
         expected = operation_func(a, b)
         yield a, b, operation_name, operation_func, expected
 
+@pytest.hookimpl(hookwrapper=True, trylast=True)
+def pytest_runtest_call():
+    '''Write the queued log records when the test returns, while its output, capsys included, is still captured'''
+    yield
+    stop_logging()
+
 def pytest_addoption(parser):
     '''Add option to generate test data'''
     parser.addoption(
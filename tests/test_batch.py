@@ -0,0 +1,88 @@
+# pylint: disable=line-too-long
+'''Tests for the vectorized batch evaluation.'''
+from decimal import Decimal
+import numpy as np
+import pytest
+
+from calculator import Calculator
+from calculator.batch import BatchResult, CalculationBatch, evaluate, resolve_operation
+from calculator.calculations import Calculations
+from calculator.operations import add, divide, mean
+
+
+def test_batch_float_path():
+    """Test that the float64 path evaluates every pair in one call."""
+    result = evaluate('multiply', [1, 2, 3], np.array([4.0, 5.0, 6.0]))
+    assert result.values.dtype == np.float64
+    assert result.values.tolist() == [4.0, 10.0, 18.0]
+    assert result.error_count == 0
+
+
+def test_batch_exact_path():
+    """Test that the exact path keeps Decimal results."""
+    result = evaluate(add, [Decimal('0.1'), 0.2], [Decimal('0.2'), Decimal('0.1')], exact=True)
+    assert result.values.tolist() == [Decimal('0.3'), Decimal('0.3')]
+
+
+def test_batch_broadcasts_scalar():
+    """Test that a scalar operand is broadcast over the array."""
+    result = evaluate('subtract', [10, 20, 30], 5)
+    assert result.values.tolist() == [5.0, 15.0, 25.0]
+
+
+@pytest.mark.parametrize('exact', [False, True])
+def test_batch_divide_by_zero_mask(exact):
+    """Test that division by zero is reported per element instead of raising."""
+    result = evaluate(divide, [1, 2, 3], [1, 0, 2], exact=exact)
+    assert result.zero_division.tolist() == [False, True, False]
+    assert result.valid.tolist() == [True, False, True]
+    assert result.error_count == 1
+    assert result.values[0] == 1 and result.values[2] == Decimal('1.5')
+    assert result.values[1] != result.values[1]  # NaN
+
+
+def test_resolve_operation_unsupported():
+    """Test that only the binary arithmetic operations can be batched."""
+    with pytest.raises(ValueError, match="Unsupported batch operation: power"):
+        resolve_operation('power')
+    with pytest.raises(ValueError, match="Unsupported batch operation: mean"):
+        resolve_operation(mean)
+
+
+def test_calculator_batch_records_single_entry():
+    """Test that Calculator.batch adds one compact record to the history."""
+    Calculations.clear_history()
+    result = Calculator.batch('add', np.arange(1000), np.arange(1000))
+    assert isinstance(result, BatchResult)
+    assert len(result) == 1000
+    history = Calculations.get_history()
+    assert len(history) == 1
+    assert isinstance(history[0], CalculationBatch)
+    assert repr(history[0]) == "CalculationBatch(1000 rows, add)"
+    Calculations.clear_history()
+
+
+def test_mismatched_batch_is_not_recorded():
+    """Test that operands that do not broadcast together raise before the batch is added to the history."""
+    Calculations.clear_history()
+    Calculator.add(Decimal('1'), Decimal('2'))
+    with pytest.raises(ValueError, match=r"The operands of a batch do not match: shapes \(3,\) and \(2,\)"):
+        Calculator.batch('add', [1, 2, 3], [1, 2])
+    assert len(Calculations.get_history()) == 1
+    Calculations.clear_history()
+
+
+def test_batch_copies_operands():
+    """Test that changing the arrays of the caller after the batch does not change the recorded batch."""
+    Calculations.clear_history()
+    a = np.array([1.0, 2.0])
+    Calculator.batch('multiply', a, 3)
+    a[0] = 10.0
+    assert list(Calculations.get_latest().pairs()) == [(1.0, 3.0), (2.0, 3.0)]
+    Calculations.clear_history()
+
+
+def test_calculation_batch_pairs():
+    """Test that a batch can be expanded back to operand pairs."""
+    batch = CalculationBatch.create([Decimal('1'), Decimal('2')], Decimal('3'), 'add', exact=True)
+    assert list(batch.pairs()) == [(Decimal('1'), Decimal('3')), (Decimal('2'), Decimal('3'))]
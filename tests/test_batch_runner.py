@@ -0,0 +1,120 @@
+# pylint: disable=line-too-long
+'''Tests for the non-interactive batch mode of the app.'''
+import io
+import logging
+from decimal import Decimal
+import pytest
+
+from app import App
+from app.batch import BatchRunner
+from app.commands import Command, CommandResult
+from calculator import Calculator
+from calculator.calculations import Calculations
+
+
+class EchoCommand(Command):
+    """A command with an argument, overriding execute() without its args."""
+    arguments = ({'name': 'word', 'type': 'str', 'prompt': 'Word: '},)
+
+    def execute(self): # pylint: disable=arguments-differ
+        print('echo')
+
+    def run(self, word):
+        return CommandResult(word, word)
+
+
+@pytest.fixture
+def runner():
+    """A batch runner over every plugin, writing to memory, with a clean history."""
+    app = App()
+    app.load_plugins()
+    Calculator.clear_history()
+    yield BatchRunner(app.command_handler, io.StringIO(), io.StringIO())
+    Calculator.clear_history()
+
+
+def test_parse(runner):
+    """Test that lines are parsed with the argument schemas of the registry."""
+    assert runner.parse('add 1 2.5') == ('add', {'a': Decimal('1'), 'b': Decimal('2.5')})
+    assert runner.parse('mean 1, 2,3') == ('mean', {'numbers': [Decimal('1'), Decimal('2'), Decimal('3')]})
+    assert runner.parse('view_history 2 10') == ('view_history', {'page': 2, 'size': 10})
+    assert runner.parse('view_history 2') == ('view_history', {'page': 2, 'size': 20})
+    assert runner.parse('stats') == ('stats', {'path': ''})
+    assert runner.parse('greet') == ('greet', {})
+    assert runner.parse('eval (1 + 2) * mean(3, 4)') == ('eval', {'expression': '(1 + 2) * mean(3, 4)'})
+    assert runner.parse('   ') is None
+    assert runner.parse('# a comment') is None
+
+
+@pytest.mark.parametrize("line, message", [
+    ('fly 1', 'No such command: fly'),
+    ('add 1', 'add expects 2 arguments, got 1'),
+    ('add one 2', 'Invalid number input: one 2'),
+])
+def test_parse_errors(runner, line, message):
+    """Test the errors of lines that can not be parsed."""
+    with pytest.raises(ValueError, match=message):
+        runner.parse(line)
+
+
+def test_run(runner):
+    """Test that results are streamed in order, without prompting, and recorded in the history."""
+    failed = runner.run(['add 1 2\n', 'multiply 2 3\n', '\n', 'mean 1,2,3\n', 'mode 1,2,2\n', 'mode 1,2\n'])
+    assert failed == 0
+    assert runner.output.getvalue().splitlines() == ['1 + 2 = 3', '2 x 3 = 6', 'mean(1,2,3) = 2', "mode(1,2,2) = ['2']", "mode(1,2) = ['1', '2']"]
+    assert len(Calculations.get_history()) == 5
+
+
+def test_run_reports_failures(runner):
+    """Test that failing lines are reported with their line number and the script goes on."""
+    failed = runner.run(['divide 1 0', 'add 1 x', 'subtract 5 3'])
+    assert failed == 2
+    assert runner.output.getvalue() == '5 - 3 = 2\n'
+    assert runner.errors.getvalue().splitlines() == ['line 1: divide 1 0: Cannot divide by zero', 'line 2: add 1 x: Invalid number input: 1 x']
+
+
+def test_run_stops_at_exit(runner):
+    """Test that exit stops the script instead of the process."""
+    assert runner.run(['add 1 1', 'exit', 'add 2 2']) == 0
+    assert runner.output.getvalue() == '1 + 1 = 2\n'
+
+
+def test_run_plain_commands(runner):
+    """Test that commands without arguments run through their plugin, with their output in the results."""
+    runner.run(['add 1 1', 'greet', 'print_history', 'delete_data 1', 'print_history'])
+    assert runner.output.getvalue().splitlines() == ['1 + 1 = 2', 'Hello User!', '1. Calculation(1, 1, add) = 2']
+
+
+def test_run_command_without_arguments_support(runner):
+    """Test that a command overriding execute() without its args is reported as a failing line."""
+    runner.command_handler.set_command('echo', EchoCommand())
+    runner.schemas['echo'] = EchoCommand.arguments
+    assert runner.run(['echo hi']) == 1
+    assert 'line 1: echo hi: ' in runner.errors.getvalue()
+
+
+def test_app_run_batch(tmp_path, monkeypatch, capsys):
+    """Test that the app runs a script file into a results file and returns the exit status."""
+    script = tmp_path / 'script.txt'
+    script.write_text('add 1 2\nmedian 3,1,2\n')
+    results = tmp_path / 'results.txt'
+    assert App().run_batch(str(script), str(results)) == 0
+    assert results.read_text() == '1 + 2 = 3\nMedian(3,1,2) = 2\n'
+    monkeypatch.setattr('sys.stdin', io.StringIO('divide 1 0\n'))
+    assert App().run_batch('-') == 1
+    assert 'Cannot divide by zero' in capsys.readouterr().err
+    Calculator.clear_history()
+
+
+def test_run_quiet_logging(runner, caplog):
+    """Test that a quiet run drops the info logs of the commands but keeps errors and its summary."""
+    with caplog.at_level(logging.INFO):
+        runner.run(['add 1 2', 'divide 1 0'])
+    assert 'Add command called' not in caplog.text
+    assert 'Divide command failed: Cannot divide by zero' in caplog.text
+    assert 'Batch run finished, 2 lines, 1 failed' in caplog.text
+    assert logging.root.manager.disable == logging.NOTSET
+    runner.quiet = False
+    with caplog.at_level(logging.INFO):
+        runner.run(['add 1 2'])
+    assert 'Add command called' in caplog.text
@@ -0,0 +1,103 @@
+# pylint: disable=line-too-long
+'''Tests for the shared result cache.'''
+from decimal import Decimal
+import pytest
+
+from calculator import Calculator
+from calculator.cache import ResultCache, result_cache
+from calculator.calculations import Calculations
+from calculator.calculation import Calculation
+from calculator.operations import divide
+from calculator.statistic import CACHE_MAX_OPERANDS, CalculationStatistic
+
+
+def test_result_cache_lru():
+    """Test that the cache evicts the least recently used entry and counts hits and misses."""
+    cache = ResultCache(maxsize=2)
+    assert cache.get_or_compute('a', lambda: 1) == 1
+    assert cache.get_or_compute('b', lambda: 2) == 2
+    assert cache.get_or_compute('a', lambda: 0) == 1
+    assert cache.get_or_compute('c', lambda: 3) == 3
+    assert cache.get_or_compute('b', lambda: 20) == 20
+    assert cache.stats() == {'hits': 1, 'misses': 4, 'size': 2, 'maxsize': 2}
+    cache.clear()
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 2}
+
+
+def test_result_cache_disabled():
+    """Test that a cache of size zero never stores results."""
+    cache = ResultCache(maxsize=0)
+    cache.get_or_compute('a', lambda: 1)
+    assert cache.get_or_compute('a', lambda: 2) == 2
+    assert cache.stats()['size'] == 0
+
+
+def test_calculation_performs_once():
+    """Test that a calculation performed again, or an identical one, reuses the cached result."""
+    calls = []
+    def counting_median(values):
+        calls.append(values)
+        return sorted(values)[len(values) // 2]
+    values = [Decimal('3'), Decimal('1'), Decimal('2')]
+    first = CalculationStatistic(values, counting_median)
+    assert first.perform() == Decimal('2')
+    assert first.perform() == Decimal('2')
+    assert CalculationStatistic(list(values), counting_median).perform() == Decimal('2')
+    assert len(calls) == 1
+
+
+def test_large_statistics_are_not_cached():
+    """Test that statistics of more than CACHE_MAX_OPERANDS numbers keep their result without building a cache key."""
+    calls = []
+    def counting_max(values):
+        calls.append(values)
+        return max(values)
+    result_cache.clear()
+    values = [Decimal(number) for number in range(CACHE_MAX_OPERANDS + 1)]
+    statistic = CalculationStatistic(values, counting_max)
+    assert statistic.perform() == statistic.perform() == Decimal(CACHE_MAX_OPERANDS)
+    assert len(calls) == 1
+    assert result_cache.stats()['size'] == 0
+
+
+def test_history_keeps_statistic_results():
+    """Test that a large statistic in the history is computed once, whichever view of the entry performs it."""
+    calls = []
+    def counting_max(values):
+        calls.append(values)
+        return max(values)
+    values = [Decimal(number) for number in range(CACHE_MAX_OPERANDS + 1)]
+    Calculations.clear_history()
+    Calculations.add_statistic_calculation(CalculationStatistic(values, counting_max))
+    history = Calculations.get_history()
+    assert history[0] is not history[0]
+    assert history[0].perform() == history[0].perform() == Decimal(CACHE_MAX_OPERANDS)
+    assert [calc.perform() for calc in history] == [Decimal(CACHE_MAX_OPERANDS)]
+    assert len(calls) == 1
+    Calculations.clear_history()
+
+
+def test_cache_distinguishes_representations():
+    """Test that equal operands with a different representation are not mixed up."""
+    def plus(a, b):
+        return a + b
+    assert str(Calculation(Decimal('1.0'), Decimal('2'), plus).perform()) == '3.0'
+    assert str(Calculation(Decimal('1'), Decimal('2'), plus).perform()) == '3'
+    assert Calculation(1.0, 2.0, plus).perform() == 3.0
+
+
+def test_errors_are_not_cached():
+    """Test that a failing operation raises every time."""
+    calculation = Calculation(Decimal('1'), Decimal('0'), divide)
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Cannot divide by zero"):
+            calculation.perform()
+
+
+def test_calculator_cache_stats():
+    """Test that Calculator exposes the statistics of the shared cache."""
+    result_cache.clear()
+    Calculator.add(Decimal('40'), Decimal('2'))
+    Calculator.add(Decimal('40'), Decimal('2'))
+    assert Calculator.cache_stats()['hits'] == 1
+    assert Calculator.cache_stats()['misses'] == 1
@@ -7,10 +7,12 @@ The tests are designed to verify the correctness of basic arithmetic operations
 as well as the functionality of the Calculation class that encapsulates these operations.
 """
 # pylint: disable=unnecessary-dunder-call, invalid-name, line-too-long, unused-import
+import pickle
 from decimal import Decimal
 import pytest
 from calculator.calculation import Calculation
 from calculator.operations import add, subtract, multiply, divide
+from calculator.operators import Operator
 
 # Removed from previous branch
 def test_calculation_operations(a, b, operation, expected):
@@ -38,3 +40,24 @@ def test_divide_by_zero():
     calc = Calculation(Decimal('10'), Decimal('0'), divide)
     with pytest.raises(ValueError, match="Cannot divide by zero"):
         calc.perform()
+
+def test_calculation_is_compact():
+    """Test that a Calculation has no __dict__ and keeps its operation as an operator code."""
+    calc = Calculation(Decimal('10'), Decimal('5'), subtract)
+    assert not hasattr(calc, '__dict__')
+    assert calc.code == Operator.SUBTRACT
+    assert calc.operation is subtract
+    with pytest.raises(AttributeError):
+        calc.extra = 1
+
+def test_calculation_equality_and_hash():
+    """Test that equal calculations are equal cache keys, and that a pickled calculation keeps its operation."""
+    def power(x, y):
+        return x ** y
+    calc = Calculation(Decimal('2'), Decimal('3'), power)
+    assert calc == Calculation(Decimal('2'), Decimal('3'), power)
+    assert calc != Calculation(Decimal('2'), Decimal('3'), multiply)
+    assert {calc: 'cached'}[Calculation(Decimal('2.0'), Decimal('3'), power)] == 'cached'
+    copy = pickle.loads(pickle.dumps(Calculation(Decimal('2'), Decimal('3'), multiply)))
+    assert copy == Calculation(Decimal('2'), Decimal('3'), multiply)
+    assert copy.perform() == Decimal('6')
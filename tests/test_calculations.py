@@ -1,9 +1,13 @@
 '''Tests for calculations class'''
+import threading
 from decimal import Decimal
 import pytest
+from calculator import Calculator
 from calculator.calculation import Calculation
 from calculator.calculations import Calculations
-from calculator.operations import add, subtract
+from calculator.operations import add, subtract, mean
+from calculator.statistic import CalculationStatistic
+from data_handler import DataHandler
 
 # ----- Existing tests for history management -----
 
@@ -57,11 +61,11 @@ def test_clear_csv_data(mocker):
     mock_clear.assert_called_once()
 
 def test_add_csv_data(mocker):
-    """Test that add_csv_data appends calculations from data_handler.convert_to_calculation and clears CSV data."""
+    """Test that add_csv_data appends calculations from data_handler.iter_indexed_calculations and clears CSV data."""
     Calculations.clear_history()
     # Create a dummy calculation.
     dummy_calc = Calculation(Decimal('3'), Decimal('1'), add)
-    mock_convert = mocker.patch.object(Calculations.data_handler, "convert_to_calculation", return_value=[dummy_calc])
+    mock_convert = mocker.patch.object(Calculations.data_handler, "iter_indexed_calculations", return_value=[(None, dummy_calc)])
     mock_clear = mocker.patch.object(Calculations.data_handler, "clear_csv_data")
     Calculations.add_csv_data()
     # Check that the dummy calculation is appended.
@@ -89,17 +93,16 @@ def test_add_calculations_data_to_csv(mocker):
 def test_print_all_calculations(monkeypatch, capsys):
     """
     Test that print_all_calculations prints each calculation in the history.
-    We monkeypatch the perform() method of Calculation instances for predictability.
+    We monkeypatch the perform() method of the Calculation class for predictability,
+    since the history hands out freshly materialized Calculation views.
     """
     # Dummy perform method that returns Decimal(100)
     def dummy_perform(self):
         return Decimal(100)
+    monkeypatch.setattr(Calculation, "perform", dummy_perform)
     # Create two dummy calculations.
     calc1 = Calculation(Decimal('1'), Decimal('1'), add)
     calc2 = Calculation(Decimal('2'), Decimal('2'), subtract)
-    # Bind the dummy perform method to each instance.
-    calc1.perform = dummy_perform.__get__(calc1, type(calc1))
-    calc2.perform = dummy_perform.__get__(calc2, type(calc2))
     # Clear the current history and add the dummy calculations.
     Calculations.clear_history()
     Calculations.add_calculation(calc1)
@@ -143,3 +146,136 @@ def test_delete_csv(mocker):
     mock_delete = mocker.patch.object(Calculations.data_handler, "delete_csv_file_data")
     Calculations.delete_csv()
     mock_delete.assert_called_once()
+
+def test_operation_index_through_history_changes(mocker):
+    """Test that counts and latest entries per operation stay correct as the history changes."""
+    Calculations.clear_history()
+    Calculations.add_calculation(Calculation(Decimal('1'), Decimal('1'), add))
+    Calculations.add_statistic_calculation(CalculationStatistic([Decimal('1')], mean))
+    Calculations.add_calculation(Calculation(Decimal('2'), Decimal('2'), add))
+    assert Calculations.get_operation_counts() == {'add': 2, 'mean': 1}
+    Calculations.delete_at_index(0)
+    assert Calculations.count_by_operation('add') == 1
+    assert Calculations.get_latest_by_operation('add') == Calculation(Decimal('2'), Decimal('2'), add)
+    loaded = Calculation(Decimal('3'), Decimal('1'), subtract)
+    mocker.patch.object(Calculations.data_handler, "iter_indexed_calculations", return_value=[(0, loaded)])
+    mocker.patch.object(Calculations.data_handler, "clear_csv_data")
+    Calculations.add_csv_data()
+    assert Calculations.find_by_operation('subtract') == [loaded]
+    assert Calculations.get_operation_counts() == {'add': 1, 'mean': 1, 'subtract': 1}
+    Calculations.clear_history()
+    assert Calculations.get_operation_counts() == {}
+    assert Calculations.get_latest_by_operation('add') is None
+    Calculations.history.forget_sources()
+
+@pytest.fixture
+def data_handler_tmp_calculations(tmp_path, monkeypatch):
+    """Point Calculations at a DataHandler writing to a temporary folder."""
+    monkeypatch.setenv("CALCULATOR_HISTORY_FOLDER_PATH", str(tmp_path))
+    monkeypatch.setenv("CALCULATOR_HISTORY_FILE_NAME", "calculator_history.csv")
+    handler = DataHandler()
+    monkeypatch.setattr(Calculations, "data_handler", handler)
+    Calculations.clear_history()
+    Calculations.history.forget_sources()
+    yield handler
+    Calculations.clear_history()
+    Calculations.history.forget_sources()
+
+def test_append_mode_round_trip(data_handler_tmp_calculations):
+    """Test that loaded entries are not written twice and deleted ones are tombstoned."""
+    handler = data_handler_tmp_calculations
+    Calculations.add_calculation(Calculation(Decimal('1'), Decimal('1'), add))
+    Calculations.add_calculation(Calculation(Decimal('2'), Decimal('2'), subtract))
+    Calculations.add_calculations_data_to_csv()
+    Calculations.add_csv_data()
+    assert list(Calculations.history.sources) == [0, 1]
+    Calculations.delete_at_index(0)
+    Calculations.add_calculation(Calculation(Decimal('3'), Decimal('3'), add))
+    Calculations.add_calculations_data_to_csv()
+    assert handler.load_tombstones() == {0}
+    Calculations.add_csv_data()
+    assert [calc.a for calc in Calculations.get_history()] == [2.0, 3.0]
+    Calculations.clear_history()
+    Calculations.add_calculations_data_to_csv()
+    assert not list(handler.iter_csv_rows())
+
+def test_append_mode_reload_is_idempotent(data_handler_tmp_calculations):
+    """Test that loading the history twice adds no duplicates, so deleting an entry does not lose the row of another."""
+    handler = data_handler_tmp_calculations
+    Calculations.add_calculation(Calculation(Decimal('1'), Decimal('1'), add))
+    Calculations.add_calculation(Calculation(Decimal('2'), Decimal('2'), subtract))
+    Calculations.add_calculations_data_to_csv()
+    Calculations.add_csv_data()
+    Calculations.add_csv_data()
+    assert list(Calculations.history.sources) == [0, 1]
+    Calculations.delete_at_index(0)
+    Calculations.add_csv_data()
+    assert [calc.a for calc in Calculations.get_history()] == [2.0]
+    Calculations.add_calculations_data_to_csv()
+    assert handler.load_tombstones() == {0}
+    Calculations.add_csv_data()
+    assert [calc.a for calc in Calculations.get_history()] == [2.0]
+    assert list(Calculations.history.sources) == [1]
+
+def test_tombstone_only_unreferenced_rows(data_handler_tmp_calculations):
+    """Test that a removed entry does not delete its row from the file while another entry still comes from it."""
+    handler = data_handler_tmp_calculations
+    Calculations.add_calculation(Calculation(Decimal('1'), Decimal('1'), add))
+    Calculations.add_calculations_data_to_csv()
+    Calculations.add_csv_data()
+    Calculations.history.append(Calculations.get_latest(), 0)
+    Calculations.delete_at_index(0)
+    Calculations.add_calculations_data_to_csv()
+    assert not handler.load_tombstones()
+    Calculations.add_csv_data()
+    assert [calc.a for calc in Calculations.get_history()] == [1.0]
+
+def test_batch_round_trip(data_handler_tmp_calculations):
+    """Test that a batch, a single entry in the history, is saved as one row per element and loads back as calculations."""
+    Calculator.batch('multiply', [1, 2, 3], [4, 5, 6])
+    assert len(Calculations.get_history()) == 1
+    Calculations.add_calculations_data_to_csv()
+    Calculations.add_csv_data()
+    history = list(Calculations.get_history())
+    assert [type(calc) for calc in history] == [Calculation] * 3
+    assert [(calc.a, calc.b, calc.perform()) for calc in history] == [(1.0, 4.0, 4.0), (2.0, 5.0, 10.0), (3.0, 6.0, 18.0)]
+
+def test_failed_save_keeps_history(data_handler_tmp_calculations, mocker):
+    """Test that the history is left as it was when saving it fails or raises."""
+    handler = data_handler_tmp_calculations
+    Calculations.add_calculation(Calculation(Decimal('1'), Decimal('1'), add))
+    Calculations.add_calculation(Calculation(Decimal('2'), Decimal('2'), subtract))
+    mocker.patch.object(handler, "save_csv_data", return_value=False)
+    assert not Calculations.add_calculations_data_to_csv()
+    assert [calc.a for calc in Calculations.get_history()] == [1, 2]
+    assert handler.get_csv_data() == []
+    mocker.patch.object(handler, "add_to_csv", side_effect=[None, RuntimeError('boom')])
+    Calculations.add_calculation(Calculation(Decimal('3'), Decimal('3'), add))
+    with pytest.raises(RuntimeError, match='boom'):
+        Calculations.add_calculations_data_to_csv()
+    assert [calc.a for calc in Calculations.get_history()] == [1, 2, 3]
+    mocker.stopall()
+    assert Calculations.add_calculations_data_to_csv()
+    assert not Calculations.get_history()
+    assert len(list(handler.iter_csv_rows())) == 3
+
+def test_concurrent_saves_lose_no_entries(data_handler_tmp_calculations):
+    """Test that calculations made from 32 threads while the history is saved over and over are all saved once."""
+    handler = data_handler_tmp_calculations
+    threads, appends = 32, 50
+
+    def writer(number):
+        for index in range(appends):
+            Calculator.add(Decimal(number), Decimal(index))
+
+    workers = [threading.Thread(target=writer, args=(number,)) for number in range(threads)]
+    for worker in workers:
+        worker.start()
+    while any(worker.is_alive() for worker in workers):
+        Calculations.add_calculations_data_to_csv()
+    for worker in workers:
+        worker.join()
+    Calculations.add_calculations_data_to_csv()
+    rows = list(handler.iter_csv_rows())
+    assert len(rows) == threads * appends
+    assert sorted((int(row['num_1']), int(row['num_2'])) for row in rows) == [(number, index) for number in range(threads) for index in range(appends)]
@@ -0,0 +1,89 @@
+# pylint: disable=line-too-long
+'''Tests for the binary columnar history format.'''
+from decimal import Decimal
+import math
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from calculator.calculation import Calculation
+from calculator.operations import add, mode
+from calculator.statistic import CalculationStatistic
+from data_handler import DataHandler, columnar
+
+ROWS = [
+    {"num_1": 1.5, "num_2": 2.0, "operator": "add"},
+    {"num_1": [Decimal('1.10'), Decimal('2')], "num_2": 0, "operator": "mean"},
+    {"num_1": Decimal('4'), "num_2": Decimal('0.5'), "operator": "divide"},
+]
+
+
+@pytest.fixture
+def numpy_handler(tmp_path, monkeypatch):
+    """A DataHandler using the columnar format in a temporary folder."""
+    monkeypatch.setenv("CALCULATOR_HISTORY_FOLDER_PATH", str(tmp_path))
+    monkeypatch.setenv("CALCULATOR_HISTORY_FILE_NAME", "calculator_history.csv")
+    monkeypatch.setenv("CALCULATOR_HISTORY_FORMAT", "numpy")
+    return DataHandler()
+
+
+def test_rows_to_columns():
+    """Test the fixed width, ragged and dictionary columns of a segment."""
+    columns = columnar.rows_to_columns(ROWS)
+    assert columns["operators"].tolist() == ["add", "divide", "mean"]
+    assert columns["operator"].tolist() == [0, 2, 1]
+    assert columns["num_1"].dtype == np.float64 and math.isnan(columns["num_1"][1])
+    assert columns["values"].tolist() == ["1.10", "2"]
+    assert columns["offsets"].tolist() == [0, 0, 2, 2]
+    assert columns["is_list"].tolist() == [False, True, False]
+
+
+def test_segments_round_trip(tmp_path):
+    """Test that rows are read back in order across segments, skipping deleted rows."""
+    directory = str(tmp_path / "history.columnar")
+    columnar.write_segment(directory, ROWS[:2])
+    columnar.write_segment(directory, ROWS[2:])
+    assert len(columnar.segment_paths(directory)) == 2
+    rows = [row for _, row in columnar.iter_indexed_rows(directory)]
+    assert rows[1] == {"num_1": [Decimal('1.10'), Decimal('2')], "num_2": 0.0, "operator": "mean"}
+    assert rows[2] == {"num_1": 4.0, "num_2": 0.5, "operator": "divide"}
+    assert [number for number, _ in columnar.iter_indexed_rows(directory, {1})] == [0, 2]
+    columnar.compact(directory, {1}, chunk_size=10)
+    assert len(columnar.segment_paths(directory)) == 1
+    assert [row["operator"] for _, row in columnar.iter_indexed_rows(directory)] == ["add", "divide"]
+
+
+def test_data_handler_numpy_format(numpy_handler):
+    """Test that saving and loading go through the columnar segments."""
+    numpy_handler.add_to_csv(Calculation(Decimal('1'), Decimal('2'), add))
+    numpy_handler.add_to_csv(CalculationStatistic([Decimal('3'), Decimal('3')], mode))
+    numpy_handler.save_csv_data()
+    assert not os.path.exists(numpy_handler.csv_filepath)
+    calculations = numpy_handler.convert_to_calculation()
+    assert calculations == [Calculation(1.0, 2.0, add), CalculationStatistic([Decimal('3'), Decimal('3')], mode)]
+    numpy_handler.add_tombstones([0])
+    assert numpy_handler.convert_to_calculation() == [CalculationStatistic([Decimal('3'), Decimal('3')], mode)]
+    numpy_handler.compact()
+    assert [number for number, _ in numpy_handler.iter_indexed_calculations()] == [0]
+    numpy_handler.delete_csv_file_data()
+    assert numpy_handler.convert_to_calculation() == []
+
+
+def test_convert_csv_to_columnar(numpy_handler):
+    """Test that the existing CSV history is converted to the columnar format."""
+    pd.DataFrame([
+        {"num_1": "1", "num_2": "2", "operator": "add"},
+        {"num_1": "[Decimal('1'), Decimal('2.5')]", "num_2": 0, "operator": "median"},
+    ]).to_csv(numpy_handler.csv_filepath, index=False)
+    assert numpy_handler.convert_csv_to_columnar() == 2
+    rows = [row for _, row in numpy_handler.iter_indexed_csv_rows()]
+    assert rows[0] == {"num_1": 1.0, "num_2": 2.0, "operator": "add"}
+    assert rows[1]["num_1"] == [Decimal('1'), Decimal('2.5')]
+
+
+def test_invalid_history_format(numpy_handler, monkeypatch):
+    """Test that an unknown history format is rejected."""
+    monkeypatch.setenv("CALCULATOR_HISTORY_FORMAT", "parquet")
+    with pytest.raises(ValueError, match="Unsupported history format"):
+        DataHandler()
@@ -26,6 +26,12 @@ from app.plugins.clear import ClearCommand
 from app.plugins.mean import MeanCommand
 from app.plugins.median import MedianCommand
 from app.plugins.mode import ModeCommand
+from app.plugins.add import AddCommand
+from app.plugins.divide import DivideCommand
+from app.plugins.greet import GreetCommand
+from app.plugins.menu import MenuCommand
+from app.plugins.view_history import ViewHistoryCommand
+from app.commands import ArgumentError, CommandResult, LazyCommand, parse_arguments
 
 
 # --- Tests for the REPL (App) commands ---
@@ -188,16 +194,25 @@ def test_divide_command_invalid_input(monkeypatch, capsys):
 
 
 # --- Tests for Calculator-related plugin commands ---
-def test_print_command(mocker, caplog):
-    """Test that PrintCommand.execute() calls Calculator.print_history() and logs expected message."""
-    mock_print_history = mocker.patch.object(Calculator, 'print_history')
+def test_print_command(mocker, caplog, capsys):
+    """Test that PrintCommand.execute() prints the history lines and logs expected message."""
+    mock_history_lines = mocker.patch.object(Calculator, 'history_lines', return_value=['1. first', '2. second'])
     cmd = PrintCommand()
     with caplog.at_level(logging.INFO):
         cmd.execute()
-    mock_print_history.assert_called_once()
+    mock_history_lines.assert_called_once()
+    assert capsys.readouterr().out == '1. first\n2. second\n'
     assert 'Printed calculator local history.' in caplog.text
 
 
+def test_print_command_structured(mocker, capsys):
+    """Test that PrintCommand returns the history lines without printing them when given arguments."""
+    mocker.patch.object(Calculator, 'history_lines', return_value=['1. first', '2. second'])
+    result = PrintCommand().execute({})
+    assert (result.value, result.message) == (['1. first', '2. second'], '1. first\n2. second')
+    assert capsys.readouterr().out == ''
+
+
 def test_save_data_command(mocker, caplog):
     """Test that SaveDataCommand.execute() calls Calculator.save_history_to_csv() and logs expected messages."""
     mock_save_history = mocker.patch.object(Calculator, 'save_history_to_csv')
@@ -401,3 +416,86 @@ def test_mode_command_invalid(monkeypatch, capsys, faker):
     cmd.execute()
     captured = capsys.readouterr()
     assert "Invalid operation:" in captured.out
+
+
+# --- Tests for the structured execute(args) path ---
+@pytest.fixture
+def no_input(monkeypatch):
+    """Fail the test if a command prompts."""
+    def fail(prompt):
+        raise AssertionError(f"unexpected prompt: {prompt}")
+    monkeypatch.setattr('builtins.input', fail)
+
+
+def test_execute_with_arguments(no_input, capsys):
+    """Test that commands given their arguments return a result without prompting or printing."""
+    result = AddCommand().execute({'a': '10.5', 'b': '5.5'})
+    assert (result.ok, result.value, result.message) == (True, Decimal('16.0'), '10.5 + 5.5 = 16.0')
+    assert AddCommand().execute([Decimal('1'), 2]).value == Decimal('3')
+    assert MeanCommand().execute({'numbers': [1, 2, 3]}).value == Decimal('2')
+    assert ModeCommand().execute({'numbers': '1,2,2'}).message == "mode(1,2,2) = ['2']"
+    assert GreetCommand().execute({}).message == 'Hello User!'
+    assert capsys.readouterr().out == ''
+    Calculator.clear_history()
+
+
+def test_execute_with_invalid_arguments(no_input):
+    """Test that invalid arguments and failing operations give a failed result instead of raising."""
+    invalid = AddCommand().execute({'a': 'a', 'b': 'b'})
+    assert not invalid.ok and invalid.message == 'Invalid number input: a or b is not a valid number.'
+    assert not AddCommand().execute(['1']).ok
+    assert not MeanCommand().execute({'numbers': '1,x'}).ok
+    division = DivideCommand().execute({'a': '1', 'b': '0'})
+    assert (division.ok, division.message) == (False, 'Cannot divide by zero')
+    Calculator.clear_history()
+
+
+def test_execute_delete_data_with_arguments(no_input, mocker):
+    """Test that delete_data given an index does not print the history first."""
+    mock_print_all = mocker.patch.object(Calculator, 'print_all_calculations')
+    mock_delete_at_index = mocker.patch.object(Calculator, 'delete_at_index')
+    assert DeleteDataCommand().execute({'index': 3}).value == 3
+    mock_delete_at_index.assert_called_once_with(2)
+    mock_print_all.assert_not_called()
+
+
+def test_execute_interactive_defaults(monkeypatch, mocker):
+    """Test that empty answers to the prompts take the default of the argument."""
+    mock_view = mocker.patch.object(Calculator, 'saved_history_lines', return_value=[])
+    monkeypatch.setattr('builtins.input', lambda prompt: '')
+    assert ViewHistoryCommand().execute().ok
+    mock_view.assert_called_once_with(1, 20)
+
+
+def test_execute_view_history_invalid_page(no_input, capsys):
+    """Test that a page that is not positive is reported."""
+    result = ViewHistoryCommand().execute({'page': 0})
+    assert not result.ok and result.message.startswith('Invalid page')
+
+
+def test_menu_result(no_input):
+    """Test that the menu returns the command names as its value."""
+    result = MenuCommand().execute({})
+    assert 'add' in result.value and result.message.startswith('Available commands:')
+
+
+def test_lazy_command_forwards_arguments(no_input):
+    """Test that a lazy command passes the arguments on to the plugin."""
+    assert LazyCommand('app.plugins.add:AddCommand').execute({'a': 1, 'b': 1}).value == Decimal('2')
+    Calculator.clear_history()
+
+
+def test_parse_arguments():
+    """Test the parsing of raw and typed values with an argument schema."""
+    schema = ({'name': 'n', 'type': 'int', 'prompt': '', 'default': 5}, {'name': 'x', 'type': 'decimal', 'prompt': ''})
+    assert parse_arguments(schema, {'x': ' 1.5 '}) == {'n': 5, 'x': Decimal('1.5')}
+    assert parse_arguments(schema, ['2', Decimal('3')]) == {'n': 2, 'x': Decimal('3')}
+    with pytest.raises(ArgumentError, match='Expected 2 arguments, got 1'):
+        parse_arguments(schema, ['2'])
+    with pytest.raises(ArgumentError, match='Invalid value for x'):
+        parse_arguments(schema, {'x': 'one'})
+
+
+def test_command_result_repr():
+    """Test the string representation of a command result."""
+    assert repr(CommandResult(1, 'done')) == "CommandResult(value=1, message='done', ok=True)"
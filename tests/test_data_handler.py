@@ -15,6 +15,7 @@ import pandas as pd
 import pytest
 
 from data_handler import DataHandler
+from calculator.batch import CalculationBatch
 from calculator.calculation import Calculation
 from calculator.statistic import CalculationStatistic
 
@@ -73,7 +74,7 @@ def test_load_csv_data_success(data_handler_tmp, faker):
 
 def test_load_csv_data_exception(data_handler_tmp, monkeypatch, caplog):
     """Test that load_csv_data() handles exceptions when reading the CSV file."""
-    monkeypatch.setattr(pd, "read_csv", lambda filepath: (_ for _ in ()).throw(RuntimeError("Read error")))
+    monkeypatch.setattr(pd, "read_csv", lambda filepath, **kwargs: (_ for _ in ()).throw(RuntimeError("Read error")))
     # Write a dummy file so that os.path.exists returns True.
     with open(data_handler_tmp.csv_filepath, "w") as f:
         f.write("dummy")
@@ -129,7 +130,7 @@ def test_save_csv_data(data_handler_tmp, monkeypatch, caplog, faker):
     file_path = data_handler_tmp.csv_filepath
     if os.path.exists(file_path):
         os.remove(file_path)
-    data_handler_tmp.save_csv_data()
+    assert data_handler_tmp.save_csv_data()
     df = pd.read_csv(file_path)
     assert len(df) == 1
     assert float(df.loc[0, "num_1"]) == float(a_val)
@@ -141,7 +142,7 @@ def test_save_csv_data(data_handler_tmp, monkeypatch, caplog, faker):
         raise RuntimeError("Simulated error")
     monkeypatch.setattr(pd.DataFrame, "to_csv", dummy_to_csv)
     with caplog.at_level(logging.ERROR):
-        data_handler_tmp.save_csv_data()
+        assert not data_handler_tmp.save_csv_data()
     assert "Error saving data to CSV: Simulated error" in caplog.text
 
 
@@ -236,3 +237,112 @@ def test_delete_csv_file_data(data_handler_tmp, monkeypatch, caplog):
     assert data_handler_tmp.get_csv_data() == []
     assert called is True
     assert "CSV data cleared." in caplog.text
+
+
+def test_add_to_csv_batch(data_handler_tmp):
+    """Test that add_to_csv() stores a batch as one row per element."""
+    data_handler_tmp.clear_csv_data()
+    data_handler_tmp.add_to_csv(CalculationBatch.create([1, 2], [3, 4], 'multiply'))
+    assert data_handler_tmp.get_csv_data() == [
+        {"num_1": 1.0, "num_2": 3.0, "operator": "multiply"},
+        {"num_1": 2.0, "num_2": 4.0, "operator": "multiply"},
+    ]
+
+
+def test_init_does_not_touch_file(tmp_path, monkeypatch, mocker):
+    """Test that the constructor neither creates the folder nor reads the CSV file."""
+    folder = tmp_path / "missing"
+    monkeypatch.setenv("CALCULATOR_HISTORY_FOLDER_PATH", str(folder))
+    monkeypatch.setenv("CALCULATOR_HISTORY_FILE_NAME", "calculator_history.csv")
+    read_csv = mocker.spy(pd, "read_csv")
+    DataHandler()
+    assert not folder.exists()
+    read_csv.assert_not_called()
+
+
+def test_iter_csv_rows_in_chunks(data_handler_tmp, mocker):
+    """Test that iter_csv_rows() reads the file chunk by chunk and yields every row."""
+    pd.DataFrame([{"num_1": i, "num_2": 1, "operator": "add"} for i in range(25)]).to_csv(data_handler_tmp.csv_filepath, index=False)
+    read_csv = mocker.spy(pd, "read_csv")
+    rows = data_handler_tmp.iter_csv_rows(chunk_size=10)
+    assert next(rows)["num_1"] == 0
+    assert read_csv.call_args.kwargs["chunksize"] == 10
+    assert [row["num_1"] for row in rows] == list(range(1, 25))
+
+
+def test_iter_calculations_streams_from_file(data_handler_tmp):
+    """Test that iter_calculations() streams from the file without filling the in-memory CSV data."""
+    pd.DataFrame([
+        {"num_1": "3", "num_2": "2", "operator": "subtract"},
+        {"num_1": "[Decimal('1'), Decimal('2')]", "num_2": 0, "operator": "median"},
+    ]).to_csv(data_handler_tmp.csv_filepath, index=False)
+    calculations = list(data_handler_tmp.iter_calculations(chunk_size=1))
+    assert calculations[0].perform() == 1.0
+    assert calculations[1].a == [Decimal('1'), Decimal('2')]
+    # In append mode the in-memory CSV data only holds unsaved rows.
+    assert data_handler_tmp.csv_data == []
+
+
+def test_csv_data_loaded_lazily_in_rewrite_mode(data_handler_tmp, monkeypatch):
+    """Test that in rewrite mode the in-memory CSV data is read the first time it is used."""
+    monkeypatch.setenv("CALCULATOR_HISTORY_WRITE_MODE", "rewrite")
+    handler = DataHandler()
+    pd.DataFrame([{"num_1": "3", "num_2": "2", "operator": "subtract"}]).to_csv(handler.csv_filepath, index=False)
+    assert handler._csv_data is None  # pylint: disable=protected-access
+    assert len(handler.csv_data) == 1
+    assert [row_number for row_number, _ in handler.iter_indexed_calculations()] == [None]
+
+
+def test_save_appends_only_new_rows(data_handler_tmp, mocker):
+    """Test that saving in append mode only writes the unsaved rows, with one fsync per save."""
+    fsync = mocker.spy(os, "fsync")
+    data_handler_tmp.csv_data = [{"num_1": 1, "num_2": 2, "operator": "add"}]
+    data_handler_tmp.save_csv_data()
+    data_handler_tmp.csv_data = [{"num_1": 3, "num_2": 4, "operator": "multiply"}]
+    data_handler_tmp.save_csv_data()
+    assert fsync.call_count == 2
+    assert data_handler_tmp.csv_data == []
+    df = pd.read_csv(data_handler_tmp.csv_filepath)
+    assert df["operator"].tolist() == ["add", "multiply"]
+
+
+def test_tombstones_hide_deleted_rows(data_handler_tmp):
+    """Test that rows marked as deleted are skipped when reading and removed by compaction."""
+    data_handler_tmp.csv_data = [{"num_1": i, "num_2": 1, "operator": "add"} for i in range(5)]
+    data_handler_tmp.save_csv_data()
+    data_handler_tmp.add_tombstones([1, 3])
+    assert [row_number for row_number, _ in data_handler_tmp.iter_indexed_csv_rows()] == [0, 2, 4]
+    assert [row["num_1"] for row in data_handler_tmp.iter_csv_rows()] == [0, 2, 4]
+    data_handler_tmp.compact()
+    assert not os.path.exists(data_handler_tmp.tombstone_filepath)
+    assert pd.read_csv(data_handler_tmp.csv_filepath)["num_1"].tolist() == [0, 2, 4]
+
+
+def test_tombstones_compact_at_threshold(data_handler_tmp):
+    """Test that the file is compacted once enough rows are deleted."""
+    data_handler_tmp.compact_threshold = 2
+    data_handler_tmp.csv_data = [{"num_1": "[Decimal('1.10')]", "num_2": 0, "operator": "mean"} for _ in range(3)]
+    data_handler_tmp.save_csv_data()
+    data_handler_tmp.add_tombstones([0])
+    assert os.path.exists(data_handler_tmp.tombstone_filepath)
+    data_handler_tmp.add_tombstones([2])
+    assert not os.path.exists(data_handler_tmp.tombstone_filepath)
+    with open(data_handler_tmp.csv_filepath) as f:
+        assert f.read() == "num_1,num_2,operator\n[Decimal('1.10')],0,mean\n"
+
+
+def test_delete_csv_file_data_truncates_in_append_mode(data_handler_tmp):
+    """Test that deleting the CSV data truncates the file and drops the tombstones."""
+    data_handler_tmp.csv_data = [{"num_1": 1, "num_2": 2, "operator": "add"}]
+    data_handler_tmp.save_csv_data()
+    data_handler_tmp.add_tombstones([0])
+    data_handler_tmp.delete_csv_file_data()
+    assert not os.path.exists(data_handler_tmp.tombstone_filepath)
+    assert list(data_handler_tmp.iter_csv_rows()) == []
+
+
+def test_invalid_write_mode(data_handler_tmp, monkeypatch):
+    """Test that an unknown write mode is rejected."""
+    monkeypatch.setenv("CALCULATOR_HISTORY_WRITE_MODE", "sometimes")
+    with pytest.raises(ValueError, match="Unsupported history write mode"):
+        DataHandler()
@@ -0,0 +1,128 @@
+# pylint: disable=line-too-long
+'''Tests for the expression compiler and the eval plugin.'''
+from decimal import Decimal
+
+import pytest
+
+from app.plugins.eval import EvalCommand
+from calculator import Calculator
+from calculator.calculations import Calculations
+from calculator.expression import ExpressionCalculation, ExpressionError, compile_expression, compiled_expressions, evaluate, tokenize
+from data_handler import columnar
+
+
+@pytest.fixture(autouse=True)
+def clean_history():
+    """Every test starts and ends with an empty history."""
+    Calculator.clear_history()
+    yield
+    Calculator.clear_history()
+
+
+def test_tokenize():
+    """Test that numbers, names and symbols are split with their positions."""
+    assert tokenize(' 1.5e2*mean(.5)') == [('number', '1.5e2', 1), ('symbol', '*', 6), ('name', 'mean', 7), ('symbol', '(', 11), ('number', '.5', 12), ('symbol', ')', 14)]
+
+
+@pytest.mark.parametrize("source, value", [
+    ('1 + 2 * 3', Decimal('7')),
+    ('(1 + 2) * 3', Decimal('9')),
+    ('8 / 4 / 2', Decimal('1')),
+    ('10 - 4 - 3', Decimal('3')),
+    ('-2 * -(3 + 1)', Decimal('8')),
+    ('(1.5 + 2) * mean(3,4,5) / 7', Decimal('2')),
+    ('median(5, 1, 3, 2) + mode(1, 2, 2)', Decimal('4.5')),
+    ('divide(subtract(10, 4), multiply(add(1, 1), 3))', Decimal('1')),
+    ('mean(1 + 1, 2 * 2)', Decimal('3')),
+    ('mode(1, 2)', [Decimal('1'), Decimal('2')]),
+])
+def test_evaluate(source, value):
+    """Test precedence, associativity, signs, parentheses and calls."""
+    assert evaluate(source) == value
+
+
+@pytest.mark.parametrize("source, message", [
+    ('', 'Empty expression'),
+    ('1 +', 'Unexpected end of expression'),
+    ('1 $ 2', "Unexpected character '\\$' at position 3"),
+    ('1 2', "Unexpected '2' at position 3"),
+    ('(1', "Unexpected end of expression, expected '\\)'"),
+    ('power(2, 3)', "Unknown function 'power' at position 1"),
+    ('add(1)', 'add expects 2 arguments, got 1'),
+    ('mode(1, 2) + 1', 'The mode is tied between 1, 2, it cannot be used as a number'),
+])
+def test_errors(source, message):
+    """Test that invalid sources raise an ExpressionError, which is a ValueError."""
+    with pytest.raises(ExpressionError, match=message):
+        evaluate(source)
+
+
+def test_operation_errors():
+    """Test that the errors of the operations themselves go through."""
+    with pytest.raises(ValueError, match='Cannot divide by zero'):
+        evaluate('1 / (2 - 2)')
+    with pytest.raises(ValueError, match='Cannot calculate the mean of an empty list'):
+        evaluate('mean()')
+
+
+def test_nesting_limit():
+    """Test that sources nested too deeply raise an ExpressionError instead of exhausting the stack."""
+    assert evaluate('(' * 50 + '1' + ')' * 50) == Decimal('1')
+    assert evaluate('-' * 99 + '1') == Decimal('-1')
+    with pytest.raises(ExpressionError, match='Expression nested more than 100 levels deep'):
+        evaluate('(' * 300 + '1' + ')' * 300)
+    with pytest.raises(ExpressionError, match='Expression nested more than 100 levels deep'):
+        evaluate('-' * 2000 + '1')
+    with pytest.raises(ExpressionError, match='Expression nested more than 100 levels deep'):
+        evaluate('mean(' * 120 + '1' + ')' * 120)
+
+
+def test_arithmetic_errors():
+    """Test that arithmetic errors of the evaluation, such as an overflow, raise an ExpressionError."""
+    with pytest.raises(ExpressionError, match="Cannot evaluate '1e5000000\\*1e5000000': Overflow"):
+        evaluate('1e5000000*1e5000000')
+
+
+def test_compiled_expressions_are_cached():
+    """Test that a source is only parsed the first time it is seen."""
+    compiled_expressions.clear()
+    compiled = compile_expression('1 + mean(2, 3)')
+    assert compile_expression(' 1 + mean(2, 3) ') is compiled
+    assert compiled_expressions.stats()['misses'] == 1
+    assert compiled_expressions.stats()['hits'] == 1
+    assert compiled.evaluate() == compiled.evaluate() == Decimal('3.5')
+
+
+def test_one_history_entry():
+    """Test that an evaluated expression is recorded as one calculation, which saves and loads back."""
+    assert Calculator.evaluate('(1 + 2) * 3') == Decimal('9')
+    history = Calculations.get_history()
+    assert len(history) == 1
+    assert history[0] == ExpressionCalculation('(1 + 2) * 3')
+    assert repr(history[0]) == "ExpressionCalculation('(1 + 2) * 3')"
+    assert Calculations.find_by_operation('evaluate') == [history[0]]
+    row = Calculations.data_handler.calculation_to_row(history[0])
+    assert row == {'num_1': '(1 + 2) * 3', 'num_2': 0, 'operator': 'evaluate'}
+    assert Calculations.data_handler.row_to_calculation(row).perform() == Decimal('9')
+    with pytest.raises(ExpressionError):
+        Calculator.evaluate('(1 + 2')
+    assert len(history) == 1
+
+
+def test_columnar_texts(tmp_path):
+    """Test that the source of an expression is kept by the columnar format."""
+    directory = str(tmp_path / "history.columnar")
+    columnar.write_segment(directory, [{'num_1': 'mean(1, 2)', 'num_2': 0, 'operator': 'evaluate'}, {'num_1': '1.5', 'num_2': '2', 'operator': 'add'}])
+    rows = [row for _, row in columnar.iter_indexed_rows(directory)]
+    assert rows == [{'num_1': 'mean(1, 2)', 'num_2': 0.0, 'operator': 'evaluate'}, {'num_1': 1.5, 'num_2': 2.0, 'operator': 'add'}]
+
+
+def test_eval_command():
+    """Test the eval plugin."""
+    result = EvalCommand().execute({'expression': '(1.5 + 2) * mean(3,4,5) / 7'})
+    assert result.ok
+    assert result.message == '(1.5 + 2) * mean(3,4,5) / 7 = 2.0'
+    assert EvalCommand().execute(['mode(1, 2)']).message == "mode(1, 2) = ['1', '2']"
+    result = EvalCommand().execute(['1 +'])
+    assert not result.ok
+    assert result.message == 'Invalid expression: Unexpected end of expression'
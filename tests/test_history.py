@@ -0,0 +1,149 @@
+# pylint: disable=line-too-long
+'''Tests for the columnar history store.'''
+import threading
+from decimal import Decimal
+import pytest
+
+from calculator.batch import CalculationBatch
+from calculator.calculation import Calculation
+from calculator.history import HistoryStore, ShardedHistory, RecordKind
+from calculator.operators import Operator, operation_for, operator_code
+from calculator.operations import add, divide, mean, median
+from calculator.statistic import CalculationStatistic
+
+
+def custom_op(a, b):
+    """A custom operation that is not part of the built-in set."""
+    return a % b
+
+
+@pytest.fixture
+def store():
+    """A history store with one entry of each kind."""
+    history = HistoryStore()
+    history.append(Calculation(Decimal('1'), Decimal('2'), add))
+    history.append(CalculationStatistic([Decimal('1'), Decimal('3')], mean))
+    history.append(CalculationBatch([1, 2], [3, 4], divide, exact=True))
+    return history
+
+
+def test_columns(store):
+    """Test that entries are split into operand, operator code and kind columns."""
+    assert list(store.codes) == [Operator.ADD, Operator.MEAN, Operator.DIVIDE]
+    assert list(store.kinds) == [RecordKind.CALCULATION, RecordKind.STATISTIC, RecordKind.BATCH_EXACT]
+    assert store.a[0] == Decimal('1') and store.b[0] == Decimal('2')
+    assert len(store.timestamps) == 3
+
+
+def test_materialize(store):
+    """Test that entries are materialized back into equal Calculation views."""
+    assert store[0] == Calculation(Decimal('1'), Decimal('2'), add)
+    assert store[1] == CalculationStatistic([Decimal('1'), Decimal('3')], mean)
+    assert store[-1].exact is True and store[-1].operation is divide
+    assert len(store[0:2]) == 2
+    assert [calc.perform() for calc in store][:2] == [Decimal('3'), Decimal('2')]
+
+
+def test_find_by_operation(store):
+    """Test that entries are found by the name of their operation."""
+    assert store.find_by_operation('mean') == [CalculationStatistic([Decimal('1'), Decimal('3')], mean)]
+    assert not store.find_by_operation('median')
+
+
+def test_pop_and_clear(store):
+    """Test that removing entries keeps the columns aligned."""
+    assert store.pop(1) == CalculationStatistic([Decimal('1'), Decimal('3')], mean)
+    assert len(store) == 2 and list(store.codes) == [Operator.ADD, Operator.DIVIDE]
+    with pytest.raises(IndexError):
+        store.pop(5)
+    store.clear()
+    assert len(store) == 0 and not list(store)
+
+
+def test_custom_operation_code():
+    """Test that unknown operations get a stable custom code."""
+    code = operator_code(custom_op)
+    assert code >= 64
+    assert operator_code(custom_op) == code
+    assert operation_for(code) is custom_op
+    assert operator_code(median) == Operator.MEDIAN
+
+
+def test_foreign_objects_are_kept():
+    """Test that objects which are not calculations are stored as they are."""
+    history = HistoryStore()
+    record = object()
+    history.append(record)
+    assert history[0] is record
+
+
+def test_operator_index(store):
+    """Test that the operator index tracks positions, counts and the latest entry."""
+    store.append(Calculation(Decimal('5'), Decimal('6'), add))
+    assert list(store.positions[Operator.ADD]) == [0, 3]
+    assert store.count_by_operation('add') == 2
+    assert store.latest_by_operation('add') == Calculation(Decimal('5'), Decimal('6'), add)
+    assert store.latest_by_operation('median') is None
+    assert store.operation_counts() == {'add': 2, 'mean': 1, 'divide': 1}
+
+
+def test_operator_index_after_pop(store):
+    """Test that removing an entry shifts the later positions of every operator."""
+    store.append(Calculation(Decimal('5'), Decimal('6'), add))
+    store.pop(0)
+    assert list(store.positions[Operator.ADD]) == [2]
+    assert list(store.positions[Operator.MEAN]) == [0]
+    assert list(store.positions[Operator.DIVIDE]) == [1]
+    store.pop(-1)
+    assert store.count_by_operation('add') == 0
+    assert store.find_by_operation('mean') == [store[0]]
+    store.clear()
+    assert not store.positions and store.operation_counts() == {}
+
+
+def test_sharded_history_merges_in_order():
+    """Test that appends are merged in the order they were made, and that iteration goes over a snapshot."""
+    history = ShardedHistory()
+    history.append(Calculation(Decimal('1'), Decimal('2'), add))
+    history.extend([CalculationStatistic([Decimal('1'), Decimal('3')], mean), Calculation(Decimal('4'), Decimal('2'), divide)])
+    assert len(history) == 3
+    assert list(history.store.codes) == [Operator.ADD, Operator.MEAN, Operator.DIVIDE]
+    for calculation in history:
+        history.pop(0)
+        history.append(calculation)
+    assert [calculation.a for calculation in history] == [Decimal('1'), [Decimal('1'), Decimal('3')], Decimal('4')]
+    drained = history.drain()
+    assert len(drained) == 3 and len(history) == 0
+
+
+def test_sharded_history_stress():
+    """Test that 32 threads appending while others read, count and remove entries lose none of them."""
+    history = ShardedHistory()
+    threads, appends = 32, 500
+    start = threading.Barrier(threads + 1)
+    removed = []
+
+    def writer(number):
+        start.wait()
+        for index in range(appends):
+            history.append(Calculation(Decimal(number), Decimal(index), add if index % 2 else divide))
+
+    def reader():
+        start.wait()
+        for _ in range(50):
+            assert history.count_by_operation('add') + history.count_by_operation('divide') == len(history.snapshot())
+            if len(history):
+                removed.append(history.pop(0))
+            sum(1 for _ in history)
+
+    workers = [threading.Thread(target=writer, args=(number,)) for number in range(threads)] + [threading.Thread(target=reader)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    entries = removed + list(history)
+    assert len(entries) == threads * appends
+    assert history.operation_counts() == {'add': threads * appends // 2 - sum(1 for entry in removed if entry.operation is add), 'divide': threads * appends // 2 - sum(1 for entry in removed if entry.operation is divide)}
+    for number in range(threads):
+        assert [entry.b for entry in entries if entry.a == number] == [Decimal(index) for index in range(appends)]
+    assert len(history._shards) == 0
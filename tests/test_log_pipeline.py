@@ -0,0 +1,116 @@
+# pylint: disable=line-too-long
+'''Tests for the queue based logging pipeline.'''
+import logging
+from logging.handlers import QueueHandler
+
+import pytest
+
+from app import log_pipeline
+from app.log_pipeline import Preview, TruncateFilter, configure_logging, set_levels, stop_logging, truncate
+
+CONFIG = '''
+[loggers]
+keys=root,data_handler
+
+[handlers]
+keys=fileHandler
+
+[formatters]
+keys=simpleFormatter
+
+[logger_root]
+level=INFO
+handlers=fileHandler
+
+[logger_data_handler]
+level=INFO
+handlers=
+qualname=data_handler
+
+[handler_fileHandler]
+class=FileHandler
+level=INFO
+formatter=simpleFormatter
+args=({path!r}, 'a')
+
+[formatter_simpleFormatter]
+format=%(name)s - %(levelname)s - %(message)s
+'''
+
+
+@pytest.fixture(name='config')
+def config_fixture(tmp_path, monkeypatch):
+    """A logging configuration writing to a file of the temporary folder, the app configuration is restored afterwards."""
+    log_path = tmp_path / 'app.log'
+    config_path = tmp_path / 'logging.conf'
+    config_path.write_text(CONFIG.format(path=str(log_path)))
+    monkeypatch.setenv('CALCULATOR_LOG_MAX_LENGTH', '20')
+    yield str(config_path), log_path
+    monkeypatch.delenv('CALCULATOR_LOG_MAX_LENGTH')
+    monkeypatch.delenv('CALCULATOR_LOG_MODE', raising=False)
+    monkeypatch.delenv('CALCULATOR_LOG_LEVELS', raising=False)
+    configure_logging('logging.conf')
+
+
+def test_preview_and_truncate():
+    """Test that a preview shows the first items of a list, and that long messages are truncated."""
+    assert str(Preview([1, 2, 3])) == '1,2,3'
+    assert str(Preview(list(range(25)), limit=3)) == '0,1,2,... (22 more)'
+    assert truncate('short', 10) == 'short'
+    assert truncate('a' * 15, 10) == 'aaaaaaaaaa... (5 more characters)'
+
+
+def test_queue_mode(config):
+    """Test that the records go through a queue to the configured handlers, built once and truncated."""
+    config_path, log_path = config
+    listener = configure_logging(config_path)
+    root = logging.getLogger()
+    assert len(root.handlers) == 1 and isinstance(root.handlers[0], QueueHandler)
+    assert log_pipeline._listener is listener # pylint: disable=protected-access
+    numbers = [1, 2]
+    logging.getLogger('data_handler').info('Saved %s', numbers)
+    numbers.append(3)
+    logging.getLogger('app').info('%s', 'x' * 30)
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        logging.getLogger('app').exception('Failed')
+    stop_logging()
+    assert [type(handler) for handler in root.handlers] == [logging.FileHandler]
+    logging.getLogger('app').info('Synchronous')
+    lines = log_path.read_text().splitlines()
+    assert lines[:3] == ['data_handler - INFO - Saved [1, 2]', 'app - INFO - xxxxxxxxxxxxxxxxxxxx... (10 more characters)', 'app - ERROR - Failed']
+    assert lines[-2:] == ['ValueError: boom', 'app - INFO - Synchronous']
+
+
+def test_sync_mode(config, monkeypatch):
+    """Test that the handlers write from the logging thread in sync mode, with long messages truncated."""
+    config_path, log_path = config
+    monkeypatch.setenv('CALCULATOR_LOG_MODE', 'sync')
+    assert configure_logging(config_path) is None
+    handler = logging.getLogger().handlers[0]
+    assert any(isinstance(log_filter, TruncateFilter) for log_filter in handler.filters)
+    logging.getLogger('app').warning('%s', 'y' * 25)
+    assert log_path.read_text() == 'app - WARNING - yyyyyyyyyyyyyyyyyyyy... (5 more characters)\n'
+
+
+def test_levels(config, monkeypatch):
+    """Test that the levels of the loggers are set from CALCULATOR_LOG_LEVELS."""
+    config_path, log_path = config
+    monkeypatch.setenv('CALCULATOR_LOG_LEVELS', 'data_handler=warning')
+    configure_logging(config_path)
+    logging.getLogger('data_handler').info('hidden')
+    logging.getLogger('data_handler.viewer').warning('shown')
+    stop_logging()
+    assert log_path.read_text() == 'data_handler.viewer - WARNING - shown\n'
+    with pytest.raises(ValueError, match="Invalid logger level: 'data_handler'"):
+        set_levels('data_handler')
+    with pytest.raises(ValueError, match="Invalid logger level: 'app=LOUD'"):
+        set_levels('app=LOUD')
+
+
+def test_invalid_mode(config, monkeypatch):
+    """Test that an unknown logging mode is refused."""
+    monkeypatch.setenv('CALCULATOR_LOG_MODE', 'async')
+    with pytest.raises(ValueError, match='Unsupported logging mode: async'):
+        configure_logging(config[0])
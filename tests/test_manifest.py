@@ -0,0 +1,112 @@
+# pylint: disable=line-too-long
+'''Tests for the plugin manifest and the lazily imported commands.'''
+import json
+import os
+import sys
+import pytest
+
+from app import App, manifest
+from app.commands import LazyCommand
+from app.plugins.greet import GreetCommand
+
+PLUGIN_SOURCE = '''
+from app.commands import Command, CommandResult
+
+class Helper:
+    pass
+
+class HelloCommand(Command):
+    description = 'Say hello'
+    arguments = ({'name': 'who', 'type': 'str', 'prompt': 'Who? '},)
+    def run(self, who):
+        return CommandResult(who, f"hello {who} from the plugin")
+'''
+
+
+@pytest.fixture
+def plugin_package(tmp_path, monkeypatch):
+    """A temporary plugin package with a single hello plugin."""
+    package = tmp_path / "tmp_plugins"
+    (package / "hello").mkdir(parents=True)
+    (package / "__init__.py").write_text("")
+    (package / "hello" / "__init__.py").write_text(PLUGIN_SOURCE)
+    (package / "not_a_plugin").mkdir()
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield package
+    for name in [name for name in sys.modules if name.startswith("tmp_plugins")]:
+        del sys.modules[name]
+
+
+def test_command_classes():
+    """Test that only the classes deriving from Command are found, directly or through another command."""
+    source = PLUGIN_SOURCE + "\nclass LoudHelloCommand(HelloCommand):\n    pass\n\nclass Other(commands.Command):\n    pass\n"
+    assert manifest.command_classes(source) == ["HelloCommand", "LoudHelloCommand", "Other"]
+
+
+def test_load_manifest_builds_and_caches(plugin_package, mocker):
+    """Test that the manifest is written next to the plugins and reused while they do not change."""
+    commands = manifest.load_manifest("tmp_plugins", str(plugin_package))
+    assert commands == {"hello": {"target": "tmp_plugins.hello:HelloCommand", "description": "Say hello", "arguments": [{"name": "who", "type": "str", "prompt": "Who? "}]}}
+    with open(plugin_package / manifest.MANIFEST_FILE_NAME, encoding="utf-8") as file:
+        assert json.load(file)["commands"] == commands
+    build = mocker.spy(manifest, "build_manifest")
+    assert manifest.load_manifest("tmp_plugins", str(plugin_package)) == commands
+    build.assert_not_called()
+
+
+def test_load_manifest_invalidated_by_changes(plugin_package):
+    """Test that new and modified plugins invalidate the cached manifest."""
+    manifest.load_manifest("tmp_plugins", str(plugin_package))
+    (plugin_package / "bye").mkdir()
+    (plugin_package / "bye" / "__init__.py").write_text(PLUGIN_SOURCE.replace("Hello", "Bye"))
+    assert manifest.load_manifest("tmp_plugins", str(plugin_package))["bye"]["target"] == "tmp_plugins.bye:ByeCommand"
+    hello = plugin_package / "hello" / "__init__.py"
+    hello.write_text(PLUGIN_SOURCE.replace("HelloCommand", "HiCommand"))
+    stat = os.stat(hello)
+    os.utime(hello, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert manifest.load_manifest("tmp_plugins", str(plugin_package))["hello"]["target"] == "tmp_plugins.hello:HiCommand"
+
+
+def test_plugin_entry_description_from_docstring():
+    """Test that a plugin without a description is described by its module docstring."""
+    entry = manifest.plugin_entry("'''Says hello.\n\nMore text.'''" + PLUGIN_SOURCE.replace("description = 'Say hello'", ""), "pkg.hello")
+    assert entry["description"] == "Says hello." and entry["target"] == "pkg.hello:HelloCommand"
+    assert manifest.plugin_entry("x = 1", "pkg.empty") is None
+
+
+def test_load_manifest_skips_invalid_plugins(plugin_package, caplog):
+    """Test that a plugin that does not parse is logged and skipped."""
+    (plugin_package / "broken").mkdir()
+    (plugin_package / "broken" / "__init__.py").write_text("class (:")
+    assert "broken" not in manifest.load_manifest("tmp_plugins", str(plugin_package))
+    assert "Error reading plugin broken" in caplog.text
+
+
+def test_lazy_command_imports_on_first_use(plugin_package):
+    """Test that the plugin module is only imported when the command is executed."""
+    command = LazyCommand(manifest.load_manifest("tmp_plugins", str(plugin_package))["hello"]["target"])
+    assert "tmp_plugins.hello" not in sys.modules
+    assert command.execute(['you']).message == "hello you from the plugin"
+    assert "tmp_plugins.hello" in sys.modules
+    assert command.load() is command.command
+    assert command.run(who='me').value == 'me'
+
+
+def test_lazy_command_missing_plugin(capsys, caplog):
+    """Test that a command whose plugin cannot be imported is reported instead of stopping the REPL."""
+    LazyCommand("app.plugins.does_not_exist:Nothing").execute()
+    assert "Could not load command" in capsys.readouterr().out
+    assert "Error loading plugin app.plugins.does_not_exist:Nothing" in caplog.text
+    result = LazyCommand("app.plugins.does_not_exist:Nothing").execute({})
+    assert not result.ok and result.message.startswith("Could not load command")
+    assert capsys.readouterr().out == ""
+
+
+def test_app_registers_lazy_plugins():
+    """Test that the app registers every plugin as a lazy command pointing at its class."""
+    app = App()
+    app.load_plugins()
+    commands = app.command_handler.commands
+    assert {"add", "exit", "greet", "menu", "view_history"} <= set(commands)
+    assert all(isinstance(command, LazyCommand) for command in commands.values())
+    assert isinstance(commands["greet"].load(), GreetCommand)
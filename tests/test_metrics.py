@@ -0,0 +1,164 @@
+# pylint: disable=line-too-long
+'''Tests for the metrics of the commands dispatched by the CommandHandler.'''
+import random
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from app import App
+from app.commands import Command, CommandHandler, CommandResult, UnknownCommandError
+from app.metrics import BUCKETS, LatencyHistogram, Metrics, bucket_high, bucket_index
+from app.plugins.stats import StatsCommand
+
+
+class FailingCommand(Command):
+    """A command that fails, or raises when asked to."""
+    arguments = ({'name': 'word', 'type': 'str', 'prompt': 'Word: '},)
+
+    def run(self, word):
+        if word == 'raise':
+            raise RuntimeError('boom')
+        return CommandResult(message=word, ok=word != 'fail')
+
+
+@pytest.fixture(name='handler')
+def handler_fixture():
+    """A command handler with the stats command and a command that fails on demand."""
+    command_handler = CommandHandler()
+    command_handler.set_command('stats', StatsCommand())
+    command_handler.set_command('word', FailingCommand())
+    return command_handler
+
+
+def test_buckets():
+    """Test that every value falls in a bucket whose highest value is within 1/32 above it."""
+    values = list(range(5000)) + [random.Random(0).randrange(1, 1 << 44) for _ in range(10000)]
+    for value in values:
+        index = bucket_index(value)
+        assert bucket_high(index - 1) < value <= bucket_high(index) if index else value == 0
+        assert bucket_high(index) - value <= value / 32
+    assert bucket_index(1 << 60) == BUCKETS - 1
+
+
+def test_percentiles():
+    """Test that the percentiles are within the precision of the buckets, and exact at the ends."""
+    rng = random.Random(1)
+    values = sorted(rng.randrange(1000, 10 ** 8) for _ in range(10000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    for quantile in (0.5, 0.9, 0.99):
+        exact = values[int(quantile * len(values)) - 1]
+        assert exact <= histogram.percentile(quantile) <= exact * 33 / 32
+    assert histogram.percentile(1) == values[-1] == histogram.max
+    assert histogram.count == len(values)
+    assert histogram.mean == sum(values) / len(values)
+    assert LatencyHistogram().percentile(0.5) == 0
+    with pytest.raises(ValueError, match='between 0 and 1'):
+        histogram.percentile(1.5)
+
+
+def test_dispatch_counters(handler, capsys):
+    """Test that calls, failed results, exceptions and unknown names are counted."""
+    assert handler.execute('word', ['hello']).ok
+    assert not handler.execute('word', ['fail']).ok
+    with pytest.raises(RuntimeError, match='boom'):
+        handler.execute('word', ['raise'])
+    with pytest.raises(UnknownCommandError):
+        handler.execute('fly')
+    handler.executed_command('swim')
+    assert capsys.readouterr().out == 'No such command: swim\n'
+    metrics = handler.metrics.commands['word']
+    assert (metrics.calls, metrics.errors, metrics.in_flight, metrics.latency.count) == (3, 2, 0, 3)
+    assert handler.metrics.unknown_commands == 2
+
+
+def test_repl_reports_failures(handler, monkeypatch, capsys):
+    """Test that a command raising in the REPL is reported and counted, and the REPL goes on."""
+    monkeypatch.setattr('builtins.input', lambda _: 'raise')
+    handler.executed_command('word')
+    assert capsys.readouterr().out == "Command word failed: RuntimeError('boom')\n"
+    metrics = handler.metrics.commands['word']
+    assert (metrics.calls, metrics.errors, metrics.in_flight) == (1, 1, 0)
+
+
+def test_concurrent_dispatches(handler):
+    """Test that dispatches from several threads are all counted."""
+    threads, dispatches = 8, 500
+
+    def dispatch():
+        for _ in range(dispatches):
+            handler.execute('word', ['fail'])
+            handler.record_unknown_command()
+
+    workers = [threading.Thread(target=dispatch) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    metrics = handler.metrics.commands['word']
+    assert (metrics.calls, metrics.errors, metrics.in_flight, metrics.latency.count) == (threads * dispatches, threads * dispatches, 0, threads * dispatches)
+    assert handler.metrics.unknown_commands == threads * dispatches
+
+
+def test_stats_command(handler, tmp_path):
+    """Test that the stats command prints the table, and exports the Prometheus text format to a file."""
+    handler.execute('word', ['hello'])
+    table = handler.execute('stats', {}).message.splitlines()
+    assert table[0].split() == ['command', 'calls', 'errors', 'in', 'flight', 'mean', 'p50', 'p90', 'p99', 'max']
+    assert table[1].split()[:4] == ['stats', '0', '0', '1']
+    assert table[2].split()[:4] == ['word', '1', '0', '0']
+    assert table[-1] == 'Unknown commands: 0'
+    path = tmp_path / 'metrics' / 'calculator.prom'
+    assert handler.execute('stats', [str(path)]).message == f'Metrics exported to {path}'
+    text = path.read_text()
+    assert 'calculator_command_calls_total{command="word"} 1\n' in text
+    assert 'calculator_command_errors_total{command="word"} 0\n' in text
+    assert 'calculator_commands_in_flight{command="stats"} 1\n' in text
+    assert 'calculator_command_duration_seconds_count{command="word"} 1\n' in text
+    assert '# TYPE calculator_command_duration_seconds summary\n' in text
+    assert text.endswith('calculator_unknown_commands_total 0\n')
+    assert not handler.execute('stats', [str(tmp_path)]).ok
+
+
+def test_prometheus_labels():
+    """Test that the label values are escaped."""
+    metrics = Metrics()
+    metrics.command('say "hi"\\').calls += 1
+    assert 'calculator_command_calls_total{command="say \\"hi\\"\\\\"} 1' in metrics.to_prometheus()
+
+
+def test_metrics_disabled(monkeypatch):
+    """Test that commands are dispatched without metrics when they are off."""
+    monkeypatch.setenv('CALCULATOR_METRICS', 'off')
+    command_handler = CommandHandler()
+    command_handler.set_command('stats', StatsCommand())
+    assert command_handler.metrics is None
+    result = command_handler.execute('stats', {})
+    assert not result.ok and 'disabled' in result.message
+    command_handler.executed_command('fly')
+    monkeypatch.setenv('CALCULATOR_METRICS', 'maybe')
+    with pytest.raises(ValueError, match='Unsupported metrics setting: maybe'):
+        CommandHandler()
+
+
+def test_metrics_endpoint():
+    """Test that the metrics are served on localhost at /metrics only."""
+    app = App()
+    app.load_plugins()
+    app.command_handler.execute('add', ['1', '2'])
+    server = app.serve_metrics(0)
+    try:
+        url = f'http://127.0.0.1:{server.server_port}'
+        with urllib.request.urlopen(f'{url}/metrics') as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert 'calculator_command_calls_total{command="add"} 1' in response.read().decode()
+        with pytest.raises(urllib.error.HTTPError, match='404'):
+            urllib.request.urlopen(f'{url}/other')
+    finally:
+        server.shutdown()
+        server.server_close()
+    with pytest.raises(ValueError, match='only listens on localhost'):
+        app.serve_metrics(0, '0.0.0.0')
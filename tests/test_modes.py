@@ -0,0 +1,76 @@
+# pylint: disable=line-too-long
+'''Tests for the multimodal mode and the top-k modes.'''
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from calculator import Calculator
+from calculator.calculations import Calculations
+from calculator.modes import Modes, multimode, single_or_modes, top_modes
+from calculator.operations import mode
+
+
+def decimals(*values):
+    """Decimals from strings."""
+    return [Decimal(value) for value in values]
+
+
+def test_multimode_ties_in_first_occurrence_order():
+    """Test that tied numbers come in the order of their first occurrence, with their count."""
+    modes = multimode(decimals('3', '1', '2', '1', '3', '2'))
+    assert isinstance(modes, Modes)
+    assert isinstance(modes, list)
+    assert modes == decimals('3', '1', '2')
+    assert modes.count == 2
+
+
+def test_mode_single_or_modes():
+    """Test that mode returns the number without ties, and the Modes with ties."""
+    assert mode(decimals('1', '2', '2')) == Decimal('2')
+    result = mode(decimals('1', '2'))
+    assert isinstance(result, Modes)
+    assert result == decimals('1', '2')
+    assert result.count == 1
+    assert single_or_modes(Modes([Decimal(5)], 3)) == Decimal(5)
+
+
+def test_equal_decimals_counted_together():
+    """Test that Decimal('2') and Decimal('2.0') are counted as one number under the first one."""
+    modes = multimode(decimals('2.0', '1', '2'))
+    assert modes == [Decimal(2)]
+    assert str(modes[0]) == '2.0'
+    assert modes.count == 2
+
+
+def test_multimode_array():
+    """Test that a NumPy array gives the same modes as the list of its numbers."""
+    values = np.random.default_rng(0).integers(0, 20, 1000).astype(np.float64)
+    modes = multimode(values)
+    assert modes == multimode(values.tolist())
+    assert modes.count == multimode(values.tolist()).count
+    assert multimode(np.array([3.0, 1.0, 1.0, 3.0])) == [3.0, 1.0]
+
+
+@pytest.mark.parametrize("values", [decimals('1', '2', '2', '3', '3', '3', '4'), np.array([1.0, 2.0, 2.0, 3.0, 3.0, 3.0, 4.0])])
+def test_top_modes(values):
+    """Test the k most frequent numbers with their counts, on a list and on an array."""
+    assert top_modes(values, 2) == [(3, 3), (2, 2)]
+    assert top_modes(values, 10) == [(3, 3), (2, 2), (1, 1), (4, 1)]
+
+
+def test_calculator_top_modes():
+    """Test that the top modes are not recorded in the history."""
+    Calculator.clear_history()
+    assert Calculator.top_modes(decimals('5', '4', '4'), 1) == [(Decimal(4), 2)]
+    assert not Calculations.get_history()
+
+
+def test_errors():
+    """Test the errors of empty lists and invalid numbers of modes."""
+    with pytest.raises(ValueError, match='Cannot calculate the mode of an empty list'):
+        multimode([])
+    with pytest.raises(ValueError, match='Cannot calculate the mode of an empty list'):
+        top_modes(np.array([]), 1)
+    with pytest.raises(ValueError, match='The number of modes must be positive'):
+        top_modes(decimals('1'), 0)
@@ -0,0 +1,90 @@
+# pylint: disable=line-too-long
+'''Tests for the parallel statistics engine.'''
+import random
+import threading
+from decimal import Decimal
+
+import pytest
+
+from calculator import operations, parallel
+
+
+def numbers(size, seed=0, digits=3):
+    """Random Decimals with repeated values, some of them with a different representation of the same value."""
+    rng = random.Random(seed)
+    values = [Decimal(rng.randint(-10 ** digits, 10 ** digits)) / 10 for _ in range(size)]
+    return [value.quantize(Decimal('0.00')) if index % 7 == 0 else value for index, value in enumerate(values)]
+
+
+def sequential(operation, values, monkeypatch):
+    """The result of the single process operation."""
+    with monkeypatch.context() as patch:
+        patch.setattr(parallel, 'PARALLEL_WORKERS', 1)
+        return operation(values)
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 1000, 1001])
+@pytest.mark.parametrize("workers", [2, 3])
+def test_same_results(size, workers, monkeypatch):
+    """Test that the parallel operations return the same Decimals as the single process ones."""
+    values = numbers(size, seed=size)
+    assert parallel.mean(values, workers) == sequential(operations.mean, values, monkeypatch)
+    assert str(parallel.median(values, workers)) == str(sequential(operations.median, values, monkeypatch))
+    assert repr(parallel.mode(values, workers)) == repr(sequential(operations.mode, values, monkeypatch))
+
+
+def test_mean_is_exact():
+    """Test that the partial sums do not lose digits beyond the precision of the context."""
+    values = [Decimal('1e30'), Decimal('1'), Decimal('-1e30'), Decimal('1')]
+    assert parallel.mean(values, 2) == Decimal('0.5')
+
+
+def test_median_sample_miss(monkeypatch):
+    """Test that a sample missing the median falls back to a selection over every number."""
+    class FirstIndices(random.Random):
+        """A random generator sampling the first positions."""
+        def sample(self, population, k, *, counts=None):
+            return list(population)[:k]
+    values = [Decimal(value) for value in range(2000)]
+    monkeypatch.setattr(parallel, 'MEDIAN_SAMPLE_SIZE', 100)
+    monkeypatch.setattr(parallel.random, 'Random', FirstIndices)
+    assert parallel.median(values, 2) == Decimal('999.5')
+
+
+def test_concurrent_calls():
+    """Test that calls from several threads at once each get the result of their own list."""
+    values = (258, 5258, 7, 99, 1234, 42)
+    lists = [[Decimal(number)] * 300 + numbers(200, seed=number) for number in values]
+    results = [[] for _ in lists]
+
+    def run(index):
+        for _ in range(5):
+            results[index].append(parallel.mode(lists[index], 2))
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(len(lists))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [[Decimal(number)] * 5 for number in values]
+
+
+def test_without_fork(monkeypatch):
+    """Test that the chunks are sent to the workers when they can not inherit the list."""
+    values = numbers(101, seed=2)
+    monkeypatch.setattr(parallel.multiprocessing, 'get_all_start_methods', lambda: ['spawn'])
+    assert parallel.mean(values, 2) == sequential(operations.mean, values, monkeypatch)
+
+
+def test_threshold(monkeypatch, mocker):
+    """Test that the operations switch to the parallel engine above the threshold when there are several workers."""
+    spy = mocker.spy(parallel, 'mode')
+    monkeypatch.setattr(parallel, 'PARALLEL_THRESHOLD', 10)
+    monkeypatch.setattr(parallel, 'PARALLEL_WORKERS', 2)
+    assert operations.mode([Decimal(1)] * 9) == Decimal(1)
+    assert spy.call_count == 0
+    assert operations.mode([Decimal(1)] * 10) == Decimal(1)
+    assert spy.call_count == 1
+    monkeypatch.setattr(parallel, 'PARALLEL_WORKERS', 1)
+    operations.mode([Decimal(1)] * 10)
+    assert spy.call_count == 1
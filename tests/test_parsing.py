@@ -0,0 +1,40 @@
+# pylint: disable=line-too-long
+'''Tests for the operand list parser.'''
+from decimal import Decimal
+import pytest
+
+from data_handler.parsing import parse_decimal_list
+
+
+@pytest.mark.parametrize('text, parsed', [
+    ("[Decimal('1'), Decimal('2.50'), Decimal('-3E+2')]", [Decimal('1'), Decimal('2.50'), Decimal('-3E+2')]),
+    ('[Decimal("4")]', [Decimal('4')]),
+    ("[1, 2.5]", [Decimal('1'), Decimal('2.5')]),
+    ("[]", []),
+    (" [ Decimal( '7' ) ] ", [Decimal('7')]),
+])
+def test_parse_decimal_list(text, parsed):
+    """Test that serialized lists are parsed into Decimals with their exact representation."""
+    result = parse_decimal_list(text)
+    assert result == parsed
+    assert [str(value) for value in result] == [str(value) for value in parsed]
+
+
+@pytest.mark.parametrize('text', [
+    "not_a_list",
+    "[Decimal('1'), __import__('os')]",
+    "[Decimal(1 + 1)]",
+    "[Decimal('1')",
+    "[1,,2]",
+    float('nan'),
+])
+def test_parse_decimal_list_rejects(text):
+    """Test that anything but a list of numbers is rejected instead of being evaluated."""
+    with pytest.raises(ValueError):
+        parse_decimal_list(text)
+
+
+def test_parse_decimal_list_invalid_repr_item():
+    """Test that an item in the repr format that is not a number is rejected."""
+    with pytest.raises(ValueError, match="Invalid number in list"):
+        parse_decimal_list("[Decimal('1'), Decimal('one')]")
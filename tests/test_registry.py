@@ -0,0 +1,95 @@
+# pylint: disable=line-too-long
+'''Tests for the command registry of the CommandHandler.'''
+import json
+import pytest
+
+from app import App
+from app.commands import Command, CommandHandler, CommandResult, LazyCommand
+from app.plugins.greet import GreetCommand
+from app.plugins.menu import MenuCommand
+
+
+class EchoCommand(Command):
+    """A command declaring its own metadata."""
+    description = 'Echo a word'
+    arguments = ({'name': 'word', 'type': 'str', 'prompt': 'Word: '},)
+
+    def run(self, word):
+        return CommandResult(word, word)
+
+
+@pytest.fixture
+def app_handler():
+    """The command handler of an app with every plugin registered."""
+    app = App()
+    app.load_plugins()
+    return app.command_handler
+
+
+def test_command_requires_run():
+    """Test that a command that does not implement run() cannot be created."""
+    class Incomplete(Command):
+        """A command without run()."""
+    with pytest.raises(TypeError, match='abstract method run'):
+        Incomplete()
+
+
+def test_set_command_metadata():
+    """Test that the registry takes the metadata declared by the command unless it is given."""
+    handler = CommandHandler()
+    handler.set_command('echo', EchoCommand())
+    handler.set_command('shout', EchoCommand(), 'Shout a word', ())
+    echo, shout = handler.describe()
+    assert echo.to_dict() == {'name': 'echo', 'description': 'Echo a word', 'arguments': [{'name': 'word', 'type': 'str', 'prompt': 'Word: '}], 'loaded': True}
+    assert (shout.description, shout.arguments) == ('Shout a word', ())
+    assert handler.commands['echo'].command_handler is handler
+
+
+def test_registry_lazy_flag(app_handler):
+    """Test that plugins are registered unloaded with the metadata of the manifest, and marked loaded once used."""
+    info = app_handler.registry['add']
+    assert not info.loaded
+    assert info.description == 'Add two numbers'
+    assert [argument['name'] for argument in info.arguments] == ['a', 'b']
+    app_handler.executed_command('greet')
+    assert app_handler.registry['greet'].loaded
+    assert isinstance(app_handler.commands['greet'].load(), GreetCommand)
+
+
+def test_menu_reads_registry(app_handler, capsys, mocker):
+    """Test that the menu lists the registry without importing the plugins."""
+    app_handler.commands['menu'].load()
+    load = mocker.spy(LazyCommand, 'load')
+    app_handler.executed_command('menu')
+    output = capsys.readouterr().out.splitlines()
+    assert output[0] == 'Available commands:'
+    assert '- add: Add two numbers' in output
+    assert len(output) == len(app_handler.registry) + 1
+    assert load.call_count == 1
+    assert not app_handler.registry['add'].loaded
+
+
+def test_menu_without_handler(capsys):
+    """Test that a menu that is not registered lists the plugins of the manifest."""
+    MenuCommand().execute()
+    assert '- greet: Greet the user' in capsys.readouterr().out
+
+
+def test_dump_json(app_handler):
+    """Test that the registry dumps its metadata as JSON."""
+    dumped = json.loads(app_handler.dump('json'))
+    assert [entry['name'] for entry in dumped] == sorted(app_handler.registry)
+    assert {'name': 'numbers', 'type': 'decimal_list', 'prompt': 'Enter a list of numbers separated by commas: '} in next(entry for entry in dumped if entry['name'] == 'mean')['arguments']
+
+
+def test_dump_bash(app_handler):
+    """Test that the registry dumps a bash completion script with every command."""
+    script = app_handler.dump('bash', 'calc.py')
+    assert 'complete -F _calc_py_complete calc.py' in script
+    assert all(name in script for name in app_handler.registry)
+
+
+def test_dump_invalid_format():
+    """Test that unknown dump formats are rejected."""
+    with pytest.raises(ValueError, match='Unsupported dump format'):
+        CommandHandler().dump('fish')
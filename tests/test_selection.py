@@ -0,0 +1,79 @@
+# pylint: disable=line-too-long
+'''Tests for the linear time selection of the median.'''
+import random
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from calculator import selection
+
+
+def numbers(size, seed=0):
+    """Random Decimals with many repeated values, some of them written with more digits."""
+    rng = random.Random(seed)
+    return [Decimal(rng.randint(0, size // 3 + 1)).quantize(Decimal('0.0')) if rng.random() < 0.3 else Decimal(rng.randint(0, size // 3 + 1)) for _ in range(size)]
+
+
+def sorted_median(values):
+    """The median picked from a sorted copy."""
+    ordered = sorted(values)
+    n = len(ordered)
+    return (ordered[n // 2 - 1] + ordered[n // 2]) / 2 if n % 2 == 0 else ordered[n // 2]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 100, 1024, 1025, 5000])
+def test_select_like_sorted(size):
+    """Test that the selected numbers are the very ones a sorted copy holds, and that the list is left untouched."""
+    values = numbers(size, seed=size)
+    original = list(values)
+    ordered = sorted(values)
+    for k in {0, size // 2, size - 1}:
+        assert repr(selection.select(values, k)) == repr(ordered[k])
+    if size > 1:
+        assert [repr(x) for x in selection.select_pair(values, size // 2)] == [repr(ordered[size // 2 - 1]), repr(ordered[size // 2])]
+    assert repr(selection.median(values)) == repr(sorted_median(values))
+    assert values == original and [repr(x) for x in values] == [repr(x) for x in original]
+
+
+@pytest.mark.parametrize("size", [1000, 3000, 3001])
+def test_select_in_place(size):
+    """Test that the buffer is partitioned around the selected number."""
+    values = [random.Random(size).uniform(-1, 1) for _ in range(size)]
+    ordered = sorted(values)
+    buffer = list(values)
+    k = size // 3
+    assert selection.select(buffer, k, in_place=True) == ordered[k]
+    assert buffer[k] == ordered[k]
+    assert max(buffer[:k]) <= buffer[k] <= min(buffer[k + 1:])
+    assert sorted(buffer) == ordered
+    assert selection.median(list(values), in_place=True) == sorted_median(values)
+
+
+def test_numpy_arrays():
+    """Test the selection on NumPy arrays, with and without a copy."""
+    array = np.random.default_rng(0).normal(size=1000)
+    expected = np.median(array)
+    assert selection.median(array) == expected
+    assert not np.array_equal(np.sort(array), array)
+    buffer = array.copy()
+    assert selection.median(buffer, in_place=True) == expected
+    assert selection.select(buffer, 0, in_place=True) == array.min()
+
+
+def test_worst_case_pivots(monkeypatch):
+    """Test that pivots that only split off one number switch to the median of medians and still select the right number."""
+    monkeypatch.setattr(selection, '_median_of_three', lambda values, lo, hi: min(values[lo:hi]))
+    values = numbers(3000, seed=1)
+    assert repr(selection.median(values)) == repr(sorted_median(values))
+    assert selection.median(list(values), in_place=True) == sorted_median(values)
+
+
+def test_errors():
+    """Test the errors for empty lists and ranks out of range."""
+    with pytest.raises(ValueError, match='empty list'):
+        selection.median([])
+    with pytest.raises(IndexError, match='Cannot select rank 3 of 3 numbers'):
+        selection.select([1, 2, 3], 3)
+    with pytest.raises(IndexError, match='Cannot select ranks -1 and 0 of 3 numbers'):
+        selection.select_pair([1, 2, 3], 0)
@@ -0,0 +1,198 @@
+# pylint: disable=line-too-long
+'''Tests for the HTTP/JSON calculation service.'''
+import asyncio
+import json
+import pytest
+
+from app.server import CalculatorServer, to_decimal
+from calculator import Calculator
+from calculator.calculations import Calculations
+from data_handler import DataHandler
+
+
+async def send(reader, writer, method, path, payload=None, close=False, headers=None):
+    """Send one request on an open connection and return the status and the JSON payload of the response."""
+    body = b'' if payload is None else json.dumps(payload).encode()
+    head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+    if close:
+        head += 'Connection: close\r\n'
+    for name, value in (headers or {}).items():
+        head += f"{name}: {value}\r\n"
+    writer.write(head.encode() + b'\r\n' + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) != b'\r\n':
+        name, _, value = line.decode().partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return status, json.loads(await reader.readexactly(int(headers['content-length']))), headers
+
+
+def serve(requests, executor='thread'):
+    """Start a server on a free port, send the requests on one connection and return the responses."""
+    async def scenario():
+        server = CalculatorServer(port=0, workers=2, executor=executor)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+            responses = [await send(reader, writer, *request) for request in requests]
+            writer.close()
+            return responses
+        finally:
+            await server.stop()
+    return asyncio.run(scenario())
+
+
+@pytest.fixture(autouse=True)
+def clean_history():
+    """Every test starts and ends with an empty history."""
+    Calculator.clear_history()
+    yield
+    Calculator.clear_history()
+
+
+def test_keep_alive():
+    """Test that several requests are served on the same connection until the client closes it."""
+    responses = serve([('GET', '/health'), ('GET', '/operations'), ('GET', '/health', None, True)])
+    assert [status for status, _, _ in responses] == [200, 200, 200]
+    assert responses[0][1] == {'status': 'ok'}
+    assert responses[1][1]['operations'] == ['add', 'subtract', 'multiply', 'divide', 'mean', 'median', 'mode']
+    assert responses[0][2]['connection'] == 'keep-alive'
+    assert responses[2][2]['connection'] == 'close'
+
+
+@pytest.mark.parametrize("executor", ['thread', 'process'])
+def test_calculate(executor):
+    """Test single operations, with exact Decimal results, on both kinds of pool."""
+    responses = serve([
+        ('POST', '/calculate', {'operation': 'add', 'a': '0.1', 'b': 0.2}),
+        ('POST', '/calculate', {'operation': 'mean', 'numbers': [1, '2', 3.5]}),
+        ('POST', '/calculate', {'operation': 'mode', 'numbers': [1, 2, 2]}),
+    ], executor)
+    assert [payload for _, payload, _ in responses] == [
+        {'operation': 'add', 'result': '0.3'},
+        {'operation': 'mean', 'result': '2.166666666666666666666666667'},
+        {'operation': 'mode', 'result': '2'},
+    ]
+    assert len(Calculations.get_history()) == 3
+
+
+def test_calculate_batch():
+    """Test that an array of operations is evaluated in one request, failures reported per operation, in order."""
+    (status, payload, _), = serve([('POST', '/calculate', [
+        {'operation': 'multiply', 'a': 2, 'b': 3},
+        {'operation': 'divide', 'a': 1, 'b': 0},
+        {'operation': 'median', 'numbers': [3, 1, 2]},
+        {'operation': 'mean', 'numbers': []},
+        {'operation': 'power', 'a': 2, 'b': 3},
+        {'operation': 'subtract', 'a': 'Infinity', 'b': 'Infinity'},
+    ])])
+    assert status == 200
+    assert payload['results'] == [
+        {'operation': 'multiply', 'result': '6'},
+        {'error': 'Cannot divide by zero'},
+        {'operation': 'median', 'result': '2'},
+        {'operation': 'mean', 'error': 'Cannot calculate the mean of an empty list'},
+        {'error': "Unsupported operation: 'power'"},
+        {'error': 'Arithmetic error: InvalidOperation'},
+    ]
+    assert [repr(calculation) for calculation in Calculations.get_history()] == [
+        'Calculation(2, 3, multiply)',
+        'Calculation(1, 0, divide)',
+        "CalculationStatistic([Decimal('3'), Decimal('1'), Decimal('2')], 0, median)",
+        'CalculationStatistic([], 0, mean)',
+        'Calculation(Infinity, Infinity, subtract)',
+    ]
+
+
+@pytest.mark.parametrize("method, path, payload, status, error", [
+    ('POST', '/calculate', {'operation': 'add', 'a': 'x', 'b': 1}, 400, "Not a number: 'x'"),
+    ('POST', '/calculate', {'operation': 'divide', 'a': 1, 'b': 0}, 400, 'Cannot divide by zero'),
+    ('POST', '/calculate', {'operation': 'mean', 'numbers': '1,2'}, 400, 'numbers must be an array'),
+    ('POST', '/calculate', {'operation': 'subtract', 'a': 'Infinity', 'b': 'Infinity'}, 400, 'Arithmetic error: InvalidOperation'),
+    ('GET', '/calculate', None, 405, 'GET is not allowed on /calculate'),
+    ('GET', '/nowhere', None, 404, 'No such endpoint: /nowhere'),
+    ('DELETE', '/history/3', None, 404, 'No calculation at index 3'),
+])
+def test_errors(method, path, payload, status, error):
+    """Test that invalid requests get an error status and message, and the connection stays usable."""
+    responses = serve([(method, path, payload), ('GET', '/health')])
+    assert responses[0][0] == status
+    assert responses[0][1]['error'] == error
+    assert responses[1][0] == 200
+
+
+def test_invalid_json():
+    """Test that a body that is not JSON is rejected."""
+    async def scenario():
+        server = CalculatorServer(port=0)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+            writer.write(b'POST /calculate HTTP/1.1\r\nContent-Length: 3\r\n\r\n{x}')
+            status_line = await reader.readline()
+            writer.close()
+            return status_line
+        finally:
+            await server.stop()
+    assert asyncio.run(scenario()).startswith(b'HTTP/1.1 400 Bad Request')
+
+
+def test_history(tmp_path, monkeypatch):
+    """Test listing, deleting, clearing, saving and loading the history."""
+    monkeypatch.setenv('CALCULATOR_HISTORY_FOLDER_PATH', str(tmp_path))
+    monkeypatch.setenv('CALCULATOR_HISTORY_FILE_NAME', 'history.csv')
+    monkeypatch.setattr(Calculations, 'data_handler', DataHandler())
+    responses = serve([
+        ('POST', '/calculate', [{'operation': 'add', 'a': 1, 'b': 2}, {'operation': 'subtract', 'a': 5, 'b': 3}]),
+        ('DELETE', '/history/1'),
+        ('GET', '/history'),
+        ('POST', '/history/save'),
+        ('DELETE', '/history'),
+        ('POST', '/history/load'),
+        ('PUT', '/history'),
+    ])
+    assert responses[1][1] == {'size': 1}
+    assert responses[2][1] == {'history': [{'calculation': 'Calculation(5, 3, subtract)', 'result': '2'}]}
+    assert responses[3][1] == {'saved': True}
+    assert responses[4][1] == {'history': []}
+    assert responses[5][1] == {'size': 1}
+    assert responses[6][0] == 405
+
+
+def test_sessions(tmp_path, monkeypatch):
+    """Test that requests with a session header work on the history of their session."""
+    monkeypatch.setenv('CALCULATOR_SESSIONS_FOLDER_PATH', str(tmp_path))
+    alice = {'X-Calculator-Session': 'alice'}
+    responses = serve([
+        ('POST', '/calculate', {'operation': 'add', 'a': 1, 'b': 2}, False, alice),
+        ('POST', '/calculate', {'operation': 'mean', 'numbers': [1, 2, 3]}),
+        ('GET', '/history', None, False, alice),
+        ('POST', '/history/save', None, False, alice),
+        ('GET', '/history'),
+        ('GET', '/history', None, False, {'X-Calculator-Session': 'bad id'}),
+    ])
+    assert responses[2][1] == {'history': [{'calculation': 'Calculation(1, 2, add)', 'result': '3'}]}
+    assert responses[3][1] == {'saved': True}
+    assert (tmp_path / 'alice.csv').exists()
+    assert responses[4][1] == {'history': [{'calculation': "CalculationStatistic([Decimal('1'), Decimal('2'), Decimal('3')], 0, mean)", 'result': '2'}]}
+    assert responses[5][0] == 400
+
+
+def test_only_localhost():
+    """Test that the server refuses to listen on other addresses than the loopback ones."""
+    with pytest.raises(ValueError, match='only listens on localhost'):
+        CalculatorServer(host='0.0.0.0')
+    with pytest.raises(ValueError, match='Unsupported executor'):
+        CalculatorServer(executor='fiber')
+    assert CalculatorServer(host='localhost').host == 'localhost'
+    assert CalculatorServer(host='::1').host == '::1'
+
+
+def test_to_decimal():
+    """Test the conversion of JSON values into Decimals."""
+    assert str(to_decimal(' 1.5 ')) == '1.5'
+    assert str(to_decimal(7)) == '7'
+    for value in (True, None, [1], 'one'):
+        with pytest.raises(ValueError, match='Not a number'):
+            to_decimal(value)
@@ -0,0 +1,145 @@
+# pylint: disable=line-too-long
+'''Tests for the per-session histories.'''
+import threading
+from decimal import Decimal
+
+import pytest
+
+from calculator import Calculator
+from calculator.calculations import Calculations, Session
+from calculator.sessions import SessionManager, current_session, use_session
+
+
+@pytest.fixture(autouse=True)
+def sessions_folder(tmp_path, monkeypatch):
+    """Session history files go to a temporary folder, and the default history starts and ends empty."""
+    monkeypatch.setenv("CALCULATOR_SESSIONS_FOLDER_PATH", str(tmp_path / "sessions"))
+    Calculator.clear_history()
+    yield tmp_path / "sessions"
+    Calculator.clear_history()
+
+
+@pytest.fixture
+def manager():
+    """A session manager of three sessions."""
+    return SessionManager(max_sessions=3, idle_timeout=60)
+
+
+def test_sessions_are_independent(manager):
+    """Test that each session records into its own history, and the default session outside of them."""
+    with use_session('alice', manager) as alice:
+        Calculator.add(Decimal('1'), Decimal('2'))
+        with use_session('bob', manager) as bob:
+            Calculator.mean([Decimal('1'), Decimal('3')])
+            assert current_session() is bob
+        Calculator.evaluate('2 * 3')
+    Calculator.subtract(Decimal('5'), Decimal('1'))
+    assert [repr(calculation) for calculation in alice.get_history()] == ['Calculation(1, 2, add)', "ExpressionCalculation('2 * 3')"]
+    assert bob.get_operation_counts() == {'mean': 1}
+    assert Calculations.get_operation_counts() == {'subtract': 1}
+    assert current_session() is Calculations
+    with use_session(None) as default:
+        assert default is Calculations
+
+
+def test_session_history_file(manager, sessions_folder):
+    """Test that a session saves to and loads from its own history file."""
+    with use_session('alice', manager):
+        Calculator.multiply(Decimal('2'), Decimal('4'))
+        Calculator.save_history_to_csv()
+        assert (sessions_folder / 'alice.csv').exists()
+        assert not current_session().get_history()
+        Calculator.load_csv_data()
+        assert [calculation.perform() for calculation in current_session().get_history()] == [8.0]
+    assert not Calculations.get_history()
+
+
+def test_idle_sessions_hold_no_history(manager):
+    """Test that a session only creates its history and data handler when they are used."""
+    with use_session('idle', manager) as session:
+        assert isinstance(session, Session)
+        assert session._history is None and session._data_handler is None
+        assert not session.unsaved
+
+
+def test_least_recently_used_sessions_are_evicted(manager, sessions_folder):
+    """Test that past the maximum number of sessions the least recently used one is saved and evicted."""
+    for session_id in ('a', 'b', 'c'):
+        with use_session(session_id, manager):
+            Calculator.add(Decimal('1'), Decimal(len(session_id)))
+    with use_session('a', manager):
+        pass
+    with use_session('d', manager):
+        assert 'b' not in manager and len(manager) == 3
+    assert manager.evictions == 1
+    assert (sessions_folder / 'b.csv').exists() and not (sessions_folder / 'a.csv').exists()
+    with use_session('b', manager) as session:
+        assert not session.get_history()
+        session.add_csv_data()
+        assert session.get_operation_counts() == {'add': 1}
+
+
+def test_idle_timeout(manager, sessions_folder):
+    """Test that sessions idle for longer than the timeout are evicted, and that sessions in use are kept."""
+    with use_session('old', manager) as old:
+        Calculator.add(Decimal('1'), Decimal('1'))
+        old.last_used -= 120
+        assert manager.evict_idle() == 0
+    old.last_used -= 120
+    with use_session('new', manager):
+        assert 'old' not in manager
+    assert (sessions_folder / 'old.csv').exists()
+    manager.close()
+    assert len(manager) == 0 and manager.evictions == 2
+
+
+def test_acquire_waits_for_the_save_of_an_evicted_session(manager, monkeypatch):
+    """Test that a session acquired again while its evicted history is being saved waits for the save."""
+    with use_session('slow', manager):
+        Calculator.add(Decimal('1'), Decimal('1'))
+    saving, release, events = threading.Event(), threading.Event(), []
+
+    def slow_save(session):
+        saving.set()
+        release.wait()
+        events.append('saved')
+        return True
+    monkeypatch.setattr(Session, 'add_calculations_data_to_csv', slow_save)
+    manager.sessions['slow'].last_used -= 120
+    evicting = threading.Thread(target=manager.evict_idle)
+    evicting.start()
+    assert saving.wait(5)
+
+    def acquire():
+        with use_session('slow', manager):
+            events.append('acquired')
+    acquiring = threading.Thread(target=acquire)
+    acquiring.start()
+    try:
+        acquiring.join(0.1)
+        assert events == []
+    finally:
+        release.set()
+        evicting.join()
+    acquiring.join()
+    assert events == ['saved', 'acquired']
+
+
+def test_sessions_per_thread(manager):
+    """Test that the session of a context does not leak into other threads."""
+    seen = []
+    with use_session('alice', manager):
+        thread = threading.Thread(target=lambda: seen.append(current_session()))
+        thread.start()
+        thread.join()
+    assert seen == [Calculations]
+
+
+@pytest.mark.parametrize("session_id", ['', '../etc', 'a b', 'x' * 65, 7])
+def test_invalid_session_ids(manager, session_id):
+    """Test that session ids which are not safe file names are rejected."""
+    with pytest.raises(ValueError, match='Invalid session id'):
+        with use_session(session_id, manager):
+            pass
+    with pytest.raises(ValueError, match='must be positive'):
+        SessionManager(max_sessions=0)
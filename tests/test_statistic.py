@@ -5,6 +5,7 @@ Tests for the CalculationStatistic class.
 
 from decimal import Decimal
 # import pytest
+from calculator.operations import mean, median
 from calculator.statistic import CalculationStatistic
 
 
@@ -47,3 +48,13 @@ def test_repr():
     calc_stat = CalculationStatistic(a_list, dummy_operation)
     expected = f"CalculationStatistic({a_list}, 0, {dummy_operation.__name__})"
     assert repr(calc_stat) == expected
+
+
+def test_compact_equality_and_hash():
+    """Test that a CalculationStatistic has no __dict__, shares b and hashes like an equal statistic."""
+    calc_stat = CalculationStatistic([Decimal("1"), Decimal("2")], mean)
+    assert not hasattr(calc_stat, '__dict__')
+    assert 'b' not in CalculationStatistic.__slots__
+    assert calc_stat == CalculationStatistic([Decimal("1"), Decimal("2")], mean)
+    assert calc_stat != CalculationStatistic([Decimal("1"), Decimal("2")], median)
+    assert len({calc_stat, CalculationStatistic([Decimal("1"), Decimal("2")], mean)}) == 1
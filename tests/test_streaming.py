@@ -0,0 +1,150 @@
+# pylint: disable=line-too-long
+'''Tests for the streaming statistics accumulators.'''
+import io
+import random
+from decimal import Decimal
+
+import pytest
+
+from app.plugins.stream_stats import StreamStatsCommand
+from calculator import Calculator
+from calculator.calculations import Calculations
+from calculator.operations import mean, median, mode
+from calculator.streaming import Accumulator, MeanAccumulator, MedianAccumulator, ModeAccumulator, StreamCalculation, read_numbers
+
+
+def numbers(size, seed=0, spread=50):
+    """Random Decimals with repeated values."""
+    rng = random.Random(seed)
+    return [Decimal(rng.randint(0, spread)) / 4 for _ in range(size)]
+
+
+@pytest.fixture(autouse=True)
+def clean_history():
+    """Every test starts and ends with an empty history."""
+    Calculator.clear_history()
+    yield
+    Calculator.clear_history()
+
+
+@pytest.mark.parametrize("accumulator_class, operation", [(MeanAccumulator, mean), (MedianAccumulator, median), (ModeAccumulator, mode)])
+@pytest.mark.parametrize("size", [1, 2, 101, 1000])
+def test_exact_results(accumulator_class, operation, size):
+    """Test that the accumulators fed in chunks, or merged, return what the list operations return."""
+    values = numbers(size, seed=size)
+    accumulator = accumulator_class()
+    for start in range(0, size, 7):
+        accumulator.update(values[start:start + 7])
+    assert accumulator.count == size
+    assert accumulator.exact
+    assert repr(accumulator.result()) == repr(operation(values))
+    merged = accumulator_class().update(values[:size // 3]).merge(accumulator_class().update(values[size // 3:]))
+    assert repr(merged.result()) == repr(operation(values))
+
+
+def test_mean_is_exact():
+    """Test that the running sum does not lose digits beyond the precision of the context."""
+    accumulator = MeanAccumulator().update([Decimal('1e30'), Decimal('1'), Decimal('-1e30'), Decimal('1')])
+    assert accumulator.result() == Decimal('0.5')
+
+
+def test_median_window():
+    """Test that a bounded median stays exact while the median is among the kept numbers, and says so when it is not."""
+    values = numbers(10000, seed=1, spread=10 ** 6)
+    accumulator = MedianAccumulator(capacity=500).update(values)
+    assert len(accumulator.values) < 1000
+    assert accumulator.exact
+    assert accumulator.result() == median(values)
+    drifting = MedianAccumulator(capacity=10).update(Decimal(value) for value in range(100))
+    drifting.update(Decimal(1000 + value) for value in range(1000))
+    assert not drifting.exact
+    assert drifting.result() == max(drifting.values)
+
+
+def test_median_window_merge():
+    """Test merging bounded medians, with overlapping and with disjoint windows."""
+    values = numbers(4000, seed=2, spread=10 ** 6)
+    merged = MedianAccumulator(capacity=400).update(values[:2000]).merge(MedianAccumulator(capacity=400).update(values[2000:]))
+    assert merged.exact
+    assert merged.result() == median(values)
+    low = MedianAccumulator(capacity=4).update(Decimal(value) for value in range(20))
+    high = MedianAccumulator(capacity=4).update(Decimal(value) for value in range(100, 120))
+    disjoint = low.merge(high)
+    assert disjoint.count == 40
+    assert not disjoint.exact
+    assert disjoint.result() in disjoint.values
+
+
+def test_mode_sketch():
+    """Test that a bounded mode keeps the frequent numbers of a stream and is flagged approximate."""
+    stream = [Decimal(7)] * 300 + [Decimal(value) for value in range(600)]
+    random.Random(3).shuffle(stream)
+    sketch = ModeAccumulator(capacity=8).update(stream)
+    assert len(sketch.counts) <= 8
+    assert not sketch.exact
+    assert sketch.result() == Decimal(7)
+    merged = ModeAccumulator(capacity=8).update(stream[:450]).merge(ModeAccumulator(capacity=8).update(stream[450:]))
+    assert len(merged.counts) <= 8
+    assert merged.result() == Decimal(7)
+    with pytest.raises(ValueError, match='capacity is too small'):
+        ModeAccumulator(capacity=1).update([Decimal(1), Decimal(2)]).result()
+
+
+def test_errors():
+    """Test the errors of empty streams, invalid capacities and merges of different kinds."""
+    with pytest.raises(ValueError, match='Cannot calculate the median of an empty stream'):
+        MedianAccumulator().result()
+    with pytest.raises(ValueError, match='capacity must be at least 2'):
+        MedianAccumulator(capacity=1)
+    with pytest.raises(ValueError, match='capacity must be positive'):
+        ModeAccumulator(capacity=0)
+    with pytest.raises(TypeError, match='Cannot merge MeanAccumulator into ModeAccumulator'):
+        ModeAccumulator().merge(MeanAccumulator())
+
+
+def test_accumulator_requires_methods():
+    """Test that an accumulator that does not implement update(), merge() and result() cannot be created."""
+    class Incomplete(Accumulator):
+        """An accumulator without result()."""
+        def update(self, numbers):
+            return self
+
+        def merge(self, other):
+            return self
+    with pytest.raises(TypeError, match='abstract method result'):
+        Incomplete()
+
+
+def test_record_in_history():
+    """Test that a recorded accumulator is a frozen history entry that saves as a statistic with the same result."""
+    accumulator = ModeAccumulator().update([Decimal(1), Decimal(2), Decimal(2), Decimal(1)])
+    assert Calculator.record_accumulator(accumulator) == [Decimal(1), Decimal(2)]
+    accumulator.update([Decimal(2)])
+    calculation = Calculations.get_latest()
+    assert isinstance(calculation, StreamCalculation)
+    assert repr(calculation) == 'StreamCalculation(4 numbers, mode)'
+    assert calculation.perform() == [Decimal(1), Decimal(2)]
+    assert Calculations.find_by_operation('mode') == [calculation]
+    assert mode(calculation.a) == calculation.perform()
+    row = Calculations.data_handler.calculation_to_row(calculation, statistic_as_list=False)
+    assert Calculations.data_handler.row_to_calculation(row).perform() == [Decimal(1), Decimal(2)]
+
+
+def test_read_numbers():
+    """Test that numbers are read from lines separated by commas or whitespace."""
+    assert list(read_numbers(['1, 2 3\n', '\n', '4.5,6'])) == [Decimal(1), Decimal(2), Decimal(3), Decimal('4.5'), Decimal(6)]
+
+
+def test_stream_stats_command(tmp_path, monkeypatch):
+    """Test that the plugin streams a file, or stdin, through the accumulators and records the three results."""
+    path = tmp_path / 'numbers.txt'
+    path.write_text('1, 2, 2\n3 4\n')
+    result = StreamStatsCommand().execute({'path': str(path)})
+    assert result.ok
+    assert result.message == 'mean(5 numbers) = 2.4\nmedian(5 numbers) = 2\nmode(5 numbers) = 2'
+    assert len(Calculations.get_history()) == 3
+    monkeypatch.setattr('sys.stdin', io.StringIO('5\n'))
+    assert StreamStatsCommand().execute(['-']).value == [Decimal(5), Decimal(5), Decimal(5)]
+    assert StreamStatsCommand().execute({'path': str(tmp_path / 'missing.txt')}).message.startswith('Invalid operation: ')
+    path.write_text('1, x\n')
+    assert not StreamStatsCommand().execute({'path': str(path)}).ok
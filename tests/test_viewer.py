@@ -0,0 +1,143 @@
+# pylint: disable=line-too-long
+'''Tests for the memory-mapped history viewer.'''
+from decimal import Decimal
+import os
+import pytest
+
+from calculator import Calculator
+from calculator.calculation import Calculation
+from calculator.calculations import Calculations
+from calculator.operations import add, multiply, mean
+from calculator.statistic import CalculationStatistic
+from data_handler import DataHandler
+from data_handler.viewer import HistoryViewer
+from app.plugins.view_history import ViewHistoryCommand
+
+
+@pytest.fixture
+def viewer_handler(tmp_path, monkeypatch):
+    """A DataHandler in append mode with ten saved additions."""
+    monkeypatch.setenv("CALCULATOR_HISTORY_FOLDER_PATH", str(tmp_path))
+    monkeypatch.setenv("CALCULATOR_HISTORY_FILE_NAME", "calculator_history.csv")
+    monkeypatch.setenv("CALCULATOR_HISTORY_WRITE_MODE", "append")
+    handler = DataHandler()
+    for number in range(10):
+        handler.add_to_csv(Calculation(Decimal(number), Decimal(1), add))
+    handler.save_csv_data()
+    return handler
+
+
+def page_operands(handler, page, size):
+    """Return the first operand of every calculation of a page."""
+    return [calc.a for _, calc in handler.iter_history_page(page, size)]
+
+
+def test_viewer_pages(viewer_handler):
+    """Test that pages hold the requested window and their position in the history."""
+    assert len(viewer_handler.viewer) == 10
+    assert page_operands(viewer_handler, 1, 4) == [0.0, 1.0, 2.0, 3.0]
+    assert page_operands(viewer_handler, 3, 4) == [8.0, 9.0]
+    assert not page_operands(viewer_handler, 4, 4)
+    assert [position for position, _ in viewer_handler.iter_history_page(2, 4)] == [4, 5, 6, 7]
+
+
+def test_viewer_invalid_page(viewer_handler):
+    """Test that pages and sizes must be positive."""
+    with pytest.raises(ValueError, match="must be positive"):
+        viewer_handler.viewer.page(0, 10)
+
+
+def test_viewer_persists_index(viewer_handler, mocker):
+    """Test that a new viewer reuses the index saved next to the CSV file instead of scanning it."""
+    viewer_handler.viewer.refresh()
+    assert os.path.exists(viewer_handler.csv_filepath + ".idx")
+    viewer = HistoryViewer(viewer_handler.csv_filepath)
+    build = mocker.patch.object(HistoryViewer, "_build_index")
+    assert [row["num_1"] for _, row in viewer.page(2, 5)] == ["5", "6", "7", "8", "9"]
+    build.assert_not_called()
+
+
+def test_viewer_extends_index_after_append(viewer_handler, mocker):
+    """Test that rows appended after the index was built are indexed without rescanning the file."""
+    viewer_handler.viewer.refresh()
+    viewer_handler.add_to_csv(CalculationStatistic([Decimal('1'), Decimal('2.5')], mean))
+    viewer_handler.save_csv_data()
+    build = mocker.patch.object(HistoryViewer, "_build_index")
+    viewer = HistoryViewer(viewer_handler.csv_filepath)
+    assert len(viewer) == 11
+    (position, row), = viewer.page(11, 1)
+    assert position == 10 and row["operator"] == "mean"
+    build.assert_not_called()
+
+
+def test_viewer_skips_tombstones(viewer_handler):
+    """Test that deleted rows are hidden and the index is rebuilt when rows are deleted."""
+    viewer_handler.viewer.refresh()
+    viewer_handler.add_tombstones([0, 5])
+    assert len(viewer_handler.viewer) == 8
+    assert page_operands(viewer_handler, 1, 5) == [1.0, 2.0, 3.0, 4.0, 6.0]
+    viewer_handler.add_to_csv(Calculation(Decimal(10), Decimal(1), add))
+    viewer_handler.save_csv_data()
+    assert page_operands(viewer_handler, 2, 5) == [7.0, 8.0, 9.0, 10.0]
+
+
+def test_viewer_rebuilds_after_rewrite(viewer_handler):
+    """Test that truncating the file invalidates the index."""
+    viewer_handler.viewer.refresh()
+    viewer_handler.delete_csv_file_data()
+    assert len(viewer_handler.viewer) == 0
+    viewer_handler.add_to_csv(Calculation(Decimal(7), Decimal(2), multiply))
+    viewer_handler.save_csv_data()
+    assert page_operands(viewer_handler, 1, 10) == [7.0]
+
+
+def test_viewer_file_without_trailing_newline(tmp_path):
+    """Test that the last line is read even when the file does not end with a newline."""
+    path = tmp_path / "history.csv"
+    path.write_text("num_1,num_2,operator\n1,2,add\n3,4,subtract")
+    viewer = HistoryViewer(str(path))
+    assert [row for _, row in viewer.page(1, 10)] == [
+        {"num_1": "1", "num_2": "2", "operator": "add"},
+        {"num_1": "3", "num_2": "4", "operator": "subtract"},
+    ]
+
+
+def test_viewer_requires_csv_format(viewer_handler, monkeypatch):
+    """Test that the viewer is only available for the CSV format."""
+    monkeypatch.setattr(viewer_handler, "history_format", "numpy")
+    with pytest.raises(ValueError, match="only supports the CSV"):
+        _ = viewer_handler.viewer
+
+
+def test_view_history_command(viewer_handler, monkeypatch, capsys):
+    """Test that the view_history command prints the requested page of the saved history."""
+    monkeypatch.setattr(Calculations, "data_handler", viewer_handler)
+    inputs = iter(["2", "3"])
+    monkeypatch.setattr('builtins.input', lambda _: next(inputs))
+    ViewHistoryCommand().execute()
+    captured = capsys.readouterr()
+    assert "4. " in captured.out and "6. " in captured.out and "7. " not in captured.out
+
+
+def test_view_history_command_structured(viewer_handler, monkeypatch, capsys):
+    """Test that the view_history command returns the page without printing it when given arguments."""
+    monkeypatch.setattr(Calculations, "data_handler", viewer_handler)
+    result = ViewHistoryCommand().execute({'page': 2, 'size': 3})
+    lines = result.message.splitlines()
+    assert result.value == 3 and [line.split('.')[0] for line in lines] == ['4', '5', '6']
+    assert ViewHistoryCommand().execute({'page': 5, 'size': 10}).message == 'No saved calculations on page 5'
+    assert capsys.readouterr().out == ''
+
+
+def test_view_history_command_empty_page(viewer_handler, monkeypatch, capsys):
+    """Test the message printed for a page past the end of the history."""
+    monkeypatch.setattr(Calculations, "data_handler", viewer_handler)
+    assert Calculator.print_saved_history(5, 10) == 0
+    assert "No saved calculations on page 5" in capsys.readouterr().out
+
+
+def test_view_history_command_invalid_input(monkeypatch, capsys):
+    """Test that a page number that is not a number is reported."""
+    monkeypatch.setattr('builtins.input', lambda _: "abc")
+    ViewHistoryCommand().execute()
+    assert "Invalid page" in capsys.readouterr().out